@@ -1,5 +1,12 @@
+"""
+    Celery app shared by the Dash app and the workers.
+
+    Doesn't import Dash or any page, so the query workers, started with
+    'celery -A _celery:celery_app worker -Q data', only load the queries
+    and what they use (db_manager, cache_manager). The callback workers run
+    the Dash background callbacks, and are started with 'app:celery_app'.
+"""
 from celery import Celery
-from dash import CeleryManager
 import os
 
 redis_host = "{}".format(os.getenv("REDIS_SERVICE_HOST", "redis-cache"))
@@ -8,13 +15,63 @@ redis_password = "{}@".format(os.getenv("REDIS_PASSWORD", ""))
 REDIS_URL = f"redis://:{redis_password}{redis_host}:{redis_port}"
 
 
-"""CREATE CELERY TASK QUEUE AND MANAGER"""
+# task modules the workers import at startup.
+QUERY_MODULES = [
+    "queries.issues_query",
+    "queries.commits_query",
+    "queries.contributors_query",
+    "queries.prs_query",
+    "queries.company_query",
+    "queries.contributor_identity_query",
+    "queries.pr_assignee_query",
+    "queries.issue_assignee_query",
+    "queries.user_groups_query",
+    "queries.realease_frequency_query",
+    "queries.response_time_query",
+    "queries.forks_query",
+    "queries.home_metrics_query",
+    "queries.repo_catalog_query",
+    "queries.refresh",
+    "queries.shards",
+]
+
+
+"""CREATE CELERY TASK QUEUE"""
 celery_app = Celery(
     __name__,
     broker=REDIS_URL,
     backend=REDIS_URL,
+    include=QUERY_MODULES,
 )
 
 celery_app.conf.update(task_time_limit=84600, task_acks_late=True, task_track_started=True)
 
-celery_manager = CeleryManager(celery_app=celery_app)
+# seconds between refreshes of the home page rollups. scheduled by Celery
+# beat, which runs as its own single process ('worker-beat'), not embedded
+# in the scaled query workers, so each refresh is sent once.
+ROLLUP_REFRESH_SECONDS = int(os.getenv("ROLLUP_REFRESH_SECONDS", "86400"))
+
+# seconds between refreshes of the repo catalog snapshot that processes load at startup.
+CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "3600"))
+
+# seconds between incremental refreshes of the cached data of the append-only queries.
+QUERY_REFRESH_SECONDS = int(os.getenv("QUERY_REFRESH_SECONDS", "86400"))
+
+celery_app.conf.beat_schedule = {
+    "refresh-home-metrics": {
+        "task": "queries.refresh.refresh_cached_queries",
+        "schedule": ROLLUP_REFRESH_SECONDS,
+        "kwargs": {"queries": ["home_metrics_query"]},
+        "options": {"queue": "data"},
+    },
+    "refresh-repo-catalog": {
+        "task": "queries.repo_catalog_query.refresh_repo_catalog",
+        "schedule": CATALOG_REFRESH_SECONDS,
+        "options": {"queue": "data"},
+    },
+    "refresh-cached-queries": {
+        "task": "queries.refresh.refresh_cached_queries",
+        "schedule": QUERY_REFRESH_SECONDS,
+        "options": {"queue": "data"},
+    },
+}
@@ -7,6 +7,7 @@ from flask_login import (
     UserMixin,
 )
 import redis
+from cache_manager.redis_pools import users_client
 from flask import url_for, redirect, abort, session, request, flash, current_app
 import logging
 import json
@@ -66,21 +67,16 @@ def configure_server_login(server):
         Returns:
             User | None: User object if user ID in session, None otherwise.
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
+        users_cache = users_client()
+
+        # runs on every request, so skip the separate ping- the pool
+        # health-checks idle connections and a failure surfaces here.
         try:
-            users_cache.ping()
+            # return the JSON of a user that was set in the Redis instance
+            if users_cache.exists(id):
+                return User(id)
         except redis.exceptions.ConnectionError:
             logging.error("LOAD_USER: Could not connect to users-cache.")
-            return None
-
-        # return the JSON of a user that was set in the Redis instance
-        if users_cache.exists(id):
-            usn = json.loads(users_cache.get(id))["username"]
-            return User(id)
         return None
 
     @server.route("/logout/")
@@ -96,11 +92,7 @@ def configure_server_login(server):
             None
 
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
+        users_cache = users_client()
         try:
             users_cache.ping()
         except redis.exceptions.ConnectionError:
@@ -127,11 +119,7 @@ def configure_server_login(server):
         Returns:
             None
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
+        users_cache = users_client()
         try:
             users_cache.ping()
         except redis.exceptions.ConnectionError:
@@ -174,11 +162,7 @@ def configure_server_login(server):
         Returns:
             None
         """
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
+        users_cache = users_client()
         try:
             users_cache.ping()
         except redis.exceptions.ConnectionError:
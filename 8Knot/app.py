@@ -21,7 +21,7 @@ import dash_bootstrap_components as dbc
 import dash_bootstrap_templates as dbt
 from db_manager.augur_manager import AugurManager
 import _login
-from _celery import celery_app, celery_manager
+from _celery import celery_app
 
 logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO)
 
@@ -41,7 +41,7 @@ except KeyError:
 except SQLAlchemyError:
     sys.exit(1)
 
-# grab list of projects and orgs from Augur database.
+# load the catalog of projects and orgs, from its snapshot if there is one.
 augur.multiselect_startup()
 
 
@@ -70,6 +70,9 @@ plt_io.templates.default = "custom_dark"
 
 
 """CREATE APPLICATION"""
+# runs the background callbacks on the callback workers.
+celery_manager = dash.CeleryManager(celery_app=celery_app)
+
 app = dash.Dash(
     __name__,
     use_pages=True,
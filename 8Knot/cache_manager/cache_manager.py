@@ -1,8 +1,56 @@
-import redis
-import os
 import hashlib
+import os
 import pandas as pd
-import io
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from pandas.api.types import union_categoricals
+from cache_manager import frame_cache
+from cache_manager.partition import dictionary_encode
+from cache_manager.redis_pools import cache_client
+
+# days before the oldest watermark that incremental refreshes pull again, so that
+# rows collected after a refresh but dated before its watermark are picked up.
+QUERY_REFRESH_LOOKBACK_DAYS = int(os.getenv("QUERY_REFRESH_LOOKBACK_DAYS", "7"))
+
+# claims the leases at KEYS for job ARGV[1] with expiry ARGV[2] seconds,
+# if they're free or held by one of the jobs in ARGV[3:].
+# returns each lease's holder after the claim.
+_CLAIM_SCRIPT = """
+local replace = {}
+for i = 3, #ARGV do
+    replace[ARGV[i]] = true
+end
+
+local holders = {}
+for i, key in ipairs(KEYS) do
+    local held = redis.call('GET', key)
+    if (not held) or replace[held] then
+        redis.call('SET', key, ARGV[1], 'EX', ARGV[2])
+        held = ARGV[1]
+    end
+    holders[i] = held
+end
+return holders
+"""
+
+# looks up the figure whose key is ARGV[1] followed by the generations of
+# the data at KEYS. returns false if any of them has no generation yet,
+# otherwise the figure's key and the figure, false if it isn't cached.
+_FIGURE_SCRIPT = """
+local gens = {}
+for i, key in ipairs(KEYS) do
+    local gen = redis.call('GET', key)
+    if not gen then
+        return false
+    end
+    gens[i] = gen
+end
+
+local key = ARGV[1] .. redis.sha1hex(table.concat(gens, ','))
+return {key, redis.call('GET', key)}
+"""
 
 
 class CacheManager:
@@ -22,8 +70,27 @@ class CacheManager:
         set(func, repo, data) :
             Sets data at key hash(func, repo).
 
-        setm(func, [repo], [data]) :
+        setm(func, [repo], [data], watermark) :
             Sets [data] at keys [hash(func, repo)] of [repo]
+            and, optionally, each repo's high-watermark.
+
+        mergem(func, [repo], [data], watermark, since) :
+            Replaces cached rows at or after 'since' with newly pulled rows.
+
+        get_generations(func, [repo]):
+            Returns each repo's data generation, None if Nil.
+
+        get_watermarks(func, [repo]):
+            Returns each repo's high-watermark, None if Nil.
+
+        refresh_since(func, [repo]):
+            Returns the bound to pull newer rows from, None if a full pull is needed.
+
+        get_cached_repos(func):
+            Returns the repos whose data of 'func' is cached.
+
+        claimm(func, [repo], job_id, ttl, replace):
+            Takes the in-flight leases of [repo] for job_id unless another job holds them.
 
         get(func, repo):
             Returns data at key hash(func, repo), None if Nil.
@@ -38,17 +105,31 @@ class CacheManager:
         existsm(func, [repo]):
             Returns number of names that exist.
 
+        grabm(func, [repo], columns, filters):
+            Returns aggregate DataFrame if all data available, None otherwise.
+            Reads only 'columns' and rows in the 'filters' ranges.
+
+        wait_for(func, [repo], timeout, columns, filters):
+            Blocks until all data is available, then returns aggregate DataFrame.
+            Woken by the completion notices that 'setm' publishes.
+
+        wait_for_prepared(func, [repo], prepare, columns, timeout):
+            Like 'wait_for', but returns the aggregate DataFrame after 'prepare',
+            shared within the process while the data's generations are unchanged.
+
+        get_figure(name, [func], [repo], inputs):
+            Returns the key of a figure for the current data generations
+            and the figure stored at it, in one round trip.
+
+        set_figure(key, figure, expire):
+            Stores a figure at a key from 'get_figure'.
+
     """
 
     def __init__(self, decode_value=False):
-        # Redis cache for job queue and results cache
-        self._redis = redis.StrictRedis(
-            # openshift, compose will reconcile the 'redis' naming via the dns
-            host=os.getenv("REDIS_SERVICE_HOST", "redis-cache"),
-            port=os.getenv("REDIS_SERVICE_PORT", "6379"),
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=decode_value,
-        )
+        # Redis cache for job queue and results cache.
+        # client is cheap, connections come from the process-wide pool.
+        self._redis = cache_client(decode_responses=decode_value)
 
     def _get_hash(self, func, repo):
         """
@@ -85,6 +166,22 @@ class CacheManager:
 
         return h
 
+    def _get_channel(self, func):
+        """
+        (private)
+        Name of the pub/sub channel that completion notices
+        for the results of 'func' are published on.
+
+        Args:
+        -----
+            func (function): Query function used
+
+        Returns:
+        --------
+            str: channel name
+        """
+        return f"ready:{func.__name__}"
+
     def set(self, func, repo, data):
         """Sets redis value as data at name=hash(func, repo)
 
@@ -102,13 +199,18 @@ class CacheManager:
 
         return ack
 
-    def setm(self, func, repos, datas):
+    def setm(self, func, repos, datas, watermark=None):
         """Sets many redis value as data at name=hash(func, repo)
 
+        If 'watermark' names a column of the data, each repo's
+        high-watermark (max of that column) is stored alongside its data.
+        Every set bumps the data's generation.
+
         Args:
             func (function): Query function used
             repo (list[int]): list of repo_ids of repos
             data (list[list(dict)]): list of rows of data in dictionary format.
+            watermark (str | None): column to take each repo's watermark from.
 
         Returns:
             list[boolean]: confirmations of successful set operations.
@@ -118,12 +220,308 @@ class CacheManager:
         hs = [self._get_hash(func, r) for r in repos]
         ds = datas
 
+        mapping = dict(zip(hs, ds))
+
+        # repos without rows have no watermark, drop any stale one.
+        stale = []
+        if watermark is not None:
+            for h, d in zip(hs, ds):
+                mark = _max_value(d, watermark)
+                if mark is None:
+                    stale.append(self._get_watermark_key(h))
+                else:
+                    mapping[self._get_watermark_key(h)] = mark
+
         # bulk-set keys to values in Redis
-        acks = self._redis.mset(dict(zip(hs, ds)))
+        acks = self._redis.mset(mapping)
+        if stale:
+            self._redis.delete(*stale)
+
+        # new generation of the data, so that frames prepared from the old data aren't used.
+        pipe = self._redis.pipeline(transaction=False)
+        for h in hs:
+            pipe.incr(self._get_generation_key(h))
+
+        # remembered so that scheduled refreshes know which repos are cached.
+        if repos:
+            pipe.sadd(self._get_repos_key(func), *repos)
+        pipe.execute()
+
+        # wake any callbacks that are waiting on these keys.
+        self._redis.publish(self._get_channel(func), " ".join(hs))
 
         # from redis docs: "(Return is) always OK since MSET can't fail."
         return acks
 
+    def mergem(self, func, repos, datas, watermark, since):
+        """Merges newly pulled rows into the cached data of many repos.
+
+        'datas' has to hold every row whose 'watermark' column is >= 'since'.
+        Cached rows from before 'since' are kept, later ones are replaced by
+        the new rows, so rows that were cached at the old watermark aren't duplicated.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            data (list[bytes]): feather blob of new rows per repo
+            watermark (str): column the refresh was filtered on
+            since (str): lower bound the new rows were pulled from
+
+        Returns:
+            list[boolean]: confirmations of successful set operations.
+        """
+
+        cached = self.getm(func=func, repos=repos)
+
+        merged = []
+        for old, new in zip(cached, datas):
+            if old is None:
+                merged.append(new)
+                continue
+
+            old_table = feather.read_table(pa.BufferReader(old))
+            col = old_table[watermark]
+
+            # columns stored dictionary-encoded stay that way.
+            categories = [f.name for f in old_table.schema if pa.types.is_dictionary(f.type)]
+
+            # rows without a value can't have been re-pulled, keep them.
+            keep = pc.fill_null(pc.less(col, _as_scalar(since, col.type)), True)
+            old_df = old_table.filter(keep).to_pandas()
+            new_df = feather.read_table(pa.BufferReader(new)).to_pandas()
+
+            # an empty side would turn the other's columns to object dtype.
+            if len(new_df) == 0:
+                m_df = old_df
+            elif len(old_df) == 0:
+                m_df = new_df
+            else:
+                m_df = pd.concat([old_df, new_df]).reset_index(drop=True)
+
+            sink = pa.BufferOutputStream()
+            m_table = dictionary_encode(pa.Table.from_pandas(m_df, preserve_index=False), categories)
+            feather.write_feather(m_table, sink)
+            merged.append(sink.getvalue().to_pybytes())
+
+        return self.setm(func=func, repos=repos, datas=merged, watermark=watermark)
+
+    def get_generations(self, func, repos):
+        """Gets each repo's data generation for hash(func, repo)
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[int | None]: generation per repo, None if there isn't one.
+        """
+
+        ks = [self._get_generation_key(self._get_hash(func, r)) for r in repos]
+        gens = self._redis.mget(ks)
+
+        return [None if g is None else int(g) for g in gens]
+
+    def _get_generation_key(self, h):
+        """
+        (private)
+        Key of the generation counter of the data at key 'h'.
+
+        Args:
+            h (str): key of the data
+
+        Returns:
+            str: key of the generation
+        """
+        return f"{h}:generation"
+
+    def get_watermarks(self, func, repos):
+        """Gets each repo's high-watermark for hash(func, repo)
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            list[str | None]: ISO-formatted watermark per repo, None if there isn't one.
+        """
+
+        ks = [self._get_watermark_key(self._get_hash(func, r)) for r in repos]
+        marks = self._redis.mget(ks)
+
+        return [m.decode("utf-8") if isinstance(m, bytes) else m for m in marks]
+
+    def refresh_since(self, func, repos):
+        """Lower bound for an incremental refresh of many repos.
+        Rows at or after it have to be pulled again; everything before
+        it is already cached for every repo.
+
+        Watermarks are the max of a column dating each row's event, not
+        its collection, so rows collected late are dated before them.
+        The bound reaches QUERY_REFRESH_LOOKBACK_DAYS back from the
+        oldest watermark to pick those rows up.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+
+        Returns:
+            str | None: ISO-formatted bound, None if a full pull is needed.
+        """
+
+        # repos that were never cached need all of their rows.
+        if len(repos) == 0 or self.existsm(func=func, repos=repos) != len(repos):
+            return None
+
+        # repos cached without rows have no watermark, so they're pulled in full.
+        marks = self.get_watermarks(func=func, repos=repos)
+        if None in marks:
+            return None
+
+        # ISO-formatted values order the same as strings.
+        mark = min(marks)
+        since = pd.Timestamp(mark) - pd.Timedelta(days=QUERY_REFRESH_LOOKBACK_DAYS)
+
+        # dates stay dates, the queries take them as midnight UTC.
+        return since.date().isoformat() if len(mark) == 10 else since.isoformat()
+
+    def get_cached_repos(self, func):
+        """Gets the repos whose data of 'func' is cached.
+        Repos whose data is gone (e.g. evicted) are forgotten.
+
+        Args:
+            func (function): Query function used
+
+        Returns:
+            list[int]: repo_ids, ascending
+        """
+
+        key = self._get_repos_key(func)
+        repos = sorted(int(r) for r in self._redis.smembers(key))
+
+        pipe = self._redis.pipeline(transaction=False)
+        for r in repos:
+            pipe.exists(self._get_hash(func, r))
+        cached = pipe.execute()
+
+        gone = [r for r, c in zip(repos, cached) if not c]
+        if gone:
+            self._redis.srem(key, *gone)
+
+        return [r for r, c in zip(repos, cached) if c]
+
+    def _get_repos_key(self, func):
+        """
+        (private)
+        Key of the set of repos that data of 'func' was set for.
+
+        Args:
+            func (function): Query function used
+
+        Returns:
+            str: key of the set
+        """
+        return f"repos:{func.__name__}"
+
+    def _get_watermark_key(self, h):
+        """
+        (private)
+        Key that the watermark of the data at key 'h' is stored at.
+
+        Args:
+            h (str): key of the data
+
+        Returns:
+            str: key of the watermark
+        """
+        return f"{h}:watermark"
+
+    def get_figure(self, name, funcs, repos, inputs):
+        """Gets a stored figure of the current data.
+
+        Figures are keyed by the visualization's name, a hash of its inputs,
+        and the generations of the data of every (func, repo) it's built
+        from, so a figure is only found while its data is unchanged.
+
+        Args:
+            name (str): visualization the figure is of and the version of its code
+            funcs (list[function]): Query functions the figure is built from
+            repo (list[int]): list of repo_ids of repos
+            inputs (str): normalized inputs of the figure, other than the repos
+
+        Returns:
+            (str | None, bytes | None): key of the figure, None if some data
+                has no generation yet, and the figure if it's stored.
+        """
+
+        ks = [self._get_generation_key(self._get_hash(f, r)) for f in funcs for r in repos]
+        prefix = f"figure:{name}:{hashlib.md5(inputs.encode('utf-8')).hexdigest()}:"
+
+        # generations and the figure in one atomic step.
+        found = self._redis.eval(_FIGURE_SCRIPT, len(ks), *ks, prefix)
+        if not found:
+            return None, None
+
+        key, figure = found
+        return (key.decode("utf-8") if isinstance(key, bytes) else key), figure
+
+    def set_figure(self, key, figure, expire):
+        """Stores a figure at a key from 'get_figure'.
+
+        Figures of older data generations are never looked up again,
+        so every figure expires.
+
+        Args:
+            key (str): key of the figure
+            figure (str): serialized figure
+            expire (int): seconds the figure is kept
+
+        Returns:
+            boolean: confirmation of the set.
+        """
+
+        return self._redis.set(key, figure, ex=expire)
+
+    def claimm(self, func, repos, job_id, ttl, replace=()):
+        """Claims the in-flight leases of hash(func, repo) for a job.
+
+        A lease marks that a job is extracting a repo's data, so that
+        concurrent requests for the same data attach to that job instead
+        of starting another one. Leases expire after 'ttl' seconds in case
+        their job never finishes.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            job_id (str): id of the job that would extract the data
+            ttl (int): seconds before the claimed leases expire
+            replace (list[str]): ids of jobs whose leases are taken over, e.g. failed jobs
+
+        Returns:
+            list[str]: id of the job holding each repo's lease, 'job_id' where the claim succeeded.
+        """
+
+        ks = [self._get_lease_key(self._get_hash(func, r)) for r in repos]
+        if not ks:
+            return []
+
+        # check-and-set of all leases in one atomic step.
+        holders = self._redis.eval(_CLAIM_SCRIPT, len(ks), *ks, job_id, int(ttl), *replace)
+
+        return [h.decode("utf-8") if isinstance(h, bytes) else h for h in holders]
+
+    def _get_lease_key(self, h):
+        """
+        (private)
+        Key of the in-flight lease for the data at key 'h'.
+
+        Args:
+            h (str): key of the data
+
+        Returns:
+            str: key of the lease
+        """
+        return f"inflight:{h}"
+
     def get(self, func, repo):
         """Get redis value as data at name=hash(func, repo)
 
@@ -197,13 +595,20 @@ class CacheManager:
         # return results
         return n
 
-    def grabm(self, func, repos):
+    def grabm(self, func, repos, columns=None, filters=None):
         """Checks to see if data is ready using 'existsm'
         and builds aggregate DataFrame to return to callback.
 
+        Blobs are read as Arrow tables so that only the requested columns
+        are deserialized, and range filters are applied in Arrow compute
+        before anything is converted to pandas.
+
         Args:
             func (function): Query function used
             repo (list[int]): list of repo_ids of repos
+            columns (list[str] | None): columns to return. All columns if None.
+            filters (dict{str: (lo, hi)} | None): inclusive range per column, e.g.
+                {"created": (start_date, end_date)}. Either bound may be None.
 
         Returns:
             pd.DataFrame | None: Data if all available.
@@ -217,13 +622,353 @@ class CacheManager:
         # get all results from cache
         dfs_from_cache = self.getm(func=func, repos=repos)
 
-        pd_dfs = []
-        for bdf in dfs_from_cache:
-            bbuff = io.BytesIO(bdf)
-            bbuff.seek(0)
-            df = pd.read_feather(bbuff)
-            pd_dfs.append(df)
+        pd_dfs = [self._read_blob(bdf, columns, filters) for bdf in dfs_from_cache]
 
-        out_df = pd.concat(pd_dfs)
+        out_df = _concat_frames(pd_dfs)
 
         return out_df
+
+    def _read_blob(self, bdf, columns=None, filters=None):
+        """
+        (private)
+        Deserializes a single feather blob, reading only 'columns'
+        and keeping only the rows that pass 'filters'.
+
+        Args:
+            bdf (bytes): feather-formatted DataFrame
+            columns (list[str] | None): columns to return. All columns if None.
+            filters (dict{str: (lo, hi)} | None): inclusive range per column.
+
+        Returns:
+            pd.DataFrame: projected and filtered data
+        """
+        filters = {c: b for c, b in (filters or {}).items() if b is not None and b != (None, None)}
+
+        # BufferReader reads the bytes in place, no copy into a BytesIO.
+        # blobs of repos without rows can lack columns, only the ones they have are read.
+        names = set(pa.ipc.open_file(pa.BufferReader(bdf)).schema.names)
+
+        # filtered columns have to be read even if they aren't returned.
+        read_cols = None
+        if columns is not None:
+            read_cols = [c for c in list(columns) + [c for c in filters if c not in columns] if c in names]
+
+        table = feather.read_table(pa.BufferReader(bdf), columns=read_cols)
+
+        for col, (lo, hi) in filters.items():
+            # a column the blob doesn't have is all missing, no row passes.
+            mask = (
+                _range_mask(table[col], lo, hi) if col in names else pa.array([False] * table.num_rows, type=pa.bool_())
+            )
+            table = table.filter(mask)
+
+        if columns is not None:
+            # columns the blob doesn't have are read as all missing.
+            for c in columns:
+                if c not in names:
+                    table = table.append_column(c, pa.nulls(table.num_rows))
+            table = table.select(list(columns))
+
+        return table.to_pandas()
+
+    def wait_for(self, func, repos, timeout=None, recheck=30.0, columns=None, filters=None):
+        """Blocks until data for all repos is in the cache
+        and builds aggregate DataFrame to return to callback.
+
+        Subscribes to the completion channel of 'func' before checking
+        which keys are missing, so a notice published by 'setm' in between
+        can't be lost. While waiting, the connection idles on the subscription
+        rather than polling Redis; missing keys are only re-checked every
+        'recheck' seconds in case a notice was dropped (e.g. on reconnect).
+        A key dropped between the wait and the read is waited for again,
+        so None is only returned on timeout.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            timeout (float | None): seconds to wait before giving up. Waits indefinitely if None.
+            recheck (float): seconds between fallback existence checks.
+            columns (list[str] | None): passed to 'grabm'.
+            filters (dict{str: (lo, hi)} | None): passed to 'grabm'.
+
+        Returns:
+            pd.DataFrame | None: Data if all available before timeout.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if not self._wait(func, repos, _remaining(deadline), recheck):
+                return None
+
+            df = self.grabm(func=func, repos=repos, columns=columns, filters=filters)
+            # a key can be dropped (e.g. evicted, refreshed) between the wait and the read, wait for it again.
+            if df is not None or _remaining(deadline) == 0:
+                return df
+
+    def wait_for_prepared(self, func, repos, prepare, columns=None, timeout=None, recheck=30.0):
+        """Blocks until data for all repos is in the cache and returns
+        the aggregate DataFrame after 'prepare' (e.g. parsing dates, sorting).
+
+        The prepared frame is kept in this process's frame cache, keyed by
+        (func, frozenset(repos), prepare) and tagged with the generations of
+        the repos' data, so callbacks of the same selection prepare it once
+        per process until the data changes.
+
+        The cached frame is shared, so callers get a shallow copy of it:
+        adding, replacing, or dropping columns and rows is fine, writing into
+        its values in place raises, as its arrays are read-only (see
+        frame_cache.freeze). Selecting 'columns' returns a copy of them.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            prepare (function): DataFrame -> DataFrame, applied to all columns of the data
+            columns (list[str] | None): columns to return. All columns if None.
+            timeout (float | None): seconds to wait before giving up. Waits indefinitely if None.
+            recheck (float): seconds between fallback existence checks.
+
+        Returns:
+            pd.DataFrame | None: Prepared data if all available before timeout.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if not self._wait(func, repos, _remaining(deadline), recheck):
+                return None
+
+            df = self._get_prepared(func, repos, prepare)
+            # a key can be dropped between the wait and the read, wait for it again.
+            if df is not None:
+                break
+            if _remaining(deadline) == 0:
+                return None
+
+        if columns is not None:
+            return df[list(columns)]
+
+        return df.copy(deep=False)
+
+    def _get_prepared(self, func, repos, prepare):
+        """
+        (private)
+        Prepared data of the repos, from the frame cache if its
+        generation is current, else read from Redis and prepared.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            prepare (function): DataFrame -> DataFrame, applied to all columns of the data
+
+        Returns:
+            pd.DataFrame | None: shared prepared data, None if a repo's data is missing.
+        """
+        key = (func.__name__, frozenset(repos), f"{prepare.__module__}.{prepare.__qualname__}")
+
+        # generations in repo order, so the same set of repos has the same generation.
+        gens = dict(zip(repos, self.get_generations(func=func, repos=repos)))
+        generation = tuple(gens[r] for r in sorted(gens))
+
+        # data set before generations were kept can't be told apart from newer data.
+        memo = None not in generation
+
+        df = frame_cache.frames.get(key, generation) if memo else None
+        if df is None:
+            df = self.grabm(func=func, repos=repos)
+            if df is None:
+                return None
+
+            df = prepare(df)
+            if memo:
+                # read-only, an in-place write would change it for every later callback.
+                frame_cache.frames.put(key, generation, frame_cache.freeze(df))
+
+        return df
+
+    def _wait(self, func, repos, timeout, recheck):
+        """
+        (private)
+        Blocks until data for all repos is in the cache, woken
+        by the completion notices that 'setm' publishes.
+
+        Args:
+            func (function): Query function used
+            repo (list[int]): list of repo_ids of repos
+            timeout (float | None): seconds to wait before giving up. Waits indefinitely if None.
+            recheck (float): seconds between fallback existence checks.
+
+        Returns:
+            bool: whether all data is available.
+        """
+
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._get_channel(func))
+
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            pending = self._missing({self._get_hash(func, r) for r in repos})
+
+            while pending:
+                wait = recheck
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return False
+
+                msg = pubsub.get_message(timeout=wait)
+
+                if msg is None:
+                    # nothing heard, make sure we didn't miss a notice.
+                    pending = self._missing(pending)
+                    continue
+
+                # notice payload is the space-separated list of keys that were set.
+                data = msg["data"]
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                pending.difference_update(data.split())
+        finally:
+            pubsub.close()
+
+        return True
+
+    def _missing(self, hs):
+        """
+        (private)
+        Filters a set of keys down to those not currently in Redis.
+        Checks are pipelined so this is a single round trip.
+
+        Args:
+            hs (set[str]): keys to check
+
+        Returns:
+            set[str]: keys that don't exist
+        """
+        hs = list(hs)
+
+        pipe = self._redis.pipeline(transaction=False)
+        for h in hs:
+            pipe.exists(h)
+        found = pipe.execute()
+
+        return {h for h, n in zip(hs, found) if not n}
+
+
+def _concat_frames(dfs):
+    """
+    Concatenates the DataFrames of many repos. Categorical columns stay
+    categorical over the union of the categories, where pd.concat would
+    fall back to object dtype if the repos' categories differ.
+
+    Args:
+        dfs (list[pd.DataFrame]): data per repo
+
+    Returns:
+        pd.DataFrame: concatenated data
+    """
+    out_df = pd.concat(dfs)
+
+    for c in out_df.columns:
+        if isinstance(out_df[c].dtype, pd.CategoricalDtype) or not all(c in d.columns for d in dfs):
+            continue
+
+        # repos without rows may have read the column as another dtype, they add nothing.
+        parts = [d[c] for d in dfs if len(d) > 0]
+        if not parts or not all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            continue
+
+        # repos whose values are all missing have categories of another dtype.
+        if len({p.cat.categories.dtype for p in parts}) > 1:
+            parts = [p.cat.set_categories(p.cat.categories.astype(object)) for p in parts]
+
+        out_df[c] = union_categoricals(parts, ignore_order=True)
+
+    return out_df
+
+
+def _remaining(deadline):
+    """
+    Seconds left until 'deadline', never negative.
+
+    Args:
+        deadline (float | None): time.monotonic() to stop at, None for no deadline.
+
+    Returns:
+        float | None: seconds left, None for no deadline.
+    """
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def _range_mask(col, lo, hi):
+    """
+    Boolean mask of lo <= col <= hi, computed in Arrow.
+    Null values never pass, same as NaT comparisons in pandas.
+    Columns of Arrow's null type (e.g. dates of a result without rows)
+    hold only nulls, so nothing passes.
+
+    Args:
+        col (pa.ChunkedArray): column to filter on
+        lo (str | datetime | date | None): lower bound, unbounded if None.
+        hi (str | datetime | date | None): upper bound, unbounded if None.
+
+    Returns:
+        pa.ChunkedArray: boolean mask
+    """
+    if pa.types.is_null(col.type):
+        return pc.is_valid(col)
+
+    mask = None
+    for bound, op in ((lo, pc.greater_equal), (hi, pc.less_equal)):
+        if bound is None:
+            continue
+        m = op(col, _as_scalar(bound, col.type))
+        mask = m if mask is None else pc.and_(mask, m)
+    return mask
+
+
+def _as_scalar(bound, typ):
+    """
+    Converts a filter bound (e.g. a date picker's "YYYY-MM-DD")
+    to an Arrow scalar comparable with a column of type 'typ'.
+
+    Args:
+        bound (str | datetime | date | number): value to convert
+        typ (pa.DataType): type of the column being filtered
+
+    Returns:
+        pa.Scalar: bound as 'typ'
+    """
+    if pa.types.is_date(typ):
+        return pa.scalar(pd.Timestamp(bound).date(), type=typ)
+
+    if pa.types.is_timestamp(typ):
+        ts = pd.Timestamp(bound)
+        if typ.tz is not None and ts.tzinfo is None:
+            # pandas won't compare naive values with a tz-aware column,
+            # naive bounds (e.g. a date picker's) are taken to be in UTC.
+            ts = ts.tz_localize("UTC")
+        elif typ.tz is None and ts.tzinfo is not None:
+            ts = ts.tz_convert("UTC").tz_localize(None)
+        return pa.scalar(ts.to_pydatetime(), type=typ)
+
+    return pa.scalar(bound, type=typ)
+
+
+def _max_value(bdf, column):
+    """
+    Max of a column of a feather blob, read without the other columns.
+
+    Args:
+        bdf (bytes): feather-formatted DataFrame
+        column (str): column to take the max of
+
+    Returns:
+        str | None: ISO-formatted max, None if there are no values.
+    """
+    col = feather.read_table(pa.BufferReader(bdf), columns=[column])[column]
+    if len(col) == 0 or col.null_count == len(col):
+        return None
+
+    mark = pc.max(col).as_py()
+    return mark.isoformat() if hasattr(mark, "isoformat") else str(mark)
@@ -0,0 +1,173 @@
+"""
+    Process-local cache of prepared DataFrames.
+
+    Many visualizations of a page read the same query data for the same
+    repos, and each one deserialized the blobs, parsed the dates, and sorted
+    the rows on its own. Instead, the prepared frame of a (query, repo set)
+    is kept in memory once per worker process, tagged with the generations
+    of the blobs it was built from, so it's only used while the cached data
+    is unchanged.
+
+    Frames are evicted least-recently-used first once their combined size
+    passes the byte budget.
+
+    Configured by the environment:
+        FRAME_CACHE_BYTES: most bytes of frames held per process (default 268435456, 256 MiB)
+"""
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+FRAME_CACHE_BYTES = int(os.getenv("FRAME_CACHE_BYTES", str(256 * 2**20)))
+
+# pandas 3 always copies on write, writes to a shallow copy can't reach the frame it was taken from.
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+
+class FrameCache:
+    """
+    LRU cache of DataFrames with a byte budget.
+
+    Each key holds at most one frame, along with the generation of the
+    data it was built from. A frame of another generation is a miss and
+    is replaced by the next 'put'.
+
+    Attributes:
+    -----------
+        max_bytes : int
+            Most bytes of frames held at once.
+
+    Methods:
+    --------
+        get(key, generation):
+            Returns the frame at 'key' if it's of 'generation', None otherwise.
+
+        put(key, generation, df):
+            Stores 'df' at 'key', evicting least-recently-used frames over the budget.
+
+        clear():
+            Drops all frames.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+
+        # key -> (generation, frame, bytes), least recently used first.
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        """
+        Frame at 'key' if it was built from data of 'generation'.
+
+        Args:
+        -----
+            key (hashable): identity of the frame, e.g. (query, frozenset(repos))
+            generation (hashable): generation of the data the frame has to be built from
+
+        Returns:
+        --------
+            pd.DataFrame | None: frame if cached and current
+        """
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None or entry[0] != generation:
+                return None
+
+            self._frames.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, generation, df):
+        """
+        Stores a frame, replacing any other generation of it. Frames
+        larger than the whole budget aren't stored.
+
+        Args:
+        -----
+            key (hashable): identity of the frame
+            generation (hashable): generation of the data the frame was built from
+            df (pd.DataFrame): frame to store
+        """
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+
+        with self._lock:
+            self._discard(key)
+            if nbytes > self.max_bytes:
+                return
+
+            self._frames[key] = (generation, df, nbytes)
+            self._bytes += nbytes
+
+            while self._bytes > self.max_bytes:
+                _, (_, _, n) = self._frames.popitem(last=False)
+                self._bytes -= n
+
+    def clear(self):
+        """
+        Drops all frames.
+        """
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def _discard(self, key):
+        """
+        (private)
+        Drops the frame at 'key', if any. Caller holds the lock.
+        """
+        entry = self._frames.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+
+def freeze(df):
+    """
+    Marks the arrays holding a frame's values read-only, so that
+    writing into them in place (e.g. df.loc[...] = ..., or fillna with
+    inplace=True) raises instead of changing the frame for every other
+    reader. Adding, replacing, or dropping columns and rows still works.
+
+    With copy-on-write (always on from pandas 3) a write to a shallow copy
+    copies the column first and never reaches the frame, so nothing is done.
+
+    Args:
+    -----
+        df (pd.DataFrame): frame to freeze
+
+    Returns:
+    --------
+        pd.DataFrame: the same frame
+    """
+    if COPY_ON_WRITE:
+        return df
+
+    # before pandas 3 a column is a view of a 2-D block array, and writes go to
+    # that array. no public API returns it, so the blocks of the pinned pandas are walked.
+    for block in df._mgr.blocks:
+        values = block.values
+        arrays = [values] + [getattr(values, a, None) for a in ("_ndarray", "_codes", "_data", "_mask")]
+        for arr in arrays:
+            if isinstance(arr, np.ndarray):
+                arr.flags.writeable = False
+
+    return df
+
+
+# frames of this process.
+frames = FrameCache(FRAME_CACHE_BYTES)
+
+
+def _reset_after_fork():
+    """
+    (private)
+    Starts a forked child with an empty cache of its own.
+    The lock is replaced too, in case the fork happened while it was held.
+    """
+    global frames
+    frames = FrameCache(FRAME_CACHE_BYTES)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
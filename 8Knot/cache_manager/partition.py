@@ -0,0 +1,453 @@
+"""
+    Splits a query's result into one cache blob per repo.
+
+    Query tasks pull data for many repos at once but the cache stores one
+    feather blob per (query, repo). Filtering the whole DataFrame once per repo
+    is O(repos x rows); instead the result is converted to Arrow once, ordered
+    by repo with a single stable sort, and each repo's rows are a zero-copy
+    slice of that table.
+
+    Results that are streamed in batches are written with RepoStreamWriter,
+    which writes each batch into its repo's blob and sets the blob as soon
+    as that repo's rows are complete.
+
+    Low-cardinality string columns (e.g. email domains) can be written
+    dictionary-encoded, so each blob stores every distinct value once and
+    they're read back as pandas categoricals.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+# blobs are compressed like feather.write_feather does.
+_COMPRESSION = "lz4" if pa.Codec.is_available("lz4_frame") else None
+
+
+def partition_by_repo(df: pd.DataFrame, repos, id_col="id", drop_id=False, categories=()):
+    """
+    Serializes the rows of each repo in 'repos' to a feather blob.
+
+    Row order within each repo is preserved, so sorting the
+    DataFrame before partitioning carries through to the blobs.
+
+    Args:
+    -----
+        df (pd.DataFrame): query result with a repo-id column
+        repos ([int]): repo_ids to produce blobs for, in order
+        id_col (str): name of the repo-id column
+        drop_id (bool): whether to leave the repo-id column out of the blobs
+        categories ([str]): columns to dictionary-encode in the blobs
+
+    Returns:
+    --------
+        [bytes]: feather blob per repo, aligned with 'repos'
+    """
+
+    ids = df[id_col].to_numpy()
+
+    # one stable sort groups each repo's rows together in their original order.
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+
+    if drop_id:
+        df = df.drop(columns=[id_col])
+
+    # one conversion to Arrow and one gather for all repos.
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    table = table.take(pa.array(order))
+
+    # boundaries of each repo's run of rows in the sorted table.
+    repo_ids = np.asarray(repos)
+    starts = np.searchsorted(sorted_ids, repo_ids, side="left")
+    ends = np.searchsorted(sorted_ids, repo_ids, side="right")
+
+    blobs = []
+    for start, end in zip(starts, ends):
+        # encoded per repo so that each blob only holds the values it uses.
+        blobs.append(_to_feather(dictionary_encode(table.slice(start, end - start), categories)))
+
+    return blobs
+
+
+def dictionary_encode(table: pa.Table, columns):
+    """
+    Dictionary-encodes 'columns' of an Arrow table, with one
+    dictionary per column shared by all of the column's chunks.
+
+    Args:
+    -----
+        table (pa.Table): data to encode
+        columns ([str]): columns to encode, already encoded ones are left as is
+
+    Returns:
+    --------
+        pa.Table: table with 'columns' dictionary-encoded
+    """
+    for c in columns:
+        i = table.schema.get_field_index(c)
+        if i < 0 or pa.types.is_dictionary(table.schema.field(i).type):
+            continue
+        table = table.set_column(i, c, table[c].dictionary_encode())
+
+    # the feather format allows only one dictionary per column.
+    return table.unify_dictionaries()
+
+
+def _to_feather(table: pa.Table):
+    """
+    (private)
+    Writes an Arrow table in feather format to bytes.
+
+    Args:
+    -----
+        table (pa.Table): data to write
+
+    Returns:
+    --------
+        bytes: feather-formatted table
+    """
+    sink = pa.BufferOutputStream()
+    feather.write_feather(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+class RepoStreamWriter:
+    """
+    Writes a query result that arrives in batches to the cache,
+    one blob per repo, as soon as each repo's rows are complete.
+
+    The batches have to be ordered by repo id (e.g. ORDER BY repo_id in SQL)
+    so that a repo is known to be complete once a different id shows up.
+    Each batch is written straight into the Arrow IPC (feather) stream of
+    its repo's blob, so only that blob and the current batch are held in
+    memory, never the repo's rows as a whole.
+
+    Every batch is cast to one schema, fixed by the first batch with rows,
+    so all blobs of a result have the same column types. Columns that were
+    all missing in that batch (Arrow's null type) take the type of the
+    first batch that has values.
+
+    Attributes:
+    -----------
+        cache : CacheManager
+            Cache that blobs are written to.
+
+        func : function
+            Query function that blobs are stored under.
+
+        repos : [int]
+            Repos the query was run for. Repos without rows get an empty blob.
+
+        watermark : str | None
+            Column each repo's high-watermark is taken from.
+
+        since : str | None
+            Lower bound of an incremental refresh. If set, the rows
+            are merged into each repo's cached blob instead of replacing it.
+
+        categories : [str]
+            Columns to dictionary-encode in the blobs.
+
+        columns : [str] | None
+            Columns of the blobs, for the empty blobs if the result has
+            no batches at all. Otherwise they're taken from the batches.
+
+    Methods:
+    --------
+        write(batch):
+            Consumes the next batch of the result.
+
+        close():
+            Writes the last repo and empty blobs for repos that had no rows.
+    """
+
+    def __init__(
+        self, cache, func, repos, id_col="id", drop_id=False, watermark=None, since=None, categories=(), columns=None
+    ):
+        self.cache = cache
+        self.func = func
+        self.repos = repos
+        self.watermark = watermark
+        self.since = since
+        self.categories = categories
+        self.columns = columns
+        self._id_col = id_col
+        self._drop_id = drop_id
+
+        # repo currently being received, and the stream its blob is written to.
+        self._current = None
+        self._sink = None
+        self._writer = None
+
+        # dictionary of each encoded column in the current blob, extended as values show up.
+        self._dicts = {}
+
+        # rows of the current repo not written yet, see _write_rows.
+        self._held = []
+
+        # repos whose blobs have been written.
+        self._done = set()
+
+        # Arrow schema of the blobs' values, fixed by the first batch with rows.
+        # a zero-row batch has no values to tell e.g. a date column's type by,
+        # its schema is only used for the empty blobs if there are no rows.
+        self._schema = None
+        self._empty_schema = None
+
+    def write(self, batch):
+        """
+        Consumes the next batch of the result, writing the blob of
+        every repo whose rows are now complete.
+
+        Args:
+        -----
+            batch (pa.RecordBatch | pa.Table | pd.DataFrame): batch ordered by repo id
+        """
+        table = _as_table(batch)
+
+        if self._empty_schema is None:
+            self._empty_schema = self._values(table).schema.remove_metadata()
+
+        if table.num_rows == 0:
+            return
+
+        ids = table[self._id_col].to_numpy()
+        table = self._cast(self._values(table))
+
+        # start of each run of rows with the same repo id.
+        bounds = np.concatenate(([0], np.flatnonzero(ids[1:] != ids[:-1]) + 1, [len(ids)]))
+
+        # as python values, so they hash the same as the ints in 'repos'.
+        run_ids = ids[bounds[:-1]].tolist()
+
+        for r, start, end in zip(run_ids, bounds[:-1], bounds[1:]):
+            if r != self._current:
+                self._flush()
+                if r in self._done:
+                    raise ValueError(f"Rows of repo {r} aren't contiguous, result must be ordered by repo id.")
+                self._open(r)
+            self._write_rows(table.slice(start, end - start))
+
+    def close(self):
+        """
+        Writes the blob of the last repo received and
+        empty blobs for every repo that had no rows.
+
+        Returns:
+        --------
+            bool: confirmation of successful set operations.
+        """
+        self._flush()
+
+        missing = [r for r in self.repos if r not in self._done]
+        if missing:
+            schema = self._schema if self._schema is not None else self._empty_schema
+            if schema is None:
+                # no batches at all, the columns' types are unknown.
+                columns = [c for c in self.columns or [] if not (self._drop_id and c == self._id_col)]
+                schema = pa.schema([(c, pa.null()) for c in columns])
+
+            blob = _to_feather(dictionary_encode(schema.empty_table(), self.categories))
+            self._set(missing, [blob] * len(missing))
+            self._done.update(missing)
+
+        return True
+
+    def _open(self, repo):
+        """
+        (private)
+        Starts the blob of the next repo.
+        """
+        schema = pa.schema([self._blob_field(f) for f in self._schema])
+
+        self._current = repo
+        self._dicts = {f.name: pa.array([], type=f.type.value_type) for f in schema if pa.types.is_dictionary(f.type)}
+        self._held = []
+        self._sink = pa.BufferOutputStream()
+        # the dictionaries grow batch by batch, written as deltas.
+        self._writer = pa.ipc.new_file(
+            self._sink, schema, options=pa.ipc.IpcWriteOptions(compression=_COMPRESSION, emit_dictionary_deltas=True)
+        )
+
+    def _flush(self):
+        """
+        (private)
+        Writes the blob of the repo currently being received.
+        """
+        if self._current is None:
+            return
+
+        for table in self._held:
+            self._writer.write_table(self._encode(table))
+
+        self._writer.close()
+        # a view of the stream's buffer, so the blob isn't copied to be sent.
+        blob = memoryview(self._sink.getvalue())
+        self._set([self._current], [blob])
+
+        self._done.add(self._current)
+        self._current = None
+        self._sink = None
+        self._writer = None
+        self._held = []
+
+    def _values(self, table: pa.Table):
+        """
+        (private)
+        Columns of a batch that are stored in the blobs.
+        """
+        if self._drop_id:
+            table = table.remove_column(table.schema.get_field_index(self._id_col))
+        return table
+
+    def _cast(self, table: pa.Table):
+        """
+        (private)
+        Casts a batch to the blobs' schema, fixing it if this is the first
+        batch with rows, or typing the columns it was missing values for.
+        """
+        schema = _fill_null_types(self._schema, table.schema)
+        if schema != self._schema:
+            self._retype(schema)
+
+        return table.select(schema.names).cast(schema)
+
+    def _retype(self, schema: pa.Schema):
+        """
+        (private)
+        Changes the blobs' schema. The rows of the current repo that were
+        already written are rewritten as the new types, which only happens
+        for columns that were all missing so far.
+        """
+        self._schema = schema
+        if self._current is None:
+            return
+
+        self._writer.close()
+        written = feather.read_table(pa.BufferReader(self._sink.getvalue()))
+
+        # decodes the encoded columns, they're encoded again with the new dictionaries.
+        written = written.cast(pa.schema([(f.name, _value_type(f.type)) for f in written.schema]))
+        rows = [t.cast(schema) for t in [written] + self._held]
+
+        self._open(self._current)
+        for table in rows:
+            self._write_rows(table)
+
+    def _blob_field(self, field: pa.Field):
+        """
+        (private)
+        Field of a blob, dictionary-encoded if it's one of 'categories'.
+        Columns without values yet stay Arrow's null type.
+        """
+        if field.name in self.categories and not pa.types.is_null(field.type):
+            return pa.field(field.name, pa.dictionary(pa.int32(), field.type))
+        return field
+
+    def _write_rows(self, table: pa.Table):
+        """
+        (private)
+        Writes rows of the current repo to its blob.
+
+        An IPC file can extend a dictionary but not an empty one, so rows
+        are held back until each encoded column of the repo has had a value,
+        or the repo is complete.
+        """
+        for c, known in self._dicts.items():
+            # only values the dictionary doesn't have are appended, earlier codes stay valid.
+            values = pc.unique(pc.drop_null(table[c]))
+            values = pc.filter(values, pc.invert(pc.is_in(values, value_set=known)))
+            if len(values) > 0:
+                self._dicts[c] = pa.concat_arrays([known, values])
+
+        self._held.append(table)
+        if any(len(known) == 0 for known in self._dicts.values()):
+            return
+
+        for held in self._held:
+            self._writer.write_table(self._encode(held))
+        self._held = []
+
+    def _encode(self, table: pa.Table):
+        """
+        (private)
+        Dictionary-encodes the 'categories' columns of rows
+        of the current repo with the repo's dictionaries.
+        """
+        for c, known in self._dicts.items():
+            i = table.schema.get_field_index(c)
+            col = table[c]
+            codes = pc.index_in(col, value_set=known).cast(pa.int32())
+            chunks = [pa.DictionaryArray.from_arrays(chunk, known) for chunk in codes.chunks]
+            table = table.set_column(i, c, pa.chunked_array(chunks, type=pa.dictionary(pa.int32(), col.type)))
+
+        return table
+
+    def _set(self, repos, blobs):
+        """
+        (private)
+        Writes blobs to the cache, merging them into the
+        cached ones if this is an incremental refresh.
+        """
+        if self.since is not None:
+            self.cache.mergem(func=self.func, repos=repos, datas=blobs, watermark=self.watermark, since=self.since)
+        else:
+            self.cache.setm(func=self.func, repos=repos, datas=blobs, watermark=self.watermark)
+
+
+def _as_table(batch):
+    """
+    (private)
+    A batch of a result as an Arrow table.
+
+    Args:
+    -----
+        batch (pa.RecordBatch | pa.Table | pd.DataFrame): batch of a result
+
+    Returns:
+    --------
+        pa.Table: the batch
+    """
+    if isinstance(batch, pa.Table):
+        return batch
+    if isinstance(batch, pa.RecordBatch):
+        return pa.Table.from_batches([batch])
+    return pa.Table.from_pandas(batch, preserve_index=False)
+
+
+def _value_type(typ: pa.DataType):
+    """
+    (private)
+    Type of the values of a column, without dictionary encoding.
+    """
+    return typ.value_type if pa.types.is_dictionary(typ) else typ
+
+
+def _fill_null_types(schema: pa.Schema, other: pa.Schema):
+    """
+    (private)
+    Schema whose fields of Arrow's null type (no values seen yet) take
+    their type from 'other', e.g. a column that was all missing in the first repo's rows.
+
+    Args:
+    -----
+        schema (pa.Schema | None): schema so far, 'other' if None
+        other (pa.Schema): schema of a blob
+
+    Returns:
+    --------
+        pa.Schema: schema without pandas metadata
+    """
+    if schema is None:
+        return other.remove_metadata()
+
+    fields = []
+    for field in schema:
+        i = other.get_field_index(field.name)
+        if pa.types.is_null(field.type) and i >= 0:
+            field = other.field(i)
+        fields.append(field)
+
+    return pa.schema(fields)
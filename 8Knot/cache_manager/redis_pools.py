@@ -0,0 +1,132 @@
+"""
+    Process-wide Redis connection pools.
+
+    Creating a redis.StrictRedis without a pool gives every client its own
+    connection pool, so every CacheManager and every users-cache lookup was
+    paying for a fresh TCP handshake. Instead, one pool per (role, decoding)
+    is created lazily the first time it's needed and shared by every client
+    in the process.
+
+    Pools are dropped in forked children (gunicorn / Celery prefork) so that
+    a child never reuses a socket that its parent opened.
+
+    Configured by the environment:
+        REDIS_MAX_CONNECTIONS: connections per pool (default 50)
+        REDIS_POOL_TIMEOUT: seconds to wait for a free connection (default 20)
+        REDIS_HEALTH_CHECK_INTERVAL: seconds a connection may idle before
+            it's PINGed on checkout (default 30)
+"""
+import redis
+import os
+import threading
+
+# Redis instance for data blob caching, and the
+# Redis instance for user session storage.
+CACHE = "cache"
+USERS = "users"
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """
+    (private)
+    Forgets the parent's pools in a forked child.
+    The lock is replaced too, in case the fork happened while it was held.
+    """
+    global _pools, _pools_lock
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _connection_params(role):
+    """
+    (private)
+    Host, port, and password of the Redis instance for a role.
+
+    Args:
+    -----
+        role (str): CACHE or USERS
+
+    Returns:
+    --------
+        dict: connection keyword arguments
+    """
+    if role == CACHE:
+        # openshift, compose will reconcile the 'redis' naming via the dns
+        host = os.getenv("REDIS_SERVICE_HOST", "redis-cache")
+        port = os.getenv("REDIS_SERVICE_PORT", "6379")
+    elif role == USERS:
+        host = os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users")
+        port = 6379
+    else:
+        raise ValueError(f"Unknown Redis role: {role}")
+
+    return {"host": host, "port": port, "password": os.getenv("REDIS_PASSWORD", "")}
+
+
+def get_pool(role, decode_responses=False):
+    """
+    Returns this process's connection pool for a Redis role,
+    creating it on first use.
+
+    Args:
+    -----
+        role (str): CACHE or USERS
+        decode_responses (bool): whether clients on the pool decode bytes to str.
+
+    Returns:
+    --------
+        redis.BlockingConnectionPool: shared pool
+    """
+    key = (role, decode_responses)
+
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        # another thread may have created it while we waited.
+        if key not in _pools:
+            _pools[key] = redis.BlockingConnectionPool(
+                **_connection_params(role),
+                decode_responses=decode_responses,
+                max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+                timeout=int(os.getenv("REDIS_POOL_TIMEOUT", "20")),
+                health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")),
+            )
+        return _pools[key]
+
+
+def cache_client(decode_responses=False):
+    """
+    Client for the data blob cache on the shared pool.
+
+    Args:
+    -----
+        decode_responses (bool): whether responses are decoded to str.
+
+    Returns:
+    --------
+        redis.StrictRedis: client
+    """
+    return redis.StrictRedis(connection_pool=get_pool(CACHE, decode_responses))
+
+
+def users_client(decode_responses=False):
+    """
+    Client for the user session cache on the shared pool.
+
+    Args:
+    -----
+        decode_responses (bool): whether responses are decoded to str.
+
+    Returns:
+    --------
+        redis.StrictRedis: client
+    """
+    return redis.StrictRedis(connection_pool=get_pool(USERS, decode_responses))
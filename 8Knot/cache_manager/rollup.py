@@ -0,0 +1,190 @@
+"""
+    Mergeable per-repo summary statistics ("rollups").
+
+    A rollup holds, for each measure of a repo (e.g. lines added per
+    commit), the count, sum, sum of squares, min, and max of its values,
+    split over the buckets of a quantile sketch. Every part is a sum, min,
+    or max, so the rollup of any set of repos is a merge of the repos'
+    rollups, O(repos), without going back to the database.
+
+    The sketch counts a value x > 0 in bucket ceil(log_GAMMA(x)), so the
+    quantiles read from it are within RELATIVE_ACCURACY of the true values.
+    Values <= 0 share ZERO_BUCKET.
+
+    Measures that grow with time (e.g. the age of open issues) are stored
+    as of the time they were pulled, and moved forward to the time they're
+    merged.
+"""
+import math
+import numpy as np
+import pandas as pd
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# bucket of the values <= 0
+ZERO_BUCKET = -(2**31)
+
+# columns of a rollup, one row per (measure, bucket) of a repo.
+# 'as_of' is the epoch second it was pulled, 'aging' whether it grows with time.
+COLUMNS = ["measure", "bucket", "n", "sum", "sumsq", "min", "max", "as_of", "aging"]
+
+
+def bucket_sql(expr):
+    """
+    SQL expression of the sketch bucket of the value of 'expr'.
+
+    Args:
+    -----
+        expr (str): SQL expression of the value
+
+    Returns:
+    --------
+        str: SQL expression of the bucket
+    """
+    return f"CASE WHEN ({expr}) > 0 THEN ceil(ln({expr}) / {math.log(GAMMA)!r}) ELSE {ZERO_BUCKET} END"
+
+
+def get_buckets(values):
+    """
+    Sketch buckets of values.
+
+    Args:
+    -----
+        values (np.array[float]): values
+
+    Returns:
+    --------
+        np.array[int]: bucket of each value
+    """
+    values = np.asarray(values, dtype=np.float64)
+    positive = values > 0
+
+    buckets = np.full(len(values), ZERO_BUCKET, dtype=np.int64)
+    buckets[positive] = np.ceil(np.log(values[positive]) / math.log(GAMMA))
+    return buckets
+
+
+def get_bucket_values(buckets):
+    """
+    Value that represents each bucket, within RELATIVE_ACCURACY of all of its values.
+
+    Args:
+    -----
+        buckets (np.array[int]): buckets
+
+    Returns:
+    --------
+        np.array[float]: value of each bucket, 0 for ZERO_BUCKET
+    """
+    buckets = np.asarray(buckets, dtype=np.int64)
+    zero = buckets == ZERO_BUCKET
+
+    values = 2 * np.power(GAMMA, np.where(zero, 0, buckets).astype(np.float64)) / (GAMMA + 1)
+    return np.where(zero, 0.0, values)
+
+
+def age_to(df: pd.DataFrame, now):
+    """
+    Moves the aging measures of rollups forward to 'now'.
+
+    Every value grows by the seconds since its 'as_of', so the moments
+    shift exactly, and each bucket moves to the bucket of its shifted
+    value (within 2 * RELATIVE_ACCURACY).
+
+    Args:
+    -----
+        df (pd.DataFrame): rollups
+        now (float): epoch seconds to move to
+
+    Returns:
+    --------
+        pd.DataFrame: rollups as of 'now'
+    """
+    df = df.copy()
+
+    aging = df["aging"].to_numpy(dtype=bool)
+    d = np.where(aging, now - df["as_of"].to_numpy(dtype=np.float64), 0.0)
+
+    # sum of (x + d)^2 is sumsq + 2d * sum + n * d^2
+    df["sumsq"] = df["sumsq"] + 2 * d * df["sum"] + df["n"] * d**2
+    df["sum"] = df["sum"] + df["n"] * d
+    df["min"] = df["min"] + d
+    df["max"] = df["max"] + d
+
+    df.loc[aging, "bucket"] = get_buckets(get_bucket_values(df.loc[aging, "bucket"]) + d[aging])
+    df["as_of"] = np.where(aging, now, df["as_of"])
+
+    return df
+
+
+def merge_rollups(df: pd.DataFrame, now=None):
+    """
+    Merges the rollups of many repos into one.
+
+    Args:
+    -----
+        df (pd.DataFrame): rollups of the repos
+        now (float | None): epoch seconds to move aging measures to. Current time if None.
+
+    Returns:
+    --------
+        pd.DataFrame: one row per (measure, bucket) with "n", "sum", "sumsq", "min", and "max"
+    """
+    if now is None:
+        now = pd.Timestamp.now(tz="utc").timestamp()
+
+    df = age_to(df, now)
+
+    return (
+        df.groupby(["measure", "bucket"], observed=True)
+        .agg(n=("n", "sum"), sum=("sum", "sum"), sumsq=("sumsq", "sum"), min=("min", "min"), max=("max", "max"))
+        .reset_index()
+    )
+
+
+def summarize(rollup: pd.DataFrame, quantiles=(0.5,)):
+    """
+    Summary statistics of each measure of a merged rollup.
+
+    Args:
+    -----
+        rollup (pd.DataFrame): merged rollup, from merge_rollups
+        quantiles ((float)): quantiles to read from the sketch, e.g. (0.5, 0.9)
+
+    Returns:
+    --------
+        pd.DataFrame: per measure, "n", "sum", "mean", "std", "min", "max",
+            and a "q<quantile>" column per quantile (e.g. "q0.5")
+    """
+    rollup = rollup.assign(measure=rollup["measure"].astype(str))
+    totals = rollup.groupby("measure").agg(
+        n=("n", "sum"), sum=("sum", "sum"), sumsq=("sumsq", "sum"), min=("min", "min"), max=("max", "max")
+    )
+
+    totals["mean"] = totals["sum"] / totals["n"]
+
+    # population variance from the moments, can dip below 0 by rounding.
+    variance = totals["sumsq"] / totals["n"] - totals["mean"] ** 2
+    totals["std"] = np.sqrt(variance.clip(lower=0))
+
+    for q in quantiles:
+        totals[f"q{q}"] = [_quantile(b, q) for _, b in rollup.groupby("measure")]
+
+    return totals.drop(columns="sumsq")
+
+
+def _quantile(buckets: pd.DataFrame, q):
+    """
+    (private)
+    Quantile 'q' of a measure from its buckets: the value of the
+    bucket holding the rank, clipped to that bucket's min and max.
+    """
+    buckets = buckets.sort_values("bucket")
+
+    counts = buckets["n"].to_numpy()
+    rank = q * (counts.sum() - 1)
+    i = min(np.searchsorted(np.cumsum(counts), rank, side="right"), len(counts) - 1)
+
+    value = get_bucket_values(buckets["bucket"].to_numpy()[i : i + 1])[0]
+    return float(np.clip(value, buckets["min"].to_numpy()[i], buckets["max"].to_numpy()[i]))
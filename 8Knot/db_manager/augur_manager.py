@@ -7,8 +7,32 @@ import sqlalchemy as salc
 import os
 import logging
 import sys
+import threading
+import time
 import requests
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from sqlalchemy.exc import SQLAlchemyError
+from db_manager import engines
+from db_manager.search_index import SearchIndex
+from db_manager import catalog
+
+# Postgres type OIDs -> Arrow types that COPY's CSV output is parsed as,
+# and that streamed batches are converted to.
+# Anything not listed (text, varchar, uuid, json, ...) is read as a string.
+PG_OID_TO_ARROW = {
+    16: pa.bool_(),  # bool
+    20: pa.int64(),  # int8
+    21: pa.int64(),  # int2
+    23: pa.int64(),  # int4
+    26: pa.int64(),  # oid
+    700: pa.float64(),  # float4
+    701: pa.float64(),  # float8
+    1700: pa.float64(),  # numeric, read_sql coerces these to float as well
+    1082: pa.date32(),  # date
+    1114: pa.timestamp("us"),  # timestamp
+    1184: pa.timestamp("us", tz="UTC"),  # timestamptz
+}
 
 
 class AugurManager:
@@ -44,18 +68,45 @@ class AugurManager:
     Methods:
     --------
         get_engine():
-            Connects to Augur databse with supplied credentials and
-            returns engine object.
+            Returns the process-wide engine for the supplied credentials,
+            connecting to Augur database if it doesn't exist yet.
 
-        run_query(query_string):
+        run_query(query_string, params):
             Runs a SQL-query against Augur database and returns resulting
             Pandas dataframe.
+
+        run_query_copy(query_string, params):
+            Runs a SQL-query against Augur database via Postgres COPY and
+            parses the CSV stream into a Pandas dataframe in vectorized fashion.
+
+        run_query_batches(query_string, batch_rows, params):
+            Runs a SQL-query against Augur database with a server-side cursor
+            and yields the result in Arrow record batches of at most batch_rows rows.
+
+        get_repo_sizes(repos):
+            Returns the estimated number of rows of each repo, collected
+            by multiselect_startup, None where unknown.
+
+        get_search_index():
+            Returns the typeahead index of the multiselect options,
+            built by multiselect_startup.
+
+        multiselect_startup():
+            Loads the repo catalog from its snapshot, querying
+            Augur database only if there's no snapshot yet.
+
+        refresh_catalog():
+            Queries the repo catalog and publishes it as the newest snapshot.
     """
 
     def __init__(self, handles_oauth=False):
         # sqlalchemy engine object
         self.engine = None
         self.initial_search_option = None
+        self.repo_id_to_size = {}
+        self.catalog_version = None
+        self._catalog_checked = 0.0
+        self._catalog_lock = threading.Lock()
 
         # db connection credentials
         # if any are unavailable, raise error.
@@ -92,7 +143,9 @@ class AugurManager:
 
     def get_engine(self):
         """
-        Creates _engine.Engine object connected to our Augur database.
+        Gets the _engine.Engine object connected to our Augur database.
+        Engines are shared per process (see db_manager/engines.py), so
+        repeated calls reuse warm pooled connections.
 
         Returns:
         --------
@@ -107,33 +160,34 @@ class AugurManager:
             self.user, self.password, self.host, self.port, self.database
         )
 
-        engine = salc.create_engine(
-            database_connection_string,
-            connect_args={"options": "-csearch_path={}".format(self.schema)},
-            pool_pre_ping=True,
-        )
+        # engines are shared by every AugurManager in the process,
+        # only a newly created one needs its connection verified.
+        engine, created = engines.get_engine(database_connection_string, self.schema)
 
-        # verify that engine works
-        try:
-            # context managed connect, closes automatically
-            with engine.connect() as conn:
-                logging.warning("AUGUR: Connection to DB succeeded")
+        if created:
+            # verify that engine works
+            try:
+                # context managed connect, closes automatically
+                with engine.connect() as conn:
+                    logging.warning("AUGUR: Connection to DB succeeded")
 
-            self.engine = engine
+            except SQLAlchemyError as err:
+                engines.discard_engine(database_connection_string, self.schema)
+                logging.error(f"AUGUR: DB couldn't connect: {err.__cause__}")
+                raise SQLAlchemyError(err)
 
-        except SQLAlchemyError as err:
-            logging.error(f"AUGUR: DB couldn't connect: {err.__cause__}")
-            raise SQLAlchemyError(err)
+        self.engine = engine
 
         return engine
 
-    def run_query(self, query_string: str) -> pd.DataFrame:
+    def run_query(self, query_string: str, params: dict = None) -> pd.DataFrame:
         """
         Runs SQL query against our Augur database.
 
         Args:
         -----
             query_string (str): SQL query to run.
+            params (dict | None): values of the query's ':name' parameters.
 
         Returns:
         --------
@@ -149,7 +203,7 @@ class AugurManager:
 
         try:
             with self.engine.connect() as conn:
-                result_df = pd.read_sql(query, con=conn)
+                result_df = pd.read_sql(query, con=conn, params=params)
         except:
             raise Exception("DB Read Failure")
 
@@ -158,9 +212,165 @@ class AugurManager:
 
         return result_df
 
+    def run_query_copy(self, query_string: str, params: dict = None) -> pd.DataFrame:
+        """
+        Runs SQL query against our Augur database using
+        COPY (<query>) TO STDOUT instead of a cursor.
+
+        pd.read_sql builds a Python object for every cell of the result.
+        COPY streams the result as CSV, which Arrow parses column-wise in C++
+        as it arrives, so large pulls spend far less time in the interpreter
+        and only the parsed table, not the CSV text, is held in memory. Column types
+        come from the query's result description rather than inference, so
+        e.g. numeric-looking logins stay strings.
+
+        Query modules opt into this per query by calling it in place of 'run_query'.
+
+        Args:
+        -----
+            query_string (str): SQL query to run. Must be a single SELECT statement.
+            params (dict | None): values of the query's ':name' parameters.
+
+        Returns:
+        --------
+            pd.DataFrame: Results from SQL query.
+        """
+        if self.engine is None:
+            logging.critical("No engine- please use 'get_engine' method to create engine.")
+            return None
+
+        query_string = query_string.strip().rstrip(";")
+
+        try:
+            conn = self.engine.raw_connection()
+        except:
+            raise Exception("DB Read Failure")
+
+        try:
+            with conn.cursor() as cur:
+                # COPY doesn't take parameters, the driver quotes them into the statement.
+                if params:
+                    compiled = salc.sql.text(query_string).compile(dialect=self.engine.dialect)
+                    query_string = cur.mogrify(compiled.string, params).decode(conn.encoding)
+
+                # result columns and their types, without running the query.
+                cur.execute(f"SELECT * FROM ({query_string}) AS q LIMIT 0")
+                column_types = {d.name: PG_OID_TO_ARROW.get(d.type_code, pa.string()) for d in cur.description}
+
+                # COPY writes into one end of a pipe from a thread while Arrow
+                # parses from the other, so the CSV is never held in memory whole.
+                read_fd, write_fd = os.pipe()
+                copy_error = []
+
+                def copy_out():
+                    try:
+                        with os.fdopen(write_fd, "wb") as pipe_in:
+                            cur.copy_expert(
+                                f"COPY ({query_string}) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                                pipe_in,
+                            )
+                    except Exception as e:
+                        copy_error.append(e)
+
+                copier = threading.Thread(target=copy_out, daemon=True)
+                copier.start()
+
+                try:
+                    with os.fdopen(read_fd, "rb") as pipe_out:
+                        table = pacsv.open_csv(
+                            pipe_out,
+                            convert_options=pacsv.ConvertOptions(
+                                column_types=column_types,
+                                # unquoted empty fields are NULL, quoted empty fields are ''
+                                strings_can_be_null=True,
+                                quoted_strings_can_be_null=False,
+                                true_values=["t"],
+                                false_values=["f"],
+                            ),
+                        ).read_all()
+                finally:
+                    # closing the read end above unblocks a COPY that's still writing.
+                    copier.join()
+
+            if copy_error:
+                raise copy_error[0]
+            conn.commit()
+        except:
+            raise Exception("DB Read Failure")
+        finally:
+            conn.close()
+
+        return table.to_pandas()
+
+    def run_query_batches(self, query_string: str, batch_rows: int = 50000, params: dict = None):
+        """
+        Runs SQL query against our Augur database, streaming the result.
+
+        Uses a server-side cursor so that only 'batch_rows' rows are held by
+        the driver at a time, and converts each batch to Arrow without
+        building a DataFrame. Column types come from the query's result
+        description, so every batch has the same schema, even one whose
+        values in a column are all missing. Always yields at least one
+        (possibly empty) batch so that callers see the result's columns.
+
+        Args:
+        -----
+            query_string (str): SQL query to run.
+            batch_rows (int): maximum number of rows per yielded batch.
+            params (dict | None): values of the query's ':name' parameters.
+
+        Yields:
+        --------
+            pa.RecordBatch: next batch of results from SQL query.
+        """
+        if self.engine is None:
+            logging.critical("No engine- please use 'get_engine' method to create engine.")
+            return
+
+        query = salc.sql.text(query_string)
+
+        try:
+            with self.engine.connect().execution_options(stream_results=True, max_row_buffer=batch_rows) as conn:
+                result = conn.execute(query, params or {})
+                schema = pa.schema([(d[0], PG_OID_TO_ARROW.get(d[1], pa.string())) for d in result.cursor.description])
+
+                empty = True
+                for rows in result.partitions(batch_rows):
+                    empty = False
+                    yield _rows_to_batch(rows, schema)
+
+                if empty:
+                    yield _rows_to_batch([], schema)
+        except SQLAlchemyError:
+            raise Exception("DB Read Failure")
+
     def multiselect_startup(self):
+        """
+        Loads the repo catalog that the search bar, org lookups, and
+        sharding use. The catalog is read from its persisted snapshot
+        (see db_manager/catalog.py), and only queried from the database
+        if there is no snapshot yet.
+        """
         logging.warning(f"MULTISELECT_STARTUP")
 
+        snapshot = catalog.load()
+        if snapshot is None:
+            logging.warning(f"MULTISELECT_STARTUP: NO CATALOG SNAPSHOT")
+            snapshot = self.refresh_catalog()
+
+        self._load_catalog(snapshot)
+
+        logging.warning(f"MULTISELECT_FINISHED")
+
+    def refresh_catalog(self):
+        """
+        Queries the repo catalog from the database
+        and publishes it as the newest snapshot.
+
+        Returns:
+        --------
+            pa.Table: snapshot of the catalog
+        """
         query_string = f"""SELECT DISTINCT
                             r.repo_git,
                             r.repo_id,
@@ -176,6 +386,23 @@ class AugurManager:
         df_search_bar = self.run_query(query_string)
         logging.warning(f"MULTISELECT_QUERY")
 
+        # estimated rows per repo, used to balance sharded queries.
+        snapshot = catalog.make_snapshot(df_search_bar, self._repo_size_estimates())
+        catalog.publish(snapshot)
+
+        return snapshot
+
+    def _load_catalog(self, snapshot):
+        """
+        (private)
+        Builds the search bar options and the lookups of the catalog from a snapshot.
+
+        Args:
+        -----
+            snapshot (pa.Table): snapshot of the catalog
+        """
+        df_search_bar = snapshot.to_pandas()
+
         # create a list of dictionaries for the MultiSelect dropdown
         # component on the index page.
         # Output is of the form: [{"label": repo_url, "value": repo_id}, ...]
@@ -191,25 +418,122 @@ class AugurManager:
 
         # combine options for multiselect component and sort them by the length
         # of their label (shorter comes first because it sorts ascending by default.)
-        self.multiselect_options = multiselect_repos + multiselect_orgs
-        self.multiselect_options = sorted(self.multiselect_options, key=lambda i: i["label"])
+        multiselect_options = multiselect_repos + multiselect_orgs
+        multiselect_options = sorted(multiselect_options, key=lambda i: i["label"])
 
         # create a dictionary to map github orgs to their constituent repos.
         # used when the user selects an org
         # Output is of the form: {group_name: [rid1, rid2, ...], group_name: [...], ...}
         df_lower_repo_names = df_search_bar.copy()
         df_lower_repo_names["rg_name"] = df_lower_repo_names["rg_name"].apply(str.lower)
-        self.org_name_to_repos_dict = df_lower_repo_names.groupby("rg_name")["repo_id"].apply(list).to_dict()
-        self.org_names = list(self.org_name_to_repos_dict.keys())
+        org_name_to_repos_dict = df_lower_repo_names.groupby("rg_name")["repo_id"].apply(list).to_dict()
 
         # create a dictionary that maps the github url to the repo_id in database
-        df_repo_git_id = df_search_bar.copy()
-        df_repo_git_id = df_repo_git_id[["repo_git", "repo_id"]]
-        self.repo_git_to_repo_id = pd.Series(df_repo_git_id.repo_id.values, index=df_repo_git_id["repo_git"]).to_dict()
-        # self.repo_id_to_repo_git = {value: key for (key, value) in self.repo_git_to_repo_id.items()}
-        self.repo_id_to_repo_git = pd.Series(df_repo_git_id.repo_git.values, index=df_repo_git_id["repo_id"]).to_dict()
+        df_repo_git_id = df_search_bar[["repo_git", "repo_id"]]
+        repo_git_to_repo_id = pd.Series(df_repo_git_id.repo_id.values, index=df_repo_git_id["repo_git"]).to_dict()
+        repo_id_to_repo_git = pd.Series(df_repo_git_id.repo_git.values, index=df_repo_git_id["repo_id"]).to_dict()
+
+        # estimated rows per repo, used to balance sharded queries.
+        df_sizes = df_search_bar[df_search_bar["size"].notna()].drop_duplicates(subset="repo_id")
+        repo_id_to_size = dict(zip(df_sizes["repo_id"].tolist(), df_sizes["size"].astype(int).tolist()))
+
+        # substring index of the options for the search bar's typeahead.
+        search_index = SearchIndex(multiselect_options)
+
+        # swapped in once everything is built, so readers never see a partial catalog.
+        self.multiselect_options = multiselect_options
+        self.org_name_to_repos_dict = org_name_to_repos_dict
+        self.org_names = list(org_name_to_repos_dict.keys())
+        self.repo_git_to_repo_id = repo_git_to_repo_id
+        self.repo_id_to_repo_git = repo_id_to_repo_git
+        self.repo_id_to_size = repo_id_to_size
+        self.search_index = search_index
+
+        self.catalog_version = catalog.get_snapshot_version(snapshot)
+        self._catalog_checked = time.monotonic()
+
+    def _check_catalog(self):
+        """
+        (private)
+        Starts a background reload of the catalog, at most every
+        CATALOG_CHECK_SECONDS, if it was loaded by multiselect_startup.
+        Callers keep using the current catalog until the new one is swapped in.
+        """
+        if self.catalog_version is None or time.monotonic() - self._catalog_checked < catalog.CATALOG_CHECK_SECONDS:
+            return
 
-        logging.warning(f"MULTISELECT_FINISHED")
+        # one check at a time, the others keep using the current catalog.
+        if not self._catalog_lock.acquire(blocking=False):
+            return
+
+        self._catalog_checked = time.monotonic()
+        try:
+            threading.Thread(target=self._reload_catalog, daemon=True).start()
+        except RuntimeError:
+            # e.g. at interpreter shutdown, the thread would have released it.
+            self._catalog_lock.release()
+
+    def _reload_catalog(self):
+        """
+        (private)
+        Loads the catalog if a snapshot of other contents was published.
+        Runs in the background thread started by _check_catalog, which holds the lock.
+        """
+        try:
+            version = catalog.get_version()
+            if version is None or version == self.catalog_version:
+                return
+
+            snapshot = catalog.load()
+            if snapshot is not None and catalog.get_snapshot_version(snapshot) != self.catalog_version:
+                logging.warning(f"CATALOG: LOADING VERSION {catalog.get_snapshot_version(snapshot)}")
+                self._load_catalog(snapshot)
+        except Exception as err:
+            logging.warning(f"CATALOG: Could not reload catalog: {err}")
+        finally:
+            self._catalog_checked = time.monotonic()
+            self._catalog_lock.release()
+
+    def _repo_size_estimates(self):
+        """
+        (private)
+        Estimates the rows each repo contributes to the queries from the
+        latest repo_info snapshot Augur collected for it: commits + issues + PRs.
+        Estimates are optional, so an Augur without repo_info only logs.
+
+        Returns:
+        --------
+            dict(int, int): estimated rows per repo_id
+        """
+        query_string = """SELECT DISTINCT ON (repo_id)
+                            repo_id,
+                            COALESCE(commit_count, 0)
+                                + COALESCE(issues_count, 0)
+                                + COALESCE(pull_request_count, 0) AS size
+                        FROM
+                            repo_info
+                        ORDER BY repo_id, data_collection_date DESC"""
+
+        try:
+            df_sizes = self.run_query(query_string)
+        except Exception:
+            logging.warning("MULTISELECT_STARTUP: NO REPO SIZE ESTIMATES")
+            return {}
+
+        return pd.Series(df_sizes["size"].values, index=df_sizes["repo_id"]).to_dict()
+
+    def get_repo_sizes(self, repos):
+        """Getter method for the estimated
+        number of rows of each repo.
+
+        Args:
+            repos ([int]): repo_ids
+
+        Returns:
+            [int | None]: estimated rows per repo, None if unknown.
+        """
+        self._check_catalog()
+        return [self.repo_id_to_size.get(r) for r in repos]
 
     def repo_git_to_id(self, git):
         """Getter method for dictionary
@@ -222,6 +546,7 @@ class AugurManager:
         Returns:
             int: repo_id of the URL in the source DB.
         """
+        self._check_catalog()
         return self.repo_git_to_repo_id.get(git)
 
     def repo_id_to_git(self, id):
@@ -233,6 +558,7 @@ class AugurManager:
         Returns:
             git (str): URL of repo
         """
+        self._check_catalog()
         return self.repo_id_to_repo_git.get(id)
 
     def org_to_repos(self, org):
@@ -244,6 +570,7 @@ class AugurManager:
         Returns:
             [int] | None: repo_ids or None
         """
+        self._check_catalog()
         return self.org_name_to_repos_dict[org]
 
     def is_org(self, org):
@@ -255,6 +582,7 @@ class AugurManager:
         Returns:
             bool: whether org name is in orgs
         """
+        self._check_catalog()
         return org in self.org_names
 
     def initial_multiselect_option(self):
@@ -288,8 +616,19 @@ class AugurManager:
         Returns:
             [{label, value}]: multiselect options
         """
+        self._check_catalog()
         return self.multiselect_options
 
+    def get_search_index(self):
+        """Getter method on the typeahead index
+        of the multiselect options.
+
+        Returns:
+            SearchIndex: index of repo+orgs options
+        """
+        self._check_catalog()
+        return self.search_index
+
     def make_user_request(self, access_token, headers={}, params={}):
         """Large parts of code written by John McGinness, University of Missouri
 
@@ -344,3 +683,42 @@ class AugurManager:
 
         if result.status_code == 200:
             return result.json()
+
+
+def _rows_to_batch(rows, schema: pa.Schema):
+    """
+    Converts rows fetched by the driver to an Arrow record batch.
+
+    Args:
+    -----
+        rows ([tuple]): rows of the result
+        schema (pa.Schema): types of the result's columns
+
+    Returns:
+    --------
+        pa.RecordBatch: the rows
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.record_batch([_to_arrow(list(c), f.type) for c, f in zip(columns, schema)], schema=schema)
+
+
+def _to_arrow(values, typ: pa.DataType):
+    """
+    Converts one column of fetched values to an Arrow array of type 'typ'.
+
+    Args:
+    -----
+        values (list): values of the column, None where missing
+        typ (pa.DataType): type of the column
+
+    Returns:
+    --------
+        pa.Array: the column
+    """
+    try:
+        return pa.array(values, type=typ)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. numerics come as Decimal, uuids and json as python objects.
+        if pa.types.is_string(typ):
+            return pa.array([None if v is None else str(v) for v in values], type=typ)
+        return pa.array(values).cast(typ)
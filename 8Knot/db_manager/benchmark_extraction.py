@@ -0,0 +1,131 @@
+"""
+    Benchmarks the extraction paths of AugurManager against each other.
+
+    Runs the same query through 'run_query' (pd.read_sql) and 'run_query_copy'
+    (COPY ... TO STDOUT parsed by Arrow), reports the best wall-clock time of
+    each, and checks that both produce the same DataFrame.
+
+    Uses the same AUGUR_* environment variables as the app, so pointing them
+    at a local Postgres with a copy of the Augur schema benchmarks locally.
+
+    Usage (from the 8Knot directory):
+        python -m db_manager.benchmark_extraction --repos 1,2,3 --query contributors --runs 3
+        python -m db_manager.benchmark_extraction --sql "SELECT * FROM commits LIMIT 100000"
+"""
+import argparse
+import logging
+import time
+import pandas as pd
+from db_manager.augur_manager import AugurManager
+
+# representative pulls of the query workers, formatted with the repo_id list.
+QUERIES = {
+    "contributors": """
+        SELECT
+            repo_id as id,
+            repo_name as repo_name,
+            cntrb_id,
+            created_at,
+            login,
+            action,
+            rank
+        FROM
+            augur_data.explorer_contributor_actions
+        WHERE
+            repo_id in ({repos})
+    """,
+    "commits": """
+        SELECT
+            distinct
+            r.repo_id AS id,
+            c.cmt_commit_hash AS commits,
+            c.cmt_author_email AS author_email,
+            c.cmt_author_date AS date,
+            c.cmt_author_timestamp AS author_timestamp,
+            c.cmt_committer_timestamp AS committer_timestamp
+        FROM
+            repo r
+        JOIN commits c
+            ON r.repo_id = c.repo_id
+        WHERE
+            c.repo_id in ({repos})
+    """,
+}
+
+
+def time_extraction(extract, query_string, runs):
+    """
+    Best-of-'runs' wall-clock time of an extraction method.
+
+    Args:
+    -----
+        extract (function): AugurManager extraction method
+        query_string (str): SQL query to run
+        runs (int): number of repetitions
+
+    Returns:
+    --------
+        float: fastest run in seconds
+        pd.DataFrame: result of the last run
+    """
+    best = float("inf")
+    df = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        df = extract(query_string)
+        best = min(best, time.perf_counter() - start)
+    return best, df
+
+
+def same_result(a: pd.DataFrame, b: pd.DataFrame):
+    """
+    Whether two extraction results hold the same rows, ignoring row order
+    and the representation of missing values.
+
+    Args:
+    -----
+        a (pd.DataFrame): result of one method
+        b (pd.DataFrame): result of another method
+
+    Returns:
+    --------
+        bool: whether results match
+    """
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+
+    a = a.astype(str).replace({"None": "nan", "NaT": "nan"}).sort_values(list(a.columns)).reset_index(drop=True)
+    b = b.astype(str).replace({"None": "nan", "NaT": "nan"}).sort_values(list(b.columns)).reset_index(drop=True)
+    return a.equals(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare run_query with run_query_copy.")
+    parser.add_argument("--query", choices=QUERIES.keys(), default="contributors")
+    parser.add_argument("--repos", help="comma-separated repo_ids the query is run for")
+    parser.add_argument("--sql", help="run this SQL instead of one of the built-in queries")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.sql:
+        query_string = args.sql
+    elif args.repos:
+        query_string = QUERIES[args.query].format(repos=args.repos)
+    else:
+        parser.error("one of --sql or --repos is required")
+
+    dbm = AugurManager()
+    dbm.get_engine()
+
+    read_sql_s, read_sql_df = time_extraction(dbm.run_query, query_string, args.runs)
+    copy_s, copy_df = time_extraction(dbm.run_query_copy, query_string, args.runs)
+
+    print(f"rows:           {len(read_sql_df)}")
+    print(f"run_query:      {read_sql_s:.3f}s")
+    print(f"run_query_copy: {copy_s:.3f}s ({read_sql_s / copy_s:.1f}x)")
+    print(f"same result:    {same_result(read_sql_df, copy_df)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s", level=logging.INFO)
+    main()
@@ -0,0 +1,164 @@
+"""
+    Persisted snapshot of the repo catalog.
+
+    Every process that imports the app used to query the whole
+    repo JOIN repo_groups table at startup before it could serve anything.
+    Instead, the catalog (repos, their orgs, and their size estimates) is
+    kept as a compact Arrow snapshot in Redis, versioned by the hash of its
+    contents, and a copy on local disk for when Redis isn't reachable.
+    Processes load it at startup, and only the first one ever, or the
+    periodic refresh job, queries the database. Running processes reload it
+    in the background once a snapshot with other contents is published.
+
+    Configured by the environment:
+        CATALOG_SNAPSHOT_PATH: local copy of the snapshot
+            (default 8knot_repo_catalog.feather in the temp directory)
+        CATALOG_CHECK_SECONDS: seconds between checks of a process for
+            a changed snapshot (default 60)
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import pyarrow as pa
+import pyarrow.feather as feather
+import redis
+from cache_manager.redis_pools import cache_client
+
+# bump when the columns of the snapshot change, so old snapshots aren't read.
+SNAPSHOT_FORMAT = 1
+
+SNAPSHOT_KEY = f"catalog:v{SNAPSHOT_FORMAT}:snapshot"
+VERSION_KEY = f"catalog:v{SNAPSHOT_FORMAT}:version"
+
+CATALOG_SNAPSHOT_PATH = os.getenv(
+    "CATALOG_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "8knot_repo_catalog.feather")
+)
+CATALOG_CHECK_SECONDS = float(os.getenv("CATALOG_CHECK_SECONDS", "60"))
+
+# columns of the snapshot, one row per (repo, org).
+SCHEMA = pa.schema(
+    [
+        ("repo_git", pa.string()),
+        ("repo_id", pa.int64()),
+        ("repo_name", pa.string()),
+        ("rg_name", pa.string()),
+        ("size", pa.int64()),
+    ]
+)
+
+
+def make_snapshot(df_search_bar, sizes):
+    """
+    Builds a snapshot of the catalog, stamped with the hash of its contents.
+
+    Args:
+    -----
+        df_search_bar (pd.DataFrame): repo_git, repo_id, repo_name, and rg_name of each repo
+        sizes (dict(int, int)): estimated rows per repo_id, missing where unknown
+
+    Returns:
+    --------
+        pa.Table: snapshot, its version in the schema metadata
+    """
+    df = df_search_bar[["repo_git", "repo_id", "repo_name", "rg_name"]].copy()
+    df["size"] = df["repo_id"].map(sizes).astype("Int64")
+
+    # in a fixed order, so the same catalog always has the same contents.
+    df = df.sort_values(["rg_name", "repo_id", "repo_git"], kind="stable").reset_index(drop=True)
+
+    table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+    return table.replace_schema_metadata({"version": _content_hash(table)})
+
+
+def _content_hash(table):
+    """
+    (private)
+    Hash of the contents of a snapshot, its version. An unchanged catalog
+    keeps its version, so processes don't reload it.
+    """
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema.remove_metadata()) as writer:
+        writer.write_table(table)
+    return hashlib.sha1(sink.getvalue().to_pybytes()).hexdigest()
+
+
+def get_snapshot_version(table):
+    """
+    Version stamp of a snapshot.
+
+    Args:
+    -----
+        table (pa.Table): snapshot
+
+    Returns:
+    --------
+        str: version
+    """
+    return table.schema.metadata[b"version"].decode("utf-8")
+
+
+def publish(table):
+    """
+    Stores a snapshot in Redis and on local disk, replacing the older one.
+
+    Args:
+    -----
+        table (pa.Table): snapshot from make_snapshot
+    """
+    sink = pa.BufferOutputStream()
+    feather.write_feather(table, sink)
+    blob = sink.getvalue().to_pybytes()
+
+    try:
+        # snapshot and version are replaced in one step.
+        cache_client().mset({SNAPSHOT_KEY: blob, VERSION_KEY: get_snapshot_version(table)})
+    except redis.exceptions.ConnectionError:
+        logging.warning("CATALOG: Could not connect to cache.")
+
+    try:
+        # written next to the old copy and swapped in, so readers never see a partial file.
+        tmp = f"{CATALOG_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, CATALOG_SNAPSHOT_PATH)
+    except OSError as err:
+        logging.warning(f"CATALOG: Could not write local snapshot: {err}")
+
+
+def load():
+    """
+    Latest snapshot, from Redis or else the local copy.
+
+    Returns:
+    --------
+        pa.Table | None: snapshot, None if there is none
+    """
+    try:
+        blob = cache_client().get(SNAPSHOT_KEY)
+        if blob is not None:
+            return feather.read_table(pa.BufferReader(blob))
+    except redis.exceptions.ConnectionError:
+        logging.warning("CATALOG: Could not connect to cache.")
+
+    try:
+        return feather.read_table(CATALOG_SNAPSHOT_PATH)
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def get_version():
+    """
+    Version of the latest snapshot in Redis.
+
+    Returns:
+    --------
+        str | None: version, None if there's none or Redis is unavailable
+    """
+    try:
+        version = cache_client().get(VERSION_KEY)
+    except redis.exceptions.ConnectionError:
+        logging.warning("CATALOG: Could not connect to cache.")
+        return None
+
+    return version.decode("utf-8") if version is not None else None
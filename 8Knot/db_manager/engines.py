@@ -0,0 +1,103 @@
+"""
+    Process-wide registry of SQLAlchemy engines.
+
+    Every query task and home-page metric callback builds an AugurManager and
+    asks it for an engine. Creating an engine per call meant a new connection
+    pool, and a new TLS + auth handshake, for every query. Engines are instead
+    created once per process per set of connection parameters and shared, so
+    repeated queries in a worker check out warm connections.
+
+    After a fork (gunicorn / Celery prefork) the child's copies of the pools
+    are discarded without closing the parent's connections, so a child never
+    shares a socket with its parent.
+
+    Configured by the environment:
+        AUGUR_POOL_SIZE: connections kept open per engine (default 5)
+        AUGUR_MAX_OVERFLOW: connections allowed beyond the pool size (default 10)
+        AUGUR_POOL_RECYCLE: seconds before a connection is replaced (default 1800)
+        AUGUR_STATEMENT_TIMEOUT: milliseconds before Postgres cancels a statement,
+            0 disables it (default 0)
+"""
+import os
+import threading
+import sqlalchemy as salc
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """
+    (private)
+    Gives a forked child fresh pools on the same engines.
+    dispose(close=False) drops the inherited connections without
+    closing them, since they still belong to the parent.
+    """
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    for engine in _engines.values():
+        engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_engine(connection_string, schema):
+    """
+    Returns this process's engine for a database and schema,
+    creating it on first use.
+
+    Args:
+    -----
+        connection_string (str): SQLAlchemy database URL
+        schema (str): schema put on the connections' search_path
+
+    Returns:
+    --------
+        _engine.Engine: shared engine
+        bool: whether the engine was created by this call
+    """
+    key = (connection_string, schema)
+
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine, False
+
+    with _engines_lock:
+        # another thread may have created it while we waited.
+        if key in _engines:
+            return _engines[key], False
+
+        options = f"-csearch_path={schema}"
+        statement_timeout = int(os.getenv("AUGUR_STATEMENT_TIMEOUT", "0"))
+        if statement_timeout > 0:
+            options += f" -cstatement_timeout={statement_timeout}"
+
+        engine = salc.create_engine(
+            connection_string,
+            connect_args={"options": options},
+            pool_pre_ping=True,
+            pool_size=int(os.getenv("AUGUR_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("AUGUR_MAX_OVERFLOW", "10")),
+            pool_recycle=int(os.getenv("AUGUR_POOL_RECYCLE", "1800")),
+        )
+        _engines[key] = engine
+
+    return engine, True
+
+
+def discard_engine(connection_string, schema):
+    """
+    Removes an engine from the registry, e.g. when its
+    test connection failed, so the next call creates a new one.
+
+    Args:
+    -----
+        connection_string (str): SQLAlchemy database URL
+        schema (str): schema put on the connections' search_path
+    """
+    with _engines_lock:
+        engine = _engines.pop((connection_string, schema), None)
+
+    if engine is not None:
+        engine.dispose()
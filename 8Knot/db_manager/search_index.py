@@ -0,0 +1,250 @@
+"""
+    Substring search over the multiselect options.
+
+    Matching every keystroke against every option is O(options) in Python.
+    Instead, the lowercased labels are indexed once by their byte trigrams,
+    each trigram listing the options that contain it in rank order (shorter
+    labels first). A query is looked up by walking the rarest of its
+    trigrams' lists in rank order, keeping options that are in the other
+    lists too and contain the query, until enough matches are found.
+
+    Shorter queries than a trigram are answered from the first matches of
+    each unigram and bigram, kept at build time.
+
+    Recent queries that were answered in full are kept in a small LRU, so
+    typing one more character only filters the previous query's matches.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# length of the indexed n-grams, in bytes
+GRAM_SIZE = 3
+
+# candidates checked per step when walking a trigram's list
+CHUNK_SIZE = 4096
+
+
+class SearchIndex:
+    """
+    Ranked substring search over {label, value} options.
+
+    Options match a query if their lowercased label contains the lowercased
+    query, and matches are ranked by label length, then by their order in
+    the given options.
+
+    Attributes:
+    -----------
+        options : [{label, value}]
+            Options in rank order.
+
+        top_k : int
+            Most matches returned by 'search'.
+
+    Methods:
+    --------
+        search(query):
+            Returns the 'top_k' best-ranked options matching 'query'.
+
+        lookup(values):
+            Returns the options of 'values', skipping unknown values.
+    """
+
+    def __init__(self, options, top_k=100, lru_size=256):
+        self.top_k = top_k
+
+        # rank order, stable so ties keep the given order.
+        self.options = sorted(options, key=lambda o: len(o["label"]))
+        self._labels = [o["label"].lower().encode("utf-8") for o in self.options]
+        self._by_value = {o["value"]: o for o in self.options}
+
+        self._grams = _build_postings(self._labels, top_k)
+
+        # query -> ids of all of its matches, least recently used first.
+        self._recent = OrderedDict()
+        self._lru_size = lru_size
+        self._lock = threading.Lock()
+
+    def search(self, query):
+        """
+        Best-ranked options whose label contains 'query', case-insensitive.
+
+        Args:
+        -----
+            query (str): searched substring
+
+        Returns:
+        --------
+            [{label, value}]: at most 'top_k' options, best first
+        """
+        q = query.lower().encode("utf-8")
+        if not q:
+            return []
+
+        ids = self._search_ids(q)
+        return [self.options[i] for i in ids[: self.top_k]]
+
+    def lookup(self, values):
+        """
+        Options of a set of values, e.g. the current selections.
+
+        Args:
+        -----
+            values ([str | int]): option values
+
+        Returns:
+        --------
+            [{label, value}]: option of each known value
+        """
+        return [self._by_value[v] for v in values if v in self._by_value]
+
+    def _search_ids(self, q):
+        """
+        (private)
+        Ids of the matches of the lowercased, encoded query 'q', best first.
+        All of them if there are at most 'top_k', otherwise at least 'top_k'.
+        """
+        with self._lock:
+            hit = self._recent.get(q)
+            if hit is not None:
+                self._recent.move_to_end(q)
+                return hit
+
+            # matches of a query are among the matches of any of its prefixes.
+            prefix = next((q[:j] for j in range(len(q) - 1, 0, -1) if q[:j] in self._recent), None)
+            known = self._recent[prefix] if prefix is not None else None
+
+        if known is not None:
+            # the prefix's matches are complete.
+            ids = [i for i in known if q in self._labels[i]]
+        elif len(q) <= GRAM_SIZE:
+            ids = self._postings(q)[: self.top_k].tolist()
+        else:
+            ids = self._match(q)
+
+        # only complete answers can be filtered for longer queries.
+        if len(ids) < self.top_k:
+            with self._lock:
+                self._recent[q] = ids
+                self._recent.move_to_end(q)
+                while len(self._recent) > self._lru_size:
+                    self._recent.popitem(last=False)
+
+        return ids
+
+    def _postings(self, gram):
+        """
+        (private)
+        Ids of the options containing 'gram', in rank order. Only the
+        first 'top_k' of them for unigrams and bigrams.
+        """
+        codes, starts, ids = self._grams[len(gram)]
+
+        code = _gram_code(gram)
+        i = np.searchsorted(codes, code)
+        if i == len(codes) or codes[i] != code:
+            return ids[:0]
+
+        return ids[starts[i] : starts[i + 1]]
+
+    def _match(self, q):
+        """
+        (private)
+        First 'top_k' matches of a query longer than a trigram.
+        """
+        lists = sorted((self._postings(q[j : j + GRAM_SIZE]) for j in range(len(q) - GRAM_SIZE + 1)), key=len)
+
+        rarest, others = lists[0], lists[1:]
+
+        out = []
+        for start in range(0, len(rarest), CHUNK_SIZE):
+            cand = rarest[start : start + CHUNK_SIZE]
+
+            # keep the candidates that are in every other list.
+            for other in others:
+                pos = np.minimum(np.searchsorted(other, cand), len(other) - 1)
+                cand = cand[other[pos] == cand]
+                if not len(cand):
+                    break
+
+            # trigrams can be in the label without forming the query.
+            for i in cand.tolist():
+                if q in self._labels[i]:
+                    out.append(i)
+                    if len(out) == self.top_k:
+                        return out
+
+        return out
+
+
+def _gram_code(gram):
+    """
+    (private)
+    Integer code of an n-gram of bytes.
+    """
+    return int.from_bytes(gram, "big")
+
+
+def _build_postings(labels, top_k):
+    """
+    (private)
+    Postings of the unigrams, bigrams, and trigrams of the encoded
+    labels. Trigrams list every option containing them, unigrams and
+    bigrams only the first 'top_k'.
+
+    Args:
+    -----
+        labels ([bytes]): lowercased labels in rank order
+        top_k (int): postings kept per unigram and bigram
+
+    Returns:
+    --------
+        dict(int, (np.array, np.array, np.array)): per n-gram size, the
+            sorted gram codes, the start of each gram's postings (and
+            the end of the last), and the postings
+    """
+    n = len(labels)
+    lengths = np.fromiter((len(b) for b in labels), dtype=np.int64, count=n)
+
+    # all labels in one buffer, each followed by a 0 byte
+    # so that no n-gram spans two labels.
+    buf = np.frombuffer(b"".join(b + b"\0" for b in labels), dtype=np.uint8).astype(np.int64)
+    label_of = np.repeat(np.arange(n, dtype=np.int64), lengths + 1)
+
+    grams = {}
+    for size in range(1, GRAM_SIZE + 1):
+        m = max(len(buf) - size + 1, 0)
+
+        codes = np.zeros(m, dtype=np.int64)
+        inside = np.ones(m, dtype=bool)
+        for k in range(size):
+            codes = (codes << 8) | buf[k : k + m]
+            inside &= buf[k : k + m] != 0
+
+        # one posting per (gram, option), ordered by gram, then rank.
+        keys = np.sort(codes[inside] * n + label_of[:m][inside])
+        keys = keys[_run_starts(keys)]
+        gram_codes, ids = keys // n, keys % n
+
+        first = _run_starts(gram_codes)
+
+        if size < GRAM_SIZE:
+            # short queries only ever read the first matches.
+            starts = np.flatnonzero(first)
+            nth = np.arange(len(ids)) - np.repeat(starts, np.diff(np.append(starts, len(ids))))
+            gram_codes, ids, first = gram_codes[nth < top_k], ids[nth < top_k], first[nth < top_k]
+
+        starts = np.flatnonzero(first)
+        grams[size] = (gram_codes[starts], np.append(starts, len(ids)), ids.astype(np.int32))
+
+    return grams
+
+
+def _run_starts(a):
+    """
+    (private)
+    Mask of the elements of a sorted array that differ from the one before.
+    """
+    first = np.ones(len(a), dtype=bool)
+    first[1:] = a[1:] != a[:-1]
+    return first
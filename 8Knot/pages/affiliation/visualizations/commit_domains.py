@@ -11,6 +11,7 @@ from pages.utils.graph_utils import color_seq
 from queries.commits_query import commits_query as cq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -132,13 +133,16 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [cq])
 def commit_domains_graph(repolist, num, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cq, repos=repolist)
+    df = cache.wait_for(
+        func=cq,
+        repos=repolist,
+        columns=["author_timestamp", "email_domain"],
+        filters={"author_timestamp": (start_date, end_date)},
+    )
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -149,7 +153,7 @@ def commit_domains_graph(repolist, num, start_date, end_date):
         return nodata_graph
 
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, num, start_date, end_date)
+    df = process_data(df, num)
 
     fig = create_figure(df)
 
@@ -157,34 +161,16 @@ def commit_domains_graph(repolist, num, start_date, end_date):
     return fig
 
 
-def process_data(df: pd.DataFrame, num, start_date, end_date):
+def process_data(df: pd.DataFrame, num):
     # TODO: create docstring
 
-    # convert to datetime objects rather than strings
-    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True)
-
-    # order values chronologically by author_timestamp date earliest to latest
-    df = df.sort_values(by="author_timestamp", axis=0, ascending=True)
-
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.author_timestamp >= start_date]
-    if end_date is not None:
-        df = df[df.author_timestamp <= end_date]
-
-    # creates list of emails for each contribution and flattens list result
-    emails = df.author_email.tolist()
-
-    # remove any entries not in email format
-    emails = [x for x in emails if "@" in x]
-
-    # creates list of email domains from the emails list
-    email_domains = [x[x.rindex("@") + 1 :] for x in emails]
-
-    # creates df of domains and counts
-    df = pd.DataFrame(email_domains, columns=["domains"]).value_counts().to_frame().reset_index()
+    # email domains are stored categorical by the query, entries that
+    # aren't emails have none. counts per domain come from the category codes.
+    counts = df["email_domain"].value_counts()
+    counts = counts[counts > 0]
 
-    df = df.rename(columns={0: "occurrences"})
+    # plain strings, so that domains can be relabeled "Other"
+    df = pd.DataFrame({"domains": counts.index.astype(str), "occurrences": counts.to_numpy()})
 
     # changes the name of the company if under a certain threshold
     df.loc[df.occurrences <= num, "domains"] = "Other"
@@ -8,9 +8,12 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
+from pages.utils.company_utils import count_email_domains, get_contributor_actions
 from queries.company_query import company_query as cmq
+from queries.contributor_identity_query import contributor_identity_query as ciq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -148,13 +151,23 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [cmq, ciq])
 def compay_associated_activity_graph(repolist, contributions, contributors, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cmq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cmq, repos=repolist)
+    df = cache.wait_for(
+        func=cmq,
+        repos=repolist,
+        columns=["cntrb_id", "created"],
+        filters={"created": (start_date, end_date)},
+    )
+
+    # identities of the contributors, stored once per contributor and repo
+    df_identities = cache.wait_for(
+        func=ciq,
+        repos=repolist,
+        columns=["cntrb_id", "email_domains"],
+    )
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -165,7 +178,7 @@ def compay_associated_activity_graph(repolist, contributions, contributors, star
         return nodata_graph
 
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, contributions, contributors, start_date, end_date)
+    df = process_data(df, df_identities, contributions, contributors)
 
     fig = create_figure(df)
 
@@ -173,39 +186,16 @@ def compay_associated_activity_graph(repolist, contributions, contributors, star
     return fig
 
 
-def process_data(df: pd.DataFrame, contributions, contributors, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-
-    # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="created", axis=0, ascending=True)
-
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created >= start_date]
-    if end_date is not None:
-        df = df[df.created <= end_date]
-
-    # groups contributions by countributor id and counts, created column now hold the number
+def process_data(df: pd.DataFrame, df_identities: pd.DataFrame, contributions, contributors):
+    # counts contributions by countributor id, actions column now holds the number
     # of contributions for its respective contributor
-    df = df.groupby(["cntrb_id", "email_list"], as_index=False)[["created"]].count()
+    df = get_contributor_actions(df, df_identities)
 
     # filters out contributors that dont meet the core contribution threshhold
-    df = df[df.created >= contributions]
-
-    # creates list of unique emails and flattens list result
-    emails = df.email_list.str.split(" , ").explode("email_list").tolist()
-
-    # remove any entries not in email format
-    emails = [x for x in emails if "@" in x]
-
-    # creates list of email domains from the emails list
-    email_domains = [x[x.rindex("@") + 1 :] for x in emails]
-
-    # creates df of domains and counts
-    df = pd.DataFrame(email_domains, columns=["domains"]).value_counts().to_frame().reset_index()
+    df = df[df.actions >= contributions]
 
-    df = df.rename(columns={0: "contributors"})
+    # creates df of domains and the number of core contributors with an email there
+    df = count_email_domains(df["email_domains"]).rename_axis("domains").reset_index(name="contributors")
 
     # changes the name of the company if under a certain threshold
     df.loc[df.contributors <= contributors, "domains"] = "Other"
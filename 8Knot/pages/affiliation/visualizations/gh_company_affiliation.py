@@ -9,12 +9,14 @@ from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
 from queries.company_query import company_query as cmq
+from queries.contributor_identity_query import contributor_identity_query as ciq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
+from pages.utils.company_utils import get_company_clusters, get_contributor_actions
 import time
 import datetime as dt
-from fuzzywuzzy import fuzz
 
 PAGE = "affiliation"
 VIZ_ID = "gh-company-affiliation"
@@ -129,13 +131,23 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [cmq, ciq])
 def gh_company_affiliation_graph(repolist, num, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cmq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cmq, repos=repolist)
+    df = cache.wait_for(
+        func=cmq,
+        repos=repolist,
+        columns=["cntrb_id", "created"],
+        filters={"created": (start_date, end_date)},
+    )
+
+    # identities of the contributors, stored once per contributor and repo
+    df_identities = cache.wait_for(
+        func=ciq,
+        repos=repolist,
+        columns=["cntrb_id", "cntrb_company"],
+    )
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -146,7 +158,7 @@ def gh_company_affiliation_graph(repolist, num, start_date, end_date):
         return nodata_graph
 
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, num, start_date, end_date)
+    df = process_data(df, df_identities, num)
 
     fig = create_figure(df)
 
@@ -154,45 +166,25 @@ def gh_company_affiliation_graph(repolist, num, start_date, end_date):
     return fig
 
 
-def process_data(df: pd.DataFrame, num, start_date, end_date):
+def process_data(df: pd.DataFrame, df_identities: pd.DataFrame, num):
     """Implement your custom data-processing logic in this function.
     The output of this function is the data you intend to create a visualization with,
     requiring no further processing."""
 
-    # convert to datetime objects rather than strings
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-
-    # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="created", axis=0, ascending=True)
-
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created >= start_date]
-    if end_date is not None:
-        df = df[df.created <= end_date]
+    # number of contributions of each contributor, with their company
+    df = get_contributor_actions(df, df_identities)
 
     # intital count of same company name in github profile
-    result = df.cntrb_company.value_counts(dropna=False)
+    result = df.groupby("cntrb_company", dropna=False)["actions"].sum().sort_values(ascending=False)
 
     # reset format for df work
-    df = result.to_frame()
-    df["company_name"] = df.index
-    df = df.reset_index()
-    df["company_name"] = df["company_name"].astype(str)
-    df = df.rename(columns={"index": "orginal_name", "cntrb_company": "contribution_count"})
-
-    # applies fuzzy matching comparing all rows to each other
-    df["match"] = df.apply(lambda row: fuzzy_match(df, row["company_name"]), axis=1)
-
-    # changes company name to match other fuzzy matches
-    for x in range(0, len(df)):
-        # gets match values for the current row
-        matches = df.iloc[x]["match"]
-        for y in matches:
-            # for each match, change the name to its match and clear out match column as
-            # it will unnecessarily reapply changes
-            df.loc[y, "company_name"] = df.iloc[x]["company_name"]
-            df.loc[y, "match"] = ""
+    df = pd.DataFrame({"orginal_name": result.index, "contribution_count": result.to_numpy()})
+    df["company_name"] = df["orginal_name"].astype(str)
+
+    # clusters fuzzy matches of the company names, and renames every
+    # company to the most common name in its cluster
+    df["cluster"] = get_company_clusters(df["company_name"]).to_numpy()
+    df["company_name"] = df.groupby("cluster")["company_name"].transform("first")
 
     # groups all same name company affiliation and sums the contributions
     df = (
@@ -218,17 +210,6 @@ def process_data(df: pd.DataFrame, num, start_date, end_date):
     return df
 
 
-def fuzzy_match(df, name):
-    """
-    This function compares each row to all of the other values in the company_name column and
-    outputs a list on if there is a fuzzy match between the different rows. This gives the values
-    necessary for the loop to change the company name if there is a match. 70 is the match value
-    threshold for the partial ratio to be considered a match
-    """
-    matches = df.apply(lambda row: (fuzz.partial_ratio(row["company_name"], name) >= 70), axis=1)
-    return [i for i, x in enumerate(matches) if x]
-
-
 def create_figure(df: pd.DataFrame):
     # graph generation
     fig = px.pie(
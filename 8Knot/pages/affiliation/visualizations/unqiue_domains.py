@@ -8,9 +8,12 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
+from pages.utils.company_utils import get_contributor_actions
 from queries.company_query import company_query as cmq
+from queries.contributor_identity_query import contributor_identity_query as ciq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -129,13 +132,23 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [cmq, ciq])
 def unique_domains_graph(repolist, num, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cmq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cmq, repos=repolist)
+    df = cache.wait_for(
+        func=cmq,
+        repos=repolist,
+        columns=["cntrb_id", "created"],
+        filters={"created": (start_date, end_date)},
+    )
+
+    # identities of the contributors, stored once per contributor and repo
+    df_identities = cache.wait_for(
+        func=ciq,
+        repos=repolist,
+        columns=["cntrb_id", "email_list", "email_domains"],
+    )
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -146,7 +159,7 @@ def unique_domains_graph(repolist, num, start_date, end_date):
         return nodata_graph
 
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, num, start_date, end_date)
+    df = process_data(df, df_identities, num)
 
     fig = create_figure(df)
 
@@ -154,32 +167,20 @@ def unique_domains_graph(repolist, num, start_date, end_date):
     return fig
 
 
-def process_data(df: pd.DataFrame, num, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created"] = pd.to_datetime(df["created"], utc=True)
-
-    # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="created", axis=0, ascending=True)
+def process_data(df: pd.DataFrame, df_identities: pd.DataFrame, num):
+    # email lists of the contributors with contributions in the date range
+    df = get_contributor_actions(df, df_identities)
+    df = df[["email_list", "email_domains"]].dropna()
 
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created >= start_date]
-    if end_date is not None:
-        df = df[df.created <= end_date]
-
-    # creates list of unique emails and flattens list result
-    emails = df.email_list.str.split(" , ").explode("email_list").unique().tolist()
-
-    # remove any entries not in email format
-    emails = [x for x in emails if "@" in x]
-
-    # creates list of email domains from the emails list
-    email_domains = [x[x.rindex("@") + 1 :] for x in emails]
+    # unique emails with the domain of each, entries that aren't emails have none
+    emails = pd.DataFrame(
+        {"email": df["email_list"].str.split(" , "), "domains": df["email_domains"].str.split(" , ")}
+    ).explode(["email", "domains"])
+    emails = emails.drop_duplicates(subset="email")
+    emails = emails[emails["domains"] != ""]
 
     # creates df of domains and counts
-    df = pd.DataFrame(email_domains, columns=["domains"]).value_counts().to_frame().reset_index()
-
-    df = df.rename(columns={0: "occurences"})
+    df = emails["domains"].value_counts().rename_axis("domains").reset_index(name="occurences")
 
     # changes the name of the company if under a certain threshold
     df.loc[df.occurences <= num, "domains"] = "Other"
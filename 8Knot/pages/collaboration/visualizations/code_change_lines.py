@@ -7,10 +7,11 @@ import pandas as pd
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 from queries.response_time_query import response_time_query as rtq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -120,13 +121,11 @@ def toggle_popover(n, is_open):
     background=True,
 )
 
+@cached_figure(f"{PAGE}-{VIZ_ID}", [rtq])
 def code_change_lines_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=rtq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=rtq, repos=repolist)
+    df = cache.wait_for(func=rtq, repos=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -149,39 +148,20 @@ def process_data(df: pd.DataFrame, interval):
     # convert to datetime objects with consistent column name
     df["created"] = pd.to_datetime(df["created"], utc=True)
 
-    # variable to slice on to handle weekly period edge case
-    period_slice = None
-    if interval == "W":
-        # this is to slice the extra period information that comes with the weekly case
-        period_slice = 10
-
-    # group by the "created" date and sum the corresponding columns
-    # borrowed from the pr_over_time.py
-    df_created = (
-        df.groupby(by=df.created.dt.to_period(interval))["total_lines_changed"]
-        .sum()
-        .reset_index()
-        .rename(columns={"created": "Date"})
+    # bin by the "created" date and sum all three columns in one pass,
+    # "Date" holds the start of each bin
+    df_lines = aggregate_by_interval(
+        df,
+        "created",
+        interval,
+        total_lines_changed=("total_lines_changed", "sum"),
+        added=("added", "sum"),
+        removed=("removed", "sum"),
     )
 
-    df_added = (
-        df.groupby(by=df.created.dt.to_period(interval))["added"]
-        .sum()
-        .reset_index()
-        .rename(columns={"created": "Date"})
-    )
-
-    df_removed = (
-        df.groupby(by=df.created.dt.to_period(interval))["removed"]
-        .sum()
-        .reset_index()
-        .rename(columns={"created": "Date"})
-    )
-
-    # converts date column to a datetime object, converts to string first to handle period information
-    df_created["Date"] = pd.to_datetime(df_created["Date"].astype(str).str[:period_slice])
-    df_added["Date"] = pd.to_datetime(df_added["Date"].astype(str).str[:period_slice])
-    df_removed["Date"] = pd.to_datetime(df_removed["Date"].astype(str).str[:period_slice])
+    df_created = df_lines[["Date", "total_lines_changed"]]
+    df_added = df_lines[["Date", "added"]]
+    df_removed = df_lines[["Date", "removed"]]
 
     return df_created, df_added, df_removed
 
@@ -9,10 +9,11 @@ import pandas as pd
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 from queries.contributors_query import contributors_query as ctq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -111,14 +112,11 @@ def toggle_popover(n, is_open):
     background=True,
 )
 
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def contributors_graph(repolist,interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-
-    while df is None:
-            time.sleep(1.0)
-            df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for(func=ctq, repos=repolist, columns=["cntrb_id", "created_at"])
 
     # data ready.
     start = time.perf_counter()
@@ -142,18 +140,10 @@ def process_data(df: pd.DataFrame, interval):
     df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
     #df.dropna(inplace=True)
 
-    period_slice = None
-    if interval == "W":
-        period_slice = 10
-
-    df_contributors = (
-        df.groupby(by=df.created_at.dt.to_period(interval))["cntrb_id"]
-        .nunique()
-        .reset_index()
+    df_contributors = aggregate_by_interval(
+        df, "created_at", interval, date_name="created_at", cntrb_id=("cntrb_id", "nunique")
     )
 
-    df_contributors["created_at"] = pd.to_datetime(df_contributors["created_at"].astype(str).str[:period_slice])
-
     return df_contributors
 
 def create_figure(df_contributors: pd.DataFrame, interval):
@@ -9,10 +9,11 @@ import pandas as pd
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 from queries.forks_query import forks_query as fkq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -150,17 +151,14 @@ def toggle_popover(n, is_open):
 #     logging.warning(f"CONTIBUTORS_VIZ - END - {time.perf_counter() - start}")
 #     return fig
 
+@cached_figure(f"{PAGE}-{VIZ_ID}", [fkq])
 def forks_graph(repolist,interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
     dataframes = []
 
     for repo in repolist:
-        df = cache.grabm(func=fkq, repos=[repo])
-        while df is None:
-                time.sleep(1.0)
-                df = cache.grabm(func=fkq, repos=[repo])
-                break
+        df = cache.wait_for(func=fkq, repos=[repo])
         dataframes.append(df)
 
     # data ready.
@@ -207,19 +205,9 @@ def process_data(df: pd.DataFrame, interval):
     df["created"] = pd.to_datetime(df["created"], utc=True)
     df.sort_values(by='created', inplace=True)
 
-    period_slice = None
-    if interval == "W":
-        period_slice = 10
-
-    df_created = (
-        df.groupby(df.created.dt.to_period(interval))["id"]
-        .count()
-        .cumsum()
-        .reset_index()
-        .rename(columns={"created": "Date", "id": "Total Forks"})
-    )
-
-    df_created["Date"] = pd.to_datetime(df_created["Date"].astype(str).str[:period_slice])
+    df_created = aggregate_by_interval(df, "created", interval, forks=("id", "count"))
+    df_created = df_created.rename(columns={"forks": "Total Forks"})
+    df_created["Total Forks"] = df_created["Total Forks"].cumsum()
 
     return df_created
 
@@ -8,9 +8,11 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.interval_utils import get_assigned_counts
 from queries.pr_assignee_query import pr_assignee_query as praq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -145,13 +147,11 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [praq])
 def cntrib_pr_assignment_graph(repolist, interval, assign_req):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=praq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=praq, repos=repolist)
+    df = cache.wait_for(func=praq, repos=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -225,12 +225,9 @@ def process_data(df: pd.DataFrame, interval, assign_req):
     else:
         df_assign["end_date"] = df_assign.start_date + pd.DateOffset(years=1)
 
-    # iterates through contributors and dates for assignment values
-    for contrib in contributors:
-        df_assign[contrib] = df_assign.apply(
-            lambda row: pr_assignment(df, row.start_date, row.end_date, contrib),
-            axis=1,
-        )
+    # assignment values of all contributors for all dates in one pass
+    df_counts = get_assigned_counts(df, df_assign.start_date, df_assign.end_date, by="assignee")
+    df_assign = pd.concat([df_assign, df_counts.reindex(columns=contributors, fill_value=0)], axis=1)
 
     # formatting for graph generation
     if interval == "M":
@@ -299,51 +296,3 @@ def create_figure(df: pd.DataFrame, interval):
     )
 
     return fig
-
-
-def pr_assignment(df, start_date, end_date, contrib):
-    """
-    This function takes a start and an end date and determines how many
-    prs that are open during that time interval and are currently assigned
-    to the contributor.
-
-    Args:
-    -----
-        df : Pandas Dataframe
-            Dataframe with issue assignment actions of the assignees
-
-        start_date : Datetime Timestamp
-            Timestamp of the start time of the time interval
-
-        end_date : Datetime Timestamp
-            Timestamp of the end time of the time interval
-
-        contrib : str
-            contrb_id for the contributor
-
-    Returns:
-    --------
-        int: Number of assignments to the contributor in the time window
-    """
-
-    # drop rows not by contrib
-    df = df[df["assignee"] == contrib]
-
-    # drop rows that are more recent than the end date
-    df_created = df[df["created"] <= end_date]
-
-    # Keep issues that were either still open after the 'start_date' or that have not been closed.
-    df_in_range = df_created[(df_created["closed"] > start_date) | (df_created["closed"].isnull())]
-
-    # get all issue unassignments and drop rows that have been unassigned more recent than the end date
-    df_unassign = df_in_range[
-        (df_in_range["assignment_action"] == "unassigned") & (df_in_range["assign_date"] <= end_date)
-    ]
-
-    # get all issue assignments and drop rows that have been assigned more recent than the end date
-    df_assigned = df_in_range[
-        (df_in_range["assignment_action"] == "assigned") & (df_in_range["assign_date"] <= end_date)
-    ]
-
-    # return the different of assignments and unassignments
-    return df_assigned.shape[0] - df_unassign.shape[0]
@@ -6,9 +6,10 @@ from dash.dependencies import Input, Output, State
 import pandas as pd
 import logging
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 from queries.commits_query import commits_query as cmq
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import io
 import time
@@ -114,13 +115,11 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [cmq])
 def commits_over_time_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=cmq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=cmq, repos=repolist)
+    df = cache.wait_for(func=cmq, repos=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -146,23 +145,8 @@ def process_data(df: pd.DataFrame, interval):
     df["date"] = pd.to_datetime(df["date"], utc=True)
     df.rename(columns={"date": "created"}, inplace=True)
 
-    # variable to slice on to handle weekly period edge case
-    period_slice = None
-    if interval == "W":
-        # this is to slice the extra period information that comes with the weekly case
-        period_slice = 10
-
-    # get the count of commits in the desired interval in pandas period format, sort index to order entries
-    df_created = (
-        df.groupby(by=df.created.dt.to_period(interval))["commits"]
-        .nunique()
-        .reset_index()
-        .rename(columns={"created": "Date"})
-    )
-
-    # converts date column to a datetime object, converts to string first to handle period information
-    # the period slice is to handle weekly corner case
-    df_created["Date"] = pd.to_datetime(df_created["Date"].astype(str).str[:period_slice])
+    # get the count of commits in the desired interval, "Date" holds the start of each bin
+    df_created = aggregate_by_interval(df, "created", interval, commits=("commits", "nunique"))
 
     return df_created
 
@@ -8,9 +8,11 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.interval_utils import get_open_counts, get_assigned_counts
 from queries.issue_assignee_query import issue_assignee_query as iaq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -108,13 +110,11 @@ def toggle_popover(n, is_open):
     [Input("repo-choices", "data"), Input(f"date-radio-{PAGE}-{VIZ_ID}", "value")],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [iaq])
 def cntrib_issue_assignment_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=iaq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=iaq, repos=repolist)
+    df = cache.wait_for(func=iaq, repos=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -163,13 +163,13 @@ def process_data(df: pd.DataFrame, interval):
     else:
         df_assign["end_date"] = df_assign.start_date + pd.DateOffset(years=1)
 
-    # dynamically apply the function to all dates defined in the date_range to create df_status
-    df_assign["Assigned"], df_assign["Unassigned"] = zip(
-        *df_assign.apply(
-            lambda row: issue_assignment(df, row.start_date, row.end_date),
-            axis=1,
-        )
-    )
+    # number of issues open in each time interval
+    df_items = df.dropna(subset=["issue_id"]).drop_duplicates(subset="issue_id")
+    num_open = get_open_counts(df_items["created"], df_items["closed"], df_assign.start_date, df_assign.end_date)
+
+    # number of assigned issues in each time interval, the rest are unassigned
+    df_assign["Assigned"] = get_assigned_counts(df, df_assign.start_date, df_assign.end_date)
+    df_assign["Unassigned"] = num_open - df_assign["Assigned"]
 
     # formatting for graph generation
     if interval == "M":
@@ -236,53 +236,3 @@ def create_figure(df: pd.DataFrame, interval):
     )
 
     return fig
-
-
-def issue_assignment(df, start_date, end_date):
-    """
-    This function takes a start and a end date and determines how many
-    issues in that time interval are assigned and unassigned.
-
-    Args:
-    -----
-        df : Pandas Dataframe
-            Dataframe with issue assignment actions of the assignees
-
-        start_date : Datetime Timestamp
-            Timestamp of the start time of the time interval
-
-        end_date : Datetime Timestamp
-            Timestamp of the end time of the time interval
-
-    Returns:
-    --------
-        int, int: Number of assigned and unassigned issues in the time window
-    """
-
-    # drop rows that are more recent than the end date
-    df_created = df[df["created"] <= end_date]
-
-    # Keep issues that were either still open after the 'start_date' or that have not been closed.
-    df_in_range = df_created[(df_created["closed"] > start_date) | (df_created["closed"].isnull())]
-
-    # number of issues open in time interval
-    num_issues_open = df_in_range["issue_id"].nunique()
-
-    # get all issue unassignments and drop rows that have been unassigned more recent than the end date
-    num_unassigned_actions = df_in_range[
-        (df_in_range["assignment_action"] == "unassigned") & (df_in_range["assign_date"] <= end_date)
-    ].shape[0]
-
-    # get all issue assignments and drop rows that have been assigned more recent than the end date
-    num_assigned_actions = df_in_range[
-        (df_in_range["assignment_action"] == "assigned") & (df_in_range["assign_date"] <= end_date)
-    ].shape[0]
-
-    # number of assigned issues during the time interval
-    num_issues_assigned = num_assigned_actions - num_unassigned_actions
-
-    # number of unassigned issues during the time interval
-    num_issues_unassigned = num_issues_open - num_issues_assigned
-
-    # return the number of assigned and unassigned issues
-    return num_issues_assigned, num_issues_unassigned
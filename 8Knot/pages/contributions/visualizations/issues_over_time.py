@@ -6,10 +6,11 @@ from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
 import logging
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 from pages.utils.job_utils import nodata_graph
 from queries.issues_query import issues_query as iq
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 import io
 import time
 
@@ -114,13 +115,11 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [iq])
 def issues_over_time_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=iq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=iq, repos=repolist)
+    df = cache.wait_for(func=iq, repos=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -149,28 +148,13 @@ def process_data(df: pd.DataFrame, interval):
     # order values chronologically by creation date
     df = df.sort_values(by="created", axis=0, ascending=True)
 
-    # variable to slice on to handle weekly period edge case
-    period_slice = None
-    if interval == "W":
-        # this is to slice the extra period information that comes with the weekly case
-        period_slice = 10
+    # data frames for issues created or closed. Detailed description applies for both.
 
-    # data frames for issues created or closed. Detailed description applies for all 3.
-
-    # get the count of created issues in the desired interval in pandas period format, sort index to order entries
-    created_range = pd.to_datetime(df["created"]).dt.to_period(interval).value_counts().sort_index()
-
-    # converts to data frame object and creates date column from period values
-    df_created = created_range.to_frame().reset_index().rename(columns={"index": "Date"})
-
-    # converts date column to a datetime object, converts to string first to handle period information
-    # the period slice is to handle weekly corner case
-    df_created["Date"] = pd.to_datetime(df_created["Date"].astype(str).str[:period_slice])
+    # get the count of created issues in the desired interval, "Date" holds the start of each bin
+    df_created = aggregate_by_interval(df, "created", interval, created=("created", "size"))
 
     # df for closed issues in time interval
-    closed_range = pd.to_datetime(df["closed"]).dt.to_period(interval).value_counts().sort_index()
-    df_closed = closed_range.to_frame().reset_index().rename(columns={"index": "Date"})
-    df_closed["Date"] = pd.to_datetime(df_closed["Date"].astype(str).str[:period_slice])
+    df_closed = aggregate_by_interval(df, "closed", interval, closed=("closed", "size"))
 
     # formatting for graph generation
     if interval == "M":
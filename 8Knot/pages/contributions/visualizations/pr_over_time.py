@@ -7,11 +7,12 @@ import plotly.graph_objects as go
 import pandas as pd
 import datetime as dt
 import logging
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 import io
 from pages.utils.job_utils import nodata_graph
 from queries.prs_query import prs_query as prq
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 import time
 
 PAGE = "contributions"
@@ -115,13 +116,11 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [prq])
 def prs_over_time_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=prq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=prq, repos=repolist)
+    df = cache.wait_for(func=prq, repos=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -151,33 +150,16 @@ def process_data(df: pd.DataFrame, interval):
     # order values chronologically by creation date
     df = df.sort_values(by="created", axis=0, ascending=True)
 
-    # variable to slice on to handle weekly period edge case
-    period_slice = None
-    if interval == "W":
-        # this is to slice the extra period information that comes with the weekly case
-        period_slice = 10
-
     # --data frames for PR created, merged, or closed. Detailed description applies for all 3.--
 
-    # get the count of created prs in the desired interval in pandas period format, sort index to order entries
-    created_range = df["created"].dt.to_period(interval).value_counts().sort_index()
-
-    # converts to data frame object and created date column from period values
-    df_created = created_range.to_frame().reset_index().rename(columns={"index": "Date"})
-
-    # converts date column to a datetime object, converts to string first to handle period information
-    # the period slice is to handle weekly corner case
-    df_created["Date"] = pd.to_datetime(df_created["Date"].astype(str).str[:period_slice])
+    # get the count of created prs in the desired interval, "Date" holds the start of each bin
+    df_created = aggregate_by_interval(df, "created", interval, created=("created", "size"))
 
     # df for merged prs in time interval
-    merged_range = pd.to_datetime(df["merged"]).dt.to_period(interval).value_counts().sort_index()
-    df_merged = merged_range.to_frame().reset_index().rename(columns={"index": "Date"})
-    df_merged["Date"] = pd.to_datetime(df_merged["Date"].astype(str).str[:period_slice])
+    df_merged = aggregate_by_interval(df, "merged", interval, merged=("merged", "size"))
 
     # df for closed prs in time interval
-    closed_range = pd.to_datetime(df["closed"]).dt.to_period(interval).value_counts().sort_index()
-    df_closed = closed_range.to_frame().reset_index().rename(columns={"index": "Date"})
-    df_closed["Date"] = pd.to_datetime(df_closed["Date"].astype(str).str[:period_slice])
+    df_closed = aggregate_by_interval(df, "closed", interval, closed=("closed", "size"))
 
     # A single df created for plotting merged and closed as stacked bar chart
     df_closed_merged = pd.merge(df_merged, df_closed, on="Date", how="outer")
@@ -4,13 +4,15 @@ import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
-from queries.contributors_query import contributors_query as ctq
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 
@@ -161,6 +163,7 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def active_drifting_contributors_graph(repolist, interval, drift_interval, away_interval):
     # conditional for the intervals to be valid options
     if drift_interval is None or away_interval is None:
@@ -171,10 +174,7 @@ def active_drifting_contributors_graph(repolist, interval, drift_interval, away_
 
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(func=ctq, repos=repolist, prepare=prepare_frame, columns=["cntrb_id", "created_at"])
 
     logging.warning(f"ACTIVE_DRIFTING_CONTRIBUTOR_GROWTH_VIZ - START")
     start = time.perf_counter()
@@ -194,13 +194,9 @@ def active_drifting_contributors_graph(repolist, interval, drift_interval, away_
 
 
 def process_data(df: pd.DataFrame, interval, drift_interval, away_interval):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
     df.rename(columns={"created_at": "created"}, inplace=True)
 
-    # order from beginning of time to most recent
-    df = df.sort_values("created", axis=0, ascending=True)
-
     # first and last elements of the dataframe are the
     # earliest and latest events respectively
     earliest, latest = df["created"].min(), df["created"].max()
@@ -211,12 +207,9 @@ def process_data(df: pd.DataFrame, interval, drift_interval, away_interval):
     # df for active, driving, and away contributors for time interval
     df_status = dates.to_frame(index=False, name="Date")
 
-    # dynamically apply the function to all dates defined in the date_range to create df_status
-    df_status["Active"], df_status["Drifting"], df_status["Away"] = zip(
-        *df_status.apply(
-            lambda row: get_active_drifting_away_up_to(df, row.Date, drift_interval, away_interval),
-            axis=1,
-        )
+    # all dates in the date_range in one sweep over the contributions
+    df_status["Active"], df_status["Drifting"], df_status["Away"] = get_active_drifting_away(
+        df, dates, drift_interval, away_interval
     )
 
     # formatting for graph generation
@@ -286,32 +279,80 @@ def create_figure(df_status: pd.DataFrame, interval):
     return fig
 
 
-def get_active_drifting_away_up_to(df, date, drift_interval, away_interval):
-    # drop rows that are more recent than the date limit
-    df_lim = df[df["created"] <= date]
-
-    # keep more recent contribution per ID
-    df_lim = df_lim.drop_duplicates(subset="cntrb_id", keep="last")
-
-    # time difference, drifting_months before the threshold date
-    drift_mos = date - relativedelta(months=+drift_interval)
-
-    # time difference, away_months before the threshold date
-    away_mos = date - relativedelta(months=+away_interval)
-
-    # number of total contributors up until date
-    numTotal = df_lim.shape[0]
-
-    # number of 'active' contributors, people with contributions before the drift time
-    numActive = df_lim[df_lim["created"] >= drift_mos].shape[0]
-
-    # set of contributions that are before the away time
-    drifting = df_lim[df_lim["created"] > away_mos]
-
-    # number of the set of contributions that are after the drift time, but before away
-    numDrifting = drifting[drifting["created"] < drift_mos].shape[0]
-
-    # difference of the total to get the away value
-    numAway = numTotal - (numActive + numDrifting)
-
-    return [numActive, numDrifting, numAway]
+def get_active_drifting_away(df, dates, drift_interval, away_interval):
+    """
+    Counts the active, drifting, and away contributors at every date.
+
+    At a date, a contributor is active if their latest contribution up to
+    then is at most drift_interval months old, drifting if it's older but
+    less than away_interval months old, and away otherwise.
+
+    Instead of re-filtering the contributions for every date, each
+    contribution is turned into the run of dates it keeps its contributor
+    active (or not away) for. Both ends of the run are found with
+    searchsorted on the sorted dates and thresholds, and the runs are
+    summed up for all dates at once with a cumulative sum.
+
+    Args:
+    -----
+        df (pd.DataFrame): contributions with "cntrb_id" and "created", sorted by "created"
+        dates (pd.DatetimeIndex): ascending dates to count at
+        drift_interval (int): months without contributions before drifting
+        away_interval (int): months without contributions before away
+
+    Returns:
+    --------
+        (np.array, np.array, np.array): number of active, drifting, and away contributors per date
+    """
+    # thresholds per date, both ascending like the dates themselves.
+    drift_mos = pd.DatetimeIndex([d - relativedelta(months=+drift_interval) for d in dates])
+    away_mos = pd.DatetimeIndex([d - relativedelta(months=+away_interval) for d in dates])
+
+    # contributions grouped by contributor, in time order within each.
+    df = df.sort_values(["cntrb_id", "created"], kind="stable")
+    created = pd.DatetimeIndex(df["created"])
+    ids = df["cntrb_id"].to_numpy()
+    first_of_cntrb = np.concatenate(([True], ids[1:] != ids[:-1]))
+
+    # first date at which each contribution counts, i.e. created <= date.
+    starts = dates.searchsorted(created, side="left")
+
+    # number of total contributors, from the date of their first contribution on.
+    num_total = _count_from(starts[first_of_cntrb], len(dates))
+
+    # a contribution keeps its contributor active while created >= drift threshold,
+    # and not away while it's active or created > away threshold.
+    active_ends = drift_mos.searchsorted(created, side="right")
+    present_ends = np.maximum(active_ends, away_mos.searchsorted(created, side="left"))
+
+    num_active = _count_covered(starts, active_ends, first_of_cntrb, len(dates))
+    num_present = _count_covered(starts, present_ends, first_of_cntrb, len(dates))
+
+    num_drifting = num_present - num_active
+    num_away = num_total - num_present
+
+    return num_active, num_drifting, num_away
+
+
+def _count_from(starts, n):
+    """
+    (private)
+    Number of 'starts' at or before each of n positions.
+    """
+    return np.cumsum(np.bincount(starts, minlength=n + 1)[:n])
+
+
+def _count_covered(starts, ends, first_of_cntrb, n):
+    """
+    (private)
+    Number of contributors covered by at least one of their runs
+    [start, end) at each of n positions. Runs are ordered by contributor
+    and both their starts and ends are ascending within a contributor.
+    """
+    # a run overlapping the previous run of the same contributor only
+    # covers the positions after it, so each contributor counts once.
+    prev_ends = np.concatenate(([0], ends[:-1]))
+    starts = np.where(first_of_cntrb, starts, np.maximum(starts, prev_ends))
+
+    covered = starts < ends
+    return _count_from(starts[covered], n) - _count_from(ends[covered], n)
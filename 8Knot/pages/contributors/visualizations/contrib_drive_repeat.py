@@ -8,10 +8,11 @@ import logging
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
 from pages.utils.job_utils import nodata_graph
-from queries.contributors_query import contributors_query as ctq
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 import time
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "contrib-drive-repeat"
@@ -153,13 +154,13 @@ def graph_title(view):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def repeat_drive_by_graph(repolist, contribs, view):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(
+        func=ctq, repos=repolist, prepare=prepare_frame, columns=["cntrb_id", "created_at", "Action", "rank"]
+    )
 
     # data ready.
     start = time.perf_counter()
@@ -186,8 +187,7 @@ def repeat_drive_by_graph(repolist, contribs, view):
 
 
 def process_data(df, view, contribs):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
     df.rename(columns={"created_at": "created"}, inplace=True)
 
     # graph on contribution subset
@@ -6,21 +6,25 @@ import dash_mantine_components as dmc
 from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
-from queries.contributors_query import contributors_query as ctq
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
-from scipy import stats
 
 PAGE = "contributors"
 VIZ_ID = "contrib-prolificacy-over-time"
 
+# action types the contributor prolificacy is graphed for
+ACTION_TYPES = ["Commit", "Issue Opened", "Issue Comment", "Issue Closed", "PR Opened", "PR Comment", "PR Review"]
+
 gc_contrib_prolificacy_over_time = dbc.Card(
     [
         dbc.CardBody(
@@ -230,16 +234,13 @@ def graph_title(window_width):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def create_contrib_prolificacy_over_time_graph(
     repolist, patterns, threshold, window_width, step_size, start_date, end_date
 ):
     # main function for all data pre processing
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(func=ctq, repos=repolist, prepare=prepare_frame)
 
     # data ready.
     start = time.perf_counter()
@@ -264,11 +265,7 @@ def create_contrib_prolificacy_over_time_graph(
 
 def process_data(df, patterns, threshold, window_width, step_size, start_date, end_date):
 
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
-    # order values chronologically by created_at date
-    df = df.sort_values(by="created_at", ascending=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
 
     # if the start_date and/or the end date is not specified set them to the beginning and most recent created_at date
     if start_date is None:
@@ -292,20 +289,13 @@ def process_data(df, patterns, threshold, window_width, step_size, start_date, e
     # calculate the end of each interval and store the values in a column named period_from
     df_final["period_to"] = df_final["period_from"] + pd.DateOffset(months=window_width)
 
-    # dynamically calculate the contributor prolificacy over time for each of the action times and store results in df_final
-    (
-        df_final["Commit"],
-        df_final["Issue Opened"],
-        df_final["Issue Comment"],
-        df_final["Issue Closed"],
-        df_final["PR Opened"],
-        df_final["PR Comment"],
-        df_final["PR Review"],
-    ) = zip(
-        *df_final.apply(
-            lambda row: cntrb_prolificacy_over_time(df, row.period_from, row.period_to, window_width, threshold), axis=1
-        )
-    )
+    # count every contributor's actions in every window at once, then calculate
+    # the contributor prolificacy for each of the action types and store results in df_final
+    df_counts = get_window_counts(df, df_final["period_from"], df_final["period_to"])
+    df_prolificacy = calc_cntrb_prolificacy(df_counts, len(df_final), threshold)
+
+    for action_type in ACTION_TYPES:
+        df_final[action_type] = df_prolificacy.get(action_type)
 
     return df_final
 
@@ -424,70 +414,121 @@ def create_figure(df_final, step_size):
     return fig
 
 
-def cntrb_prolificacy_over_time(df, period_from, period_to, window_width, threshold):
-    # subset df such that the rows correspond to the window of time defined by period from and period to
-    time_mask = (df["created_at"] >= period_from) & (df["created_at"] <= period_to)
-    df_in_range = df.loc[time_mask]
-
-    # initialize varibles to store contributor prolificacy accoding to action type
-    commit, issueOpened, issueComment, issueClosed, prOpened, prReview, prComment = (
-        None,
-        None,
-        None,
-        None,
-        None,
-        None,
-        None,
+def get_window_counts(df, period_from, period_to):
+    """
+    Counts the contributions of every contributor by action type
+    in every time window [period_from, period_to].
+
+    Windows overlap, so instead of grouping each window's rows
+    separately, the rows are first counted per (segment, action,
+    contributor), where segments are the stretches of time between
+    consecutive window bounds. A window's counts are then the sum of
+    the counts of the segments it spans.
+
+    Args:
+    -----
+        df (pd.DataFrame): contributions with "created_at", "Action",
+            and "cntrb_id", sorted by "created_at"
+        period_from (pd.Series): start of each window
+        period_to (pd.Series): end of each window
+
+    Returns:
+    --------
+        pd.DataFrame: "window" (position of the window), "Action",
+            "cntrb_id", and "count" for every non-zero count
+    """
+    # rows without a contributor or action aren't counted
+    df = df[df["cntrb_id"].notna() & df["Action"].notna()]
+    times = pd.DatetimeIndex(df["created_at"])
+
+    # each window is a contiguous range [lo, hi) of the time-sorted rows
+    lo = times.searchsorted(pd.DatetimeIndex(period_from), side="left")
+    hi = times.searchsorted(pd.DatetimeIndex(period_to), side="right")
+
+    # segments are the ranges of rows between consecutive window bounds
+    bounds = np.unique(np.concatenate((lo, hi)))
+    segment = np.searchsorted(bounds, np.arange(len(df)), side="right") - 1
+
+    # rows before the first or after the last bound are in no window
+    in_windows = (segment >= 0) & (segment < len(bounds) - 1)
+
+    actions, action_names = pd.factorize(df["Action"])
+    cntrbs, cntrb_ids = pd.factorize(df["cntrb_id"])
+    n_actions, n_cntrbs = len(action_names), len(cntrb_ids)
+
+    # counts per (segment, action, contributor), ordered by segment
+    keys = (segment[in_windows] * n_actions + actions[in_windows]) * n_cntrbs + cntrbs[in_windows]
+    seg_keys, seg_counts = np.unique(keys, return_counts=True)
+    seg_of_key = seg_keys // (n_actions * n_cntrbs)
+    group_of_key = seg_keys % (n_actions * n_cntrbs)
+
+    # the (segment, action, contributor) counts that each window spans
+    start = np.searchsorted(seg_of_key, np.searchsorted(bounds, lo), side="left")
+    end = np.searchsorted(seg_of_key, np.searchsorted(bounds, hi), side="left")
+    lengths = end - start
+    windows = np.repeat(np.arange(len(lo)), lengths)
+    spanned = np.repeat(start - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+    # sum the spanned segments' counts per (window, action, contributor)
+    keys = windows * (n_actions * n_cntrbs) + group_of_key[spanned]
+    win_keys, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=seg_counts[spanned], minlength=len(win_keys)).astype(np.int64)
+
+    group = win_keys % (n_actions * n_cntrbs)
+    return pd.DataFrame(
+        {
+            "window": win_keys // (n_actions * n_cntrbs),
+            "Action": action_names.take(group // n_cntrbs),
+            "cntrb_id": cntrb_ids.take(group % n_cntrbs),
+            "count": counts,
+        }
     )
 
-    # count the number of contributions each contributor has made according each action type
-    df_count_cntrbs = df_in_range.groupby(["Action", "cntrb_id"])["cntrb_id"].count().to_frame()
-    df_count_cntrbs = df_count_cntrbs.rename(columns={"cntrb_id": "count"}).reset_index()
-
-    # pivot df such that the column names correspond to the different action types, index is the cntrb_ids, and the values are the number of contributions of each contributor
-    df_count_cntrbs = df_count_cntrbs.pivot(index="cntrb_id", columns="Action", values="count")
-
-    commit = calc_cntrb_prolificacy(df_count_cntrbs, "Commit", threshold)
-    issueOpened = calc_cntrb_prolificacy(df_count_cntrbs, "Issue Opened", threshold)
-    issueComment = calc_cntrb_prolificacy(df_count_cntrbs, "Issue Comment", threshold)
-    issueClosed = calc_cntrb_prolificacy(df_count_cntrbs, "Issue Closed", threshold)
-    prOpened = calc_cntrb_prolificacy(df_count_cntrbs, "PR Opened", threshold)
-    prReview = calc_cntrb_prolificacy(df_count_cntrbs, "PR Review", threshold)
-    prComment = calc_cntrb_prolificacy(df_count_cntrbs, "PR Comment", threshold)
-
-    return commit, issueOpened, issueComment, issueClosed, prOpened, prReview, prComment
-
-
-def calc_cntrb_prolificacy(df, action_type, threshold):
-    # if the df is empty return None
-    if df.empty:
-        return None
-
-    # if the specified action type is not in the dfs' cols return None
-    if action_type not in df.columns:
-        return None
-
-    # sort rows in df based on number of contributions from greatest to least
-    df = df.sort_values(by=action_type, ascending=False)
-
-    # calculate the threshold amount of contributions
-    thresh_cntrbs = df[action_type].sum() * threshold
-
-    # drop rows where the cntrb_id is None
-    mask = df.index.get_level_values("cntrb_id") == None
-    df = df[~mask]
-
-    # initilize running sum of contributors who make up contributor prolificacy
-    cntrb_prolificacy = 0
-
-    # initialize running sum of contributions
-    running_sum = 0
-
-    for _, row in df.iterrows():
-        running_sum += row[action_type]  # update the running sum by the number of contributions a contributor has made
-        cntrb_prolificacy += 1  # update contributor prolificacy
-        # if the running sum of contributions is greater than or equal to the threshold amount, break
-        if running_sum >= thresh_cntrbs:
-            break
 
-    return cntrb_prolificacy
+def calc_cntrb_prolificacy(df_counts, n_windows, threshold):
+    """
+    Calculates the contributor prolificacy of every window and action type:
+    the fewest contributors whose contributions add up to at least
+    'threshold' of all contributions.
+
+    Contributors are sorted by their number of contributions from greatest
+    to least, and the running sum of contributions is searched for the
+    threshold in all windows and action types at once.
+
+    Args:
+    -----
+        df_counts (pd.DataFrame): counts from get_window_counts
+        n_windows (int): number of windows
+        threshold (float): fraction of contributions, e.g. 0.8
+
+    Returns:
+    --------
+        pd.DataFrame: contributor prolificacy per window (rows) and action type (columns),
+            NaN where a window has no contributions of the action type
+    """
+    actions, action_names = pd.factorize(df_counts["Action"])
+    group = df_counts["window"].to_numpy() * len(action_names) + actions
+    counts = df_counts["count"].to_numpy()
+
+    # greatest to least number of contributions within each (window, action)
+    order = np.lexsort((-counts, group))
+    group, counts = group[order], counts[order]
+
+    # running sum of contributions and number of contributors within each (window, action)
+    starts = np.flatnonzero(np.diff(group, prepend=-1) != 0)
+    sizes = np.diff(np.append(starts, len(group)))
+    running_sum = np.cumsum(counts)
+    running_sum -= np.repeat(running_sum[starts] - counts[starts], sizes)
+    num_cntrbs = np.arange(len(group)) - np.repeat(starts, sizes) + 1
+
+    # threshold amount of contributions of each (window, action)
+    totals = np.bincount(group, weights=counts, minlength=n_windows * len(action_names))
+    thresh_cntrbs = totals[group] * threshold
+
+    # fewest contributors whose running sum reaches the threshold
+    prolificacy = np.full(n_windows * len(action_names), np.inf)
+    reached = running_sum >= thresh_cntrbs
+    np.minimum.at(prolificacy, group[reached], num_cntrbs[reached])
+    prolificacy[np.isinf(prolificacy)] = np.nan
+
+    return pd.DataFrame(prolificacy.reshape(n_windows, len(action_names)), columns=action_names)
@@ -10,9 +10,10 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
-from queries.contributors_query import contributors_query as ctq
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -213,13 +214,11 @@ def graph_title(k, action_type):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def create_top_k_cntrbs_graph(repolist, action_type, top_k, patterns, start_date, end_date):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(func=ctq, repos=repolist, prepare=prepare_frame)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -243,11 +242,7 @@ def create_top_k_cntrbs_graph(repolist, action_type, top_k, patterns, start_date
 
 
 def process_data(df: pd.DataFrame, action_type, top_k, patterns, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
-    # order values chronologically by created_at date
-    df = df.sort_values(by="created_at", ascending=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
 
     # filter values based on date picker
     if start_date is not None:
@@ -8,9 +8,10 @@ import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, color_seq
-from queries.contributors_query import contributors_query as ctq
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 
@@ -153,14 +154,12 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def contribs_by_action_graph(repolist, interval, action):
 
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(func=ctq, repos=repolist, prepare=prepare_frame, columns=["created_at", "Action"])
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -185,11 +184,7 @@ def contribs_by_action_graph(repolist, interval, action):
 
 def process_data(df: pd.DataFrame, interval, action):
 
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
-    # order values chronologically by COLUMN_TO_SORT_BY date
-    df = df.sort_values(by="created_at", axis=0, ascending=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
 
     # drop all contributions that are not the selected action
     df = df[df["Action"].str.contains(action)]
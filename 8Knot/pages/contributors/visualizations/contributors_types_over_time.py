@@ -7,13 +7,14 @@ import pandas as pd
 import logging
 import numpy as np
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 
 from pages.utils.job_utils import nodata_graph
-from queries.contributors_query import contributors_query as ctq
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 import time
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "contrib-types-over-time"
@@ -137,13 +138,11 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def create_contrib_over_time_graph(repolist, contribs, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(func=ctq, repos=repolist, prepare=prepare_frame)
 
     start = time.perf_counter()
     logging.warning("CONTRIB_DRIVE_REPEAT_VIZ - START")
@@ -163,8 +162,7 @@ def create_contrib_over_time_graph(repolist, contribs, interval):
 
 
 def process_data(df, interval, contribs):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
     df.rename(columns={"created_at": "created"}, inplace=True)
 
     # remove null contrib ids
@@ -177,38 +175,11 @@ def process_data(df, interval, contribs):
     df_drive_temp = df.loc[~df["cntrb_id"].isin(contributors)]
     df_repeat_temp = df.loc[df["cntrb_id"].isin(contributors)]
 
-    # order values chronologically by creation date
-    df = df.sort_values(by="created", axis=0, ascending=True)
-
-    # variable to slice on to handle weekly period edge case
-    period_slice = None
-    if interval == "W":
-        # this is to slice the extra period information that comes with the weekly case
-        period_slice = 10
-
-    # df for drive by contributros in time interval
-    df_drive = (
-        # disable and re-enable formatter
-        # fmt: off
-        df_drive_temp.groupby(by=df_drive_temp.created.dt.to_period(interval))["cntrb_id"]
-        # fmt: on
-        .nunique()
-        .reset_index()
-        .rename(columns={"cntrb_id": "Drive", "created": "Date"})
-    )
-    df_drive["Date"] = pd.to_datetime(df_drive["Date"].astype(str).str[:period_slice])
+    # df for drive by contributros in time interval, "Date" holds the start of each bin
+    df_drive = aggregate_by_interval(df_drive_temp, "created", interval, Drive=("cntrb_id", "nunique"))
 
     # df for repeat contributors in time interval
-    df_repeat = (
-        # disable and re-enable formatter
-        # fmt: off
-        df_repeat_temp.groupby(by=df_repeat_temp.created.dt.to_period(interval))["cntrb_id"]
-        # fmt: on
-        .nunique()
-        .reset_index()
-        .rename(columns={"cntrb_id": "Repeat", "created": "Date"})
-    )
-    df_repeat["Date"] = pd.to_datetime(df_repeat["Date"].astype(str).str[:period_slice])
+    df_repeat = aggregate_by_interval(df_repeat_temp, "created", interval, Repeat=("cntrb_id", "nunique"))
 
     # A single df created for plotting merged and closed as stacked bar chart
     df_drive_repeat = pd.merge(df_drive, df_repeat, on="Date", how="outer")
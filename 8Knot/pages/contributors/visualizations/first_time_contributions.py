@@ -7,8 +7,9 @@ import pandas as pd
 import logging
 import plotly.express as px
 from pages.utils.graph_utils import color_seq
-from queries.contributors_query import contributors_query as ctq
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 import io
 import time
 from pages.utils.job_utils import nodata_graph
@@ -77,13 +78,13 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def create_first_time_contributors_graph(repolist):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(
+        func=ctq, repos=repolist, prepare=prepare_frame, columns=["created_at", "Action", "rank"]
+    )
 
     start = time.perf_counter()
     logging.warning("CONTRIB_DRIVE_REPEAT_VIZ - START")
@@ -103,8 +104,7 @@ def create_first_time_contributors_graph(repolist):
 
 
 def process_data(df):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
     df.rename(columns={"created_at": "created"}, inplace=True)
 
     # selection for 1st contribution only
@@ -6,10 +6,11 @@ from dash.dependencies import Input, Output, State
 import pandas as pd
 import logging
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
-from queries.contributors_query import contributors_query as ctq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
+from queries.contributors_query import contributors_query as ctq, prepare_frame
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 
@@ -124,13 +125,13 @@ def graph_title(view):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
 def new_contributor_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=ctq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=ctq, repos=repolist)
+    df = cache.wait_for_prepared(
+        func=ctq, repos=repolist, prepare=prepare_frame, columns=["cntrb_id", "created_at", "rank"]
+    )
 
     logging.warning("TOTAL_CONTRIBUTOR_GROWTH_VIZ - START")
     start = time.perf_counter()
@@ -150,13 +151,9 @@ def new_contributor_graph(repolist, interval):
 
 
 def process_data(df, interval):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    # created_at is already parsed to datetimes and in chronological order, see prepare_frame
     df.rename(columns={"created_at": "created"}, inplace=True)
 
-    # order from beginning of time to most recent
-    df = df.sort_values("created", axis=0, ascending=True)
-
     """
         Assume that the cntrb_id values are unique to individual contributors.
         Find the first rank-1 contribution of the contributors, saving the created
@@ -173,14 +170,8 @@ def process_data(df, interval):
     if interval == -1:
         return df, None
 
-    # get the count of new contributors in the desired interval in pandas period format, sort index to order entries
-    created_range = pd.to_datetime(df["created"]).dt.to_period(interval).value_counts().sort_index()
-
-    # converts to data frame object and creates date column from period values
-    df_contribs = created_range.to_frame().reset_index().rename(columns={"index": "Date", "created": "contribs"})
-
-    # converts date column to a datetime object, converts to string first to handle period information
-    df_contribs["Date"] = pd.to_datetime(df_contribs["Date"].astype(str))
+    # get the count of new contributors in the desired interval, "Date" holds the start of each bin
+    df_contribs = aggregate_by_interval(df, "created", interval, contribs=("created", "size"))
 
     # correction for year binning -
     # rounded up to next year so this is a simple patch
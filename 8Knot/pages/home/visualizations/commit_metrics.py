@@ -2,7 +2,9 @@ from dash import html, dcc
 import dash_bootstrap_components as dbc
 from dash import callback
 from dash.dependencies import Input, Output, State
-from db_manager.augur_manager import AugurManager
+from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.rollup import merge_rollups, summarize
+from queries.home_metrics_query import home_metrics_query as hmq
 
 # card for commit total for selected repos
 commit_total = dbc.Card(
@@ -114,121 +116,35 @@ gc_commit_metrics = dbc.Card(
 
 @callback(
     Output("commit-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def commit_count(repolist):
-    """Queries Augur for the count of commits for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            /*commit_hash'es are unique per commit*/
-            count(distinct c.cmt_commit_hash) as num_commits
-        from
-            augur_data.commits c,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and c.repo_id = r.repo_id
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
     Output("commit-lines-added", "children"),
     Output("commit-lines-removed", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def commit_lines_delta(repolist):
-    """Queries Augur for the average number of lines added per commit
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-            select
-                round(avg(l_delta.lines_added), 2) as avg_lines_added, round(avg(l_delta.lines_removed), 2) as avg_lines_removed
-            from
-                /*
-                * For each commit, get the total number of lines added/removed across all files in commit.
-                * */
-                (select
-                    sum(c.cmt_added) as lines_added, sum(c.cmt_removed) as lines_removed
-                from
-                    augur_data.commits c,
-                    augur_data.repo r
-                where
-                    r.repo_id in ({str(repolist)[1:-1]})
-                    and c.repo_id = r.repo_id
-                group by c.cmt_commit_hash) as l_delta
-        """
-    )
-
-    return df.iat[0, 0], df.iat[0, 1]
-
-
-@callback(
     Output("files-per-commit", "children"),
     [
         Input("repo-choices", "data"),
     ],
     background=True,
 )
-def files_per_commit(repolist):
-    """Queries Augur for the number of files per commit for repos in repolist
+def commit_metrics(repolist):
+    """Merges the cached per-repo commit aggregates of repos in repolist
     Args:
         repolist ([int]): list of the repos queried
     """
 
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
+    # wait for data to asynchronously download and become available.
+    cache = cm()
+    df = cache.wait_for(func=hmq, repos=repolist)
 
-    # create engine object from creds
-    db.get_engine()
+    # statistics of the repo set, merged from the per-repo rollups.
+    stats = summarize(merge_rollups(df)).reindex(["commit_files", "commit_lines_added", "commit_lines_removed"])
 
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(f.num_files) as avg_files
-        from
-            (select
-                /*commit_hash'es are unique per commit*/
-                count(*) as num_files
-            from
-                augur_data.commits c,
-                augur_data.repo r
-            where
-                r.repo_id in ({str(repolist)[1:-1]})
-                and c.repo_id = r.repo_id
-            group by c.cmt_commit_hash) as f
-        """
-    )
+    # every commit has at least one file.
+    commits = stats.at["commit_files", "n"]
+    if not commits > 0:
+        return 0, "-", "-", "-"
 
-    return round(df.iat[0, 0], 2)
+    return (
+        int(commits),
+        round(stats.at["commit_lines_added", "mean"], 2),
+        round(stats.at["commit_lines_removed", "mean"], 2),
+        round(stats.at["commit_files", "mean"], 2),
+    )
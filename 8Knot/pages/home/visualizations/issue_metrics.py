@@ -2,7 +2,9 @@ from dash import html, dcc
 import dash_bootstrap_components as dbc
 from dash import callback
 from dash.dependencies import Input, Output, State
-from db_manager.augur_manager import AugurManager
+from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.rollup import merge_rollups, summarize
+from queries.home_metrics_query import home_metrics_query as hmq
 import numpy as np
 import pandas as pd
 
@@ -115,90 +117,54 @@ gc_issue_metrics = dbc.Card(
 
 
 @callback(
+    Output("open-issue-count", "children"),
+    Output("closed-issue-count", "children"),
+    Output("avg-open-issue-age", "children"),
     Output("avg-closed-issue-age", "children"),
     [
         Input("repo-choices", "data"),
     ],
     background=True,
 )
-def avg_closed_issue_age(repolist):
-    """Queries Augur for the avg age of closed issues for repos in repolist
+def issue_metrics(repolist):
+    """Merges the cached per-repo issue aggregates of repos in repolist
     Args:
         repolist ([int]): list of the repos queried
     """
 
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
+    # wait for data to asynchronously download and become available.
+    cache = cm()
+    df = cache.wait_for(func=hmq, repos=repolist)
 
-    # create engine object from creds
-    db.get_engine()
+    # statistics of the repo set, merged from the per-repo rollups.
+    stats = summarize(merge_rollups(df)).reindex(["open_issue_age", "closed_issue_age"])
+    counts = stats["n"].fillna(0).astype(int)
 
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(now() - i.created_at) as difference
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is not null
-        """
+    return (
+        counts["open_issue_age"],
+        counts["closed_issue_age"],
+        format_age(stats.at["open_issue_age", "mean"]),
+        format_age(stats.at["closed_issue_age", "mean"]),
     )
 
-    # timedelta object
-    diff = df.iat[0, 0]
-
-    # days component
-    diff_days = diff.days
-
-    # timedelta representation of # of days to get hours
-    days_delta = pd.Timedelta(days=diff_days)
-
-    # gives remaining hours
-    diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
-
-    return f"{diff_days} days, {round(diff_hours, 1)} hours"
-
 
-@callback(
-    Output("avg-open-issue-age", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def avg_open_issue_age(repolist):
-    """Queries Augur for the avg age of open issues for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
+def format_age(seconds):
     """
+    Formats an average age as days and hours.
 
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
+    Args:
+    -----
+        seconds (float): average age in seconds, NaN if there are no items
 
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(now() - i.created_at) as difference
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is null
-        """
-    )
+    Returns:
+    --------
+        str: e.g. "3 days, 4.5 hours"
+    """
+    if pd.isna(seconds):
+        return "-"
 
     # timedelta object
-    diff = df.iat[0, 0]
+    diff = pd.Timedelta(seconds=seconds)
 
     # days component
     diff_days = diff.days
@@ -210,77 +176,3 @@ def avg_open_issue_age(repolist):
     diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
 
     return f"{diff_days} days, {round(diff_hours, 1)} hours"
-
-
-@callback(
-    Output("closed-issue-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def closed_issue_count(repolist):
-    """Queries Augur for the count of closed issues for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct i.issue_id) as num_open_issues
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is not null
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
-    Output("open-issue-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def open_issue_count(repolist):
-    """Queries Augur for the count of open issues for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct i.issue_id) as num_open_issues
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is null
-        """
-    )
-
-    return df.iat[0, 0]
@@ -5,7 +5,9 @@ from dash.dependencies import Input, Output, State
 import pandas as pd
 import numpy as np
 import logging
-from db_manager.augur_manager import AugurManager
+from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.rollup import merge_rollups, summarize
+from queries.home_metrics_query import home_metrics_query as hmq
 
 # card for number of open prs in the selected repo set
 pr_open = dbc.Card(
@@ -167,202 +169,63 @@ gc_pr_metrics = dbc.Card(
 # callbacks below are for the specific queries for these cards
 @callback(
     Output("open-pr-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def pr_count(repolist):
-    """Queries Augur for the count of open prs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct pr.pull_request_id) as num_open_prs
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_closed_at is null
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
     Output("merged-pr-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def merged_pr_count(repolist):
-    """Queries Augur for the count of merged prs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct pr.pull_request_id) as num_open_prs
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_merged_at is not null
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
     Output("rejected-pr-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def rejected_pr_count(repolist):
-    """Queries Augur for the count of unmerged but closed prs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct pr.pull_request_id) as num_open_prs
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_merged_at is null
-            and pr.pr_closed_at is not null
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
     Output("avg-open-pr-age", "children"),
+    Output("avg-merged-pr-age", "children"),
+    Output("avg-pr-messages", "children"),
     [
         Input("repo-choices", "data"),
     ],
     background=True,
 )
-def avg_open_pr_age(repolist):
-    """Queries Augur for the average age of open PRs for repos in repolist
+def pr_metrics(repolist):
+    """Merges the cached per-repo pr aggregates of repos in repolist
     Args:
         repolist ([int]): list of the repos queried
     """
 
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
+    # wait for data to asynchronously download and become available.
+    cache = cm()
+    df = cache.wait_for(func=hmq, repos=repolist)
 
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(now() - pr.pr_created_at) as difference
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_closed_at is null
-        """
+    # statistics of the repo set, merged from the per-repo rollups.
+    stats = summarize(merge_rollups(df)).reindex(
+        ["open_pr_age", "merged_pr_duration", "rejected_pr_duration", "pr_messages"]
+    )
+    counts = stats["n"].fillna(0).astype(int)
+
+    messages = "-"
+    if counts["pr_messages"] > 0:
+        messages = round(stats.at["pr_messages", "mean"], 2)
+
+    return (
+        counts["open_pr_age"],
+        counts["merged_pr_duration"],
+        counts["rejected_pr_duration"],
+        format_age(stats.at["open_pr_age", "mean"]),
+        format_age(stats.at["merged_pr_duration", "mean"]),
+        messages,
     )
-
-    # timedelta object
-    diff = df.iat[0, 0]
-
-    # days component
-    diff_days = diff.days
-
-    # timedelta representation of # of days to get hours
-    days_delta = pd.Timedelta(days=diff_days)
-
-    # gives remaining hours
-    diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
-
-    return f"{diff_days} days, {round(diff_hours, 1)} hours"
 
 
-@callback(
-    Output("avg-merged-pr-age", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def avg_merged_pr_age(repolist):
-    """Queries Augur for the average age of merged PRs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
+def format_age(seconds):
     """
+    Formats an average age as days and hours.
 
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
+    Args:
+    -----
+        seconds (float): average age in seconds, NaN if there are no items
 
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(pr.pr_merged_at - pr.pr_created_at) as difference
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_closed_at is not null
-            and pr.pr_merged_at is not null
-        """
-    )
+    Returns:
+    --------
+        str: e.g. "3 days, 4.5 hours"
+    """
+    if pd.isna(seconds):
+        return "-"
 
     # timedelta object
-    diff = df.iat[0, 0]
+    diff = pd.Timedelta(seconds=seconds)
 
     # days component
     diff_days = diff.days
@@ -374,49 +237,3 @@ def avg_merged_pr_age(repolist):
     diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
 
     return f"{diff_days} days, {round(diff_hours, 1)} hours"
-
-
-@callback(
-    Output("avg-pr-messages", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def rejected_pr_count(repolist):
-    """Queries Augur for the average # of messages on all PRs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(prmc.message_count) as avg_message_count
-        from
-            /*
-            * count the number of unique message ID's for each PR
-            * */
-            (select
-                count(distinct prmr.msg_id) message_count
-            from
-                augur_data.pull_requests pr,
-                augur_data.pull_request_message_ref prmr,
-                augur_data.repo r
-            where
-                r.repo_id in ({str(repolist)[1:-1]})
-                and pr.repo_id = r.repo_id
-                and prmr.pull_request_id = pr.pull_request_id
-            group by pr.pull_request_id
-            ) as prmc
-        """
-    )
-
-    return round(df.iat[0, 0], 2)
@@ -4,6 +4,7 @@ import os
 import time
 import logging
 import json
+import uuid
 from celery.result import AsyncResult
 import dash_bootstrap_components as dbc
 import dash
@@ -17,18 +18,26 @@ from queries.commits_query import commits_query as cq
 from queries.contributors_query import contributors_query as cnq
 from queries.prs_query import prs_query as prq
 from queries.company_query import company_query as cmq
+from queries.contributor_identity_query import contributor_identity_query as ciq
 from queries.pr_assignee_query import pr_assignee_query as praq
 from queries.issue_assignee_query import issue_assignee_query as iaq
 from queries.user_groups_query import user_groups_query as ugq
 from queries.realease_frequency_query import release_frequency_query as rfq
 from queries.response_time_query import response_time_query as rtq
 from queries.forks_query import forks_query as fkq
+from queries.home_metrics_query import home_metrics_query as hmq
+from queries.shards import claim_repos, dispatch_query
 import redis
+from cache_manager.redis_pools import users_client
 import flask
 
 
 # list of queries to be run
-QUERIES = [iq, cq, cnq, prq, cmq, iaq, praq, rtq, rfq, fkq]
+QUERIES = [iq, cq, cnq, prq, cmq, ciq, iaq, praq, rtq, rfq, fkq, hmq]
+
+# forks_query doesn't filter by repo in SQL, so every
+# shard would pull the whole table. it's never sharded.
+UNSHARDED = [fkq]
 
 # check if login has been enabled in config
 login_enabled = os.getenv("AUGUR_LOGIN_ENABLED", "False") == "True"
@@ -54,21 +63,18 @@ def kick_off_group_collection(url, n_clicks):
     """
     if current_user.is_authenticated:
         user_id = current_user.get_id()
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-        )
+        users_cache = users_client()
+
+        # TODO: check how old groups are. If they're pretty old (threshold tbd) then requery
+
         try:
-            users_cache.ping()
+            groups_cached = users_cache.exists(f"{user_id}_groups")
         except redis.exceptions.ConnectionError:
             logging.error("GROUP-COLLECTION: Could not connect to users-cache.")
             return dash.no_update
 
-        # TODO: check how old groups are. If they're pretty old (threshold tbd) then requery
-
         # check if groups are not already cached, or if the refresh-button was pressed
-        if not users_cache.exists(f"{user_id}_groups") or (dash.ctx.triggered_id == "refresh-button"):
+        if not groups_cached or (dash.ctx.triggered_id == "refresh-button"):
             # kick off celery task to collect groups
             # on query worker queue,
             return [ugq.apply_async(args=[user_id], queue="data").id]
@@ -124,20 +130,15 @@ def login_username_button(url):
         if current_user.is_authenticated:
             logging.warning(f"LOGINBUTTON: USER LOGGED IN {current_user}")
             # TODO: implement more permanent interface
-            users_cache = redis.StrictRedis(
-                host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-                port=6379,
-                password=os.getenv("REDIS_PASSWORD", ""),
-            )
+            users_cache = users_client()
+
+            user_id = current_user.get_id()
             try:
-                users_cache.ping()
+                user_info = json.loads(users_cache.get(user_id))
             except redis.exceptions.ConnectionError:
                 logging.error("USERNAME: Could not connect to users-cache.")
                 return dash.no_update
 
-            user_id = current_user.get_id()
-            user_info = json.loads(users_cache.get(user_id))
-
             navlink = [
                 dbc.NavItem(
                     dbc.NavLink(
@@ -179,49 +180,42 @@ def dynamic_multiselect_options(user_in: str, selections):
     if not user_in:
         return dash.no_update
 
-    options = augur.get_multiselect_options().copy()
+    # ranked matches and selections from the index of all repos and orgs,
+    # loaded by augur.multiselect_startup and reloaded when the catalog changes.
+    index = augur.get_search_index()
+
+    if selections is None:
+        selections = []
+
+    # arbitrarily 'small' number of matches returned, best-ranked (shortest) first.
+    opts = index.search(user_in)
+
+    # always include the previous selections from the searchbar to avoid
+    # those values being clobbered when we truncate the total length.
+    selected = index.lookup(selections)
 
     if current_user.is_authenticated:
         logging.warning(f"LOGINBUTTON: USER LOGGED IN {current_user}")
         # TODO: implement more permanent interface
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True,
-        )
-        try:
-            users_cache.ping()
-        except redis.exceptions.ConnectionError:
-            logging.error("MULTISELECT: Could not connect to users-cache.")
-            return dash.no_update
+        users_cache = users_client(decode_responses=True)
 
         try:
+            group_options = []
             if users_cache.exists(f"{current_user.get_id()}_group_options"):
-                options = options + json.loads(users_cache.get(f"{current_user.get_id()}_group_options"))
+                group_options = json.loads(users_cache.get(f"{current_user.get_id()}_group_options"))
         except redis.exceptions.ConnectionError:
-            logging.error("Searchbar: couldn't connect to Redis for user group options.")
-
-    # if the number of options changes then we're
-    # adding AUGUR_ entries somewhere.
-
-    if selections is None:
-        selections = []
+            logging.error("MULTISELECT: Could not connect to users-cache.")
+            return dash.no_update
 
-    # match lowercase inputs with lowercase possible values
-    opts = [i for i in options if user_in.lower() in i["label"]]
+        # a user's groups are few, they're matched directly and ranked with the rest.
+        query = user_in.lower()
+        opts = opts + [v for v in group_options if query in v["label"].lower()]
+        opts = sorted(opts, key=lambda v: len(v["label"]))[: index.top_k]
 
-    # sort matches by length
-    opts = sorted(opts, key=lambda v: len(v["label"]))
+        selected_values = set(selections)
+        selected = selected + [v for v in group_options if v["value"] in selected_values]
 
-    # always include the previous selections from the searchbar to avoid
-    # those values being clobbered when we truncate the total length.
-    # arbitrarily 'small' number of matches returned..
-    if len(opts) < 100:
-        return [opts + [v for v in options if v["value"] in selections]]
-
-    else:
-        return [opts[:100] + [v for v in options if v["value"] in selections]]
+    return [opts + selected]
 
 
 # callback for repo selections to feed into visualization call backs
@@ -253,24 +247,15 @@ def multiselect_values_to_repo_ids(n_clicks, user_vals):
     if current_user.is_authenticated:
         logging.warning(f"LOGINBUTTON: USER LOGGED IN {current_user}")
         # TODO: implement more permanent interface
-        users_cache = redis.StrictRedis(
-            host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-            port=6379,
-            password=os.getenv("REDIS_PASSWORD", ""),
-            decode_responses=True,
-        )
-        try:
-            users_cache.ping()
-        except redis.exceptions.ConnectionError:
-            logging.error("SEARCH-BUTTON: Could not connect to users-cache.")
-            return dash.no_update
+        users_cache = users_client(decode_responses=True)
 
         try:
             if users_cache.exists(f"{current_user.get_id()}_groups"):
                 user_groups = json.loads(users_cache.get(f"{current_user.get_id()}_groups"))
                 logging.warning(f"USERS Groups: {type(user_groups)}, {user_groups}")
         except redis.exceptions.ConnectionError:
-            logging.error("Searchbar: couldn't connect to Redis for user group options.")
+            logging.error("SEARCH-BUTTON: Could not connect to users-cache.")
+            return dash.no_update
 
     group_repos = [user_groups[g] for g in names if not augur.is_org(g)]
     # flatten list repo_ids in orgs to 1D
@@ -345,11 +330,10 @@ def wait_queries(job_ids):
 
     jobs = [AsyncResult(j_id) for j_id in job_ids]
 
-    # default 'result_expires' for celery config is 86400 seconds.
-    # so we don't have to check if the jobs exist. if this tasks
-    # is enqueued 24 hours after the query-worker tasks finish
-    # then we have a big problem. However, we should 'forget' all
-    # results before we exit.
+    # jobs may be shared with other sessions that attached to the same
+    # extraction, so results aren't 'forgotten' here: forgetting a job
+    # would leave the other waiters polling a PENDING result forever.
+    # results expire after celery's 'result_expires' (86400s by default).
 
     while True:
         logging.warning([j.status for j in jobs])
@@ -357,27 +341,10 @@ def wait_queries(job_ids):
         # jobs are either all ready
         if all(j.successful() for j in jobs):
             logging.warning([j.status for j in jobs])
-            jobs = [j.forget() for j in jobs]
             return "Data Ready", "#b5b683"
 
         # or one of them has failed
         if any(j.failed() for j in jobs):
-            # if a job fails, we need to wait for the others to finish before
-            # we can 'forget' them. otherwise to-be-successful jobs will always
-            # be forgotten if one fails.
-
-            # tasks need to have either failed or succeeded before being forgotten.
-            while True:
-                num_succeeded = [j.successful() for j in jobs].count(True)
-                num_failed = [j.failed() for j in jobs].count(True)
-                num_total = num_failed + num_succeeded
-
-                if num_total == len(jobs):
-                    break
-
-                time.sleep(4.0)
-
-            jobs = [j.forget() for j in jobs]
             return "Data Incomplete- Retry", "danger"
 
         # pause to let something change
@@ -394,8 +361,17 @@ def run_queries(repos):
     instance for input Repos; caches results in redis per
     (query_function,repo) pair.
 
+    Only one extraction per (query_function, repo) pair runs at a time:
+    repos that another job is already extracting are left to that job,
+    and its id is returned alongside the ids of the jobs started here.
+    Large selections are extracted by parallel shards whose job only
+    succeeds once every shard has landed.
+
     Args:
         repos ([int]): repositories we collect data for.
+
+    Returns:
+        [str]: ids of the jobs the data is waited on from.
     """
 
     # cache manager object
@@ -404,17 +380,28 @@ def run_queries(repos):
     # list of queries to process
     funcs = QUERIES
 
-    # list of job promises
-    jobs = []
+    # ids of the jobs that produce the data, in order, without duplicates.
+    job_ids = {}
 
     for f in funcs:
         # only download repos that aren't currently in cache
         not_ready = [r for r in repos if cache.exists(f, r) != 1]
+        if not not_ready:
+            continue
+
+        # lease the repos for a new job, attaching to the jobs
+        # that are already extracting the others.
+        job_id = str(uuid.uuid4())
+        holders = claim_repos(cache, f, not_ready, job_id)
 
-        # add job to queue
-        j = f.apply_async(args=[not_ready], queue="data")
+        claimed = [r for r, h in zip(not_ready, holders) if h == job_id]
+        if claimed:
+            # add job to queue, split into parallel shards if the selection is large.
+            if f in UNSHARDED:
+                f.apply_async(args=[claimed], queue="data", task_id=job_id)
+            else:
+                dispatch_query(f, claimed, job_id, sizes=augur.get_repo_sizes(claimed))
 
-        # add job promise to local promise list
-        jobs.append(j)
+        job_ids.update(dict.fromkeys(holders))
 
-    return [j.id for j in jobs]
+    return list(job_ids)
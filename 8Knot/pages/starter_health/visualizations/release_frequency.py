@@ -7,10 +7,11 @@ import pandas as pd
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 from queries.realease_frequency_query import release_frequency_query as rfq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 
@@ -113,14 +114,11 @@ def toggle_popover(n, is_open):
     background=True,
 )
 
+@cached_figure(f"{PAGE}-{VIZ_ID}", [rfq])
 def rfq_graph(repolist,interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=rfq, repos=repolist)
-
-    while df is None:
-            time.sleep(1.0)
-            df = cache.grabm(func=rfq, repos=repolist)
+    df = cache.wait_for(func=rfq, repos=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -144,17 +142,7 @@ def process_data(df: pd.DataFrame, interval):
 
     df["r_date"] = pd.to_datetime(df["r_date"], utc=True)
 
-    period_slice = None
-    if interval == "W":
-        period_slice = 10
-
-    df_released = (
-        df.groupby(by=df.r_date.dt.to_period(interval))["r_id"]
-        .nunique()
-        .reset_index()
-    )
-
-    df_released["r_date"] = pd.to_datetime(df_released["r_date"].astype(str).str[:period_slice])
+    df_released = aggregate_by_interval(df, "r_date", interval, date_name="r_date", r_id=("r_id", "nunique"))
 
     return df_released
 
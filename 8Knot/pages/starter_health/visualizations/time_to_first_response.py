@@ -7,10 +7,11 @@ import pandas as pd
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
-from pages.utils.graph_utils import get_graph_time_values, color_seq
+from pages.utils.graph_utils import get_graph_time_values, color_seq, aggregate_by_interval
 from queries.response_time_query import response_time_query as rtq
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
@@ -133,13 +134,11 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", [rtq])
 def time_to_first_response_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=rtq, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=rtq, repos=repolist)
+    df = cache.wait_for(func=rtq, repos=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -164,23 +163,8 @@ def process_data(df: pd.DataFrame, interval):
     # incoming value should be a posix integer.
     df["created"] = pd.to_datetime(df["created"], utc=True) #created in this case is actually closed, naming was kept as "created" due to how the query is structured
 
-    # variable to slice on to handle weekly period edge case
-    period_slice = None
-    if interval == "W":
-        # this is to slice the extra period information that comes with the weekly case
-        period_slice = 10
-
-    # get the average for response time in hours in the desired interval in pandas period format, sort index to order entries
-    df_created = (
-        df.groupby(by=df.created.dt.to_period(interval))["response_time"]
-        .mean()
-        .reset_index()
-        .rename(columns={"created": "Date"})
-    )
-
-    # converts date column to a datetime object, converts to string first to handle period information
-    # the period slice is to handle weekly corner case
-    df_created["Date"] = pd.to_datetime(df_created["Date"].astype(str).str[:period_slice])
+    # get the average for response time in hours in the desired interval, "Date" holds the start of each bin
+    df_created = aggregate_by_interval(df, "created", interval, response_time=("response_time", "mean"))
 
     return df_created
 
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import numpy as np
+import pandas as pd
+import redis
+from cache_manager.redis_pools import cache_client
+
+# partial_ratio at or above which two company names are the same company
+MATCH_THRESHOLD = 70
+
+# names scored against all others per batch, bounds the score matrix held at once
+BLOCK_ROWS = 1024
+
+# seconds the clustering of a set of names stays cached
+CLUSTERS_EXPIRE = 86400
+
+
+def get_company_clusters(names):
+    """
+    Clusters the free-text company names contributors put in their
+    profiles, so that spellings of the same company are counted together.
+
+    Two names belong together if their fuzzy partial ratio is at least
+    MATCH_THRESHOLD, and clusters are closed under that relation. Every
+    pair of names is scored, in batches of the score matrix computed by
+    rapidfuzz in C++ rather than one Python call per pair.
+
+    The clustering only depends on the set of names, so it's cached in
+    Redis keyed by that set and repeat renders skip the matching.
+
+    Args:
+    -----
+        names (pd.Series): company names, may contain duplicates
+
+    Returns:
+    --------
+        pd.Series: cluster number of each name, aligned with 'names'
+    """
+    unique_names = sorted(set(names))
+
+    key = "company_clusters:" + hashlib.md5("\n".join(unique_names).encode("utf-8")).hexdigest()
+    labels = _get_cached_labels(key)
+
+    if labels is None or len(labels) != len(unique_names):
+        labels = _cluster_names(unique_names)
+        _set_cached_labels(key, labels)
+
+    mapping = dict(zip(unique_names, labels))
+    return names.map(mapping)
+
+
+def _cluster_names(names):
+    """
+    (private)
+    Clusters names by scoring every pair and joining the
+    matches into connected components.
+
+    Args:
+    -----
+        names ([str]): unique names
+
+    Returns:
+    --------
+        [int]: cluster number of each name
+    """
+    n = len(names)
+    if n == 0:
+        return []
+
+    # imported on first use, only the company affiliation graph clusters names.
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    pairs = _matched_pairs(names)
+
+    # union of all matched pairs, transitively
+    graph = sparse.coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+
+    return labels.tolist()
+
+
+def _matched_pairs(names):
+    """
+    (private)
+    Pairs of names (i < j) whose partial ratio is at least MATCH_THRESHOLD.
+
+    Each block of BLOCK_ROWS names is scored against itself and the names
+    after it with one call to rapidfuzz's cdist. Scores below the threshold
+    are cut off early inside the scorer.
+
+    Args:
+    -----
+        names ([str]): unique names
+
+    Returns:
+    --------
+        np.array: (pairs x 2) indices of matched pairs
+    """
+    from rapidfuzz import fuzz, process
+
+    pairs = [np.empty((0, 2), dtype=np.int64)]
+    for start in range(0, len(names), BLOCK_ROWS):
+        block = names[start : start + BLOCK_ROWS]
+
+        scores = process.cdist(
+            block, names[start:], scorer=fuzz.partial_ratio, score_cutoff=MATCH_THRESHOLD, workers=-1
+        )
+
+        # only the pairs above the diagonal, each pair is scored once.
+        rows, cols = np.nonzero(np.triu(scores >= MATCH_THRESHOLD, k=1))
+        pairs.append(np.column_stack((rows + start, cols + start)))
+
+    return np.concatenate(pairs).astype(np.int64)
+
+
+def _get_cached_labels(key):
+    """
+    (private)
+    Cached clustering at 'key', None if it isn't cached or Redis is unavailable.
+    """
+    try:
+        labels = cache_client().get(key)
+    except redis.exceptions.ConnectionError:
+        logging.warning("COMPANY_CLUSTERS: Could not connect to cache.")
+        return None
+
+    return json.loads(labels) if labels is not None else None
+
+
+def _set_cached_labels(key, labels):
+    """
+    (private)
+    Caches a clustering at 'key' for CLUSTERS_EXPIRE seconds.
+    """
+    try:
+        cache_client().set(key, json.dumps(labels), ex=CLUSTERS_EXPIRE)
+    except redis.exceptions.ConnectionError:
+        logging.warning("COMPANY_CLUSTERS: Could not connect to cache.")
+
+
+def get_contributor_actions(df, df_identities):
+    """
+    Joins contributor actions with the contributors' identities.
+
+    Actions are counted per contributor before the join, so only the
+    distinct contributors are joined rather than every action.
+    Contributors without an identity (e.g. no known emails) are left out.
+
+    Args:
+    -----
+        df (pd.DataFrame): actions with a "cntrb_id" column, from company_query
+        df_identities (pd.DataFrame): identities with a "cntrb_id" column,
+            from contributor_identity_query. Contributors to many repos
+            have a row for each.
+
+    Returns:
+    --------
+        pd.DataFrame: one row per contributor with the identity
+            columns and the number of "actions" in 'df'
+    """
+    actions = df["cntrb_id"].value_counts().rename("actions")
+
+    df_identities = df_identities.drop_duplicates(subset="cntrb_id").set_index("cntrb_id")
+
+    return df_identities.join(actions, how="inner").rename_axis("cntrb_id").reset_index()
+
+
+def count_email_domains(email_domains, weights=None):
+    """
+    Counts how often each email domain occurs in lists of domains,
+    once per row (or its weight) for every email of the list it belongs to.
+
+    Rows share few distinct lists (one per contributor), so the rows
+    are counted per list and only the distinct lists are split into domains.
+
+    Args:
+    -----
+        email_domains (pd.Series): ' , '-joined domains per row, empty for emails without one
+        weights (pd.Series | None): times each row counts, aligned with 'email_domains'. 1 if None.
+
+    Returns:
+    --------
+        pd.Series: occurrences per domain
+    """
+    if weights is None:
+        counts = email_domains.value_counts()
+    else:
+        counts = weights.groupby(email_domains, observed=True).sum()
+    counts = counts[counts > 0]
+
+    lists = pd.DataFrame({"domains": counts.index.astype(str).str.split(" , "), "count": counts.to_numpy()})
+    lists = lists.explode("domains")
+    lists = lists[lists["domains"] != ""]
+
+    return lists.groupby("domains")["count"].sum()
@@ -0,0 +1,137 @@
+"""
+    Figure-level cache of visualization callbacks, shared by all users.
+
+    The same visualization of the same repos with the same controls was
+    rebuilt from the cached data by every user that opened it. Instead, the
+    callback's output is serialized to JSON and stored in Redis, keyed by
+    the visualization, its normalized inputs, and the generations of the
+    data it's built from, so repeat views are served with one lookup until
+    the data changes.
+
+    Keys also hold a hash of the source of the visualization's module, so
+    a deploy that changes how it's drawn doesn't serve the old rendering.
+    Changes elsewhere (e.g. pages/utils, styling) are covered by setting
+    FIGURE_CACHE_VERSION to the release being deployed.
+
+    Configured by the environment:
+        FIGURE_CACHE_EXPIRE: seconds a figure is kept (default 86400)
+        FIGURE_CACHE_VERSION: release of the app, part of every key (default "")
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import dash
+import redis
+from plotly.utils import PlotlyJSONEncoder
+from cache_manager.cache_manager import CacheManager as cm
+
+FIGURE_CACHE_EXPIRE = int(os.getenv("FIGURE_CACHE_EXPIRE", "86400"))
+FIGURE_CACHE_VERSION = os.getenv("FIGURE_CACHE_VERSION", "")
+
+
+def cached_figure(name, funcs):
+    """
+    Decorates a visualization callback whose first argument is the
+    list of repos, so that its output is cached across users and sessions.
+
+    Repos are normalized to their sorted distinct ids, so that the order
+    they were picked in doesn't matter. Outputs are only cached once all
+    data is in the cache, and not if they include dash.no_update.
+
+    Goes below @callback, e.g.
+
+        @callback(...)
+        @cached_figure(f"{PAGE}-{VIZ_ID}", [ctq])
+        def graph(repolist, interval):
+
+    Args:
+    -----
+        name (str): visualization the callback outputs, e.g. f"{PAGE}-{VIZ_ID}"
+        funcs ([celery.Task]): queries whose data the output is built from
+
+    Returns:
+    --------
+        function: decorator of the callback
+    """
+
+    def decorator(fn):
+        # figures drawn by other code are never looked up.
+        versioned = f"{name}:{_get_code_version(fn)}"
+
+        @functools.wraps(fn)
+        def wrapper(repolist, *args):
+            if not repolist:
+                return fn(repolist, *args)
+
+            cache = cm()
+            repos = sorted(set(repolist))
+
+            key, figure = _get_figure(cache, versioned, funcs, repos, args)
+            if figure is not None:
+                logging.warning(f"{name} - FIGURE CACHE HIT")
+                return json.loads(figure)
+
+            out = fn(repolist, *args)
+
+            # without a key, some data wasn't in the cache before the callback ran.
+            if key is not None and not _has_no_update(out):
+                _set_figure(cache, name, key, out)
+
+            return out
+
+        return wrapper
+
+    return decorator
+
+
+def _get_code_version(fn):
+    """
+    (private)
+    Hash of the source of the module a callback is defined in,
+    along with FIGURE_CACHE_VERSION.
+    """
+    try:
+        source = inspect.getsource(inspect.getmodule(fn))
+    except (OSError, TypeError):
+        # e.g. running from bytecode only, the release has to tell versions apart.
+        source = ""
+
+    return hashlib.md5(f"{FIGURE_CACHE_VERSION}:{source}".encode("utf-8")).hexdigest()[:12]
+
+
+def _get_figure(cache, name, funcs, repos, args):
+    """
+    (private)
+    Key and stored output of a callback, (None, None) if
+    there's no key yet or Redis is unavailable.
+    """
+    inputs = json.dumps([repos, list(args)], sort_keys=True, default=str)
+
+    try:
+        return cache.get_figure(name=name, funcs=funcs, repos=repos, inputs=inputs)
+    except redis.exceptions.ConnectionError:
+        logging.warning(f"{name} - FIGURE CACHE: Could not connect to cache.")
+        return None, None
+
+
+def _set_figure(cache, name, key, out):
+    """
+    (private)
+    Stores the serialized output of a callback at 'key'.
+    """
+    try:
+        cache.set_figure(key=key, figure=json.dumps(out, cls=PlotlyJSONEncoder), expire=FIGURE_CACHE_EXPIRE)
+    except redis.exceptions.ConnectionError:
+        logging.warning(f"{name} - FIGURE CACHE: Could not connect to cache.")
+
+
+def _has_no_update(out):
+    """
+    (private)
+    Whether a callback's output, or any of its outputs, is dash.no_update.
+    """
+    outs = out if isinstance(out, (tuple, list)) else [out]
+    return any(o is dash.no_update for o in outs)
@@ -1,4 +1,6 @@
 import datetime as dt
+import numpy as np
+import pandas as pd
 
 # list of graph color hex
 color_seq = [
@@ -65,3 +67,163 @@ def get_graph_time_values(interval):
         period = "M12"
 
     return x_r, x_name, hover, period
+
+
+def get_bin_codes(dates, interval):
+    """
+    Integer time-bin code of each date, computed on the
+    datetime64 values with NumPy rather than through pandas Periods.
+
+    Bins are days ("D"), weeks starting on Monday ("W"), months ("M"),
+    or years ("Y"), the same bins as Series.dt.to_period(interval).
+    Timezone-aware dates are binned by their wall time, like to_period.
+
+    Args:
+    -----
+        dates (pd.Series | pd.DatetimeIndex): dates to bin, without NaT
+        interval (str): "D", "W", "M", or "Y"
+
+    Returns:
+    --------
+        np.array[int]: bin code per date. Codes are consecutive
+            integers for consecutive bins, get_bin_starts inverts them.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+
+    values = dates.to_numpy()
+
+    if interval == "D":
+        return values.astype("datetime64[D]").astype(np.int64)
+    if interval == "W":
+        # 1970-01-01 was a Thursday, shifted so weeks start on Monday.
+        return (values.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    if interval == "M":
+        return values.astype("datetime64[M]").astype(np.int64)
+    if interval == "Y":
+        return values.astype("datetime64[Y]").astype(np.int64)
+
+    raise ValueError(f"Unsupported time-bin interval: {interval}")
+
+
+def get_bin_starts(codes, interval):
+    """
+    First day of each time bin, the inverse of get_bin_codes.
+
+    Args:
+    -----
+        codes (np.array[int]): bin codes from get_bin_codes
+        interval (str): "D", "W", "M", or "Y"
+
+    Returns:
+    --------
+        pd.DatetimeIndex: start of each bin
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+
+    if interval == "D":
+        starts = codes.astype("datetime64[D]")
+    elif interval == "W":
+        starts = (codes * 7 - 3).astype("datetime64[D]")
+    elif interval == "M":
+        starts = codes.astype("datetime64[M]")
+    elif interval == "Y":
+        starts = codes.astype("datetime64[Y]")
+    else:
+        raise ValueError(f"Unsupported time-bin interval: {interval}")
+
+    return pd.DatetimeIndex(starts.astype("datetime64[ns]"))
+
+
+def aggregate_by_interval(df, date_col, interval, date_name="Date", **measures):
+    """
+    Aggregates many measures of 'df' per time bin of 'date_col' in one pass,
+    in place of one groupby over dt.to_period(interval) per measure and
+    the string round trip that turns the periods back into dates.
+
+    Measures are named like pandas named aggregation, e.g.
+    aggregate_by_interval(df, "created", "M", added=("added", "sum")).
+    Supported functions are "size", "count", "sum", "mean", and "nunique",
+    each with the missing-value handling of its groupby counterpart.
+
+    Only bins with at least one row are returned, like a groupby, and
+    rows without a date are left out.
+
+    Args:
+    -----
+        df (pd.DataFrame): data to aggregate
+        date_col (str): datetime column to bin on
+        interval (str): "D", "W", "M", or "Y"
+        date_name (str): name of the returned column of bin starts
+        measures ((str, str)): (column, function) per returned measure
+
+    Returns:
+    --------
+        pd.DataFrame: bin start and measures per bin, ordered by bin
+    """
+    dates = df[date_col]
+    valid = dates.notna().to_numpy()
+
+    codes = get_bin_codes(dates[valid], interval)
+
+    # dense bin index from the first to the last bin, empty bins are dropped at the end.
+    first = codes.min() if len(codes) else 0
+    bins = codes - first
+    n_bins = bins.max() + 1 if len(bins) else 0
+
+    size = np.bincount(bins, minlength=n_bins)
+    observed = np.flatnonzero(size)
+
+    out = pd.DataFrame({date_name: get_bin_starts(observed + first, interval)})
+
+    for name, (col, how) in measures.items():
+        out[name] = _aggregate_bins(df[col][valid], bins, n_bins, how)[observed]
+
+    return out
+
+
+def _aggregate_bins(values, bins, n_bins, how):
+    """
+    (private)
+    Aggregates 'values' per bin with np.bincount.
+
+    Args:
+    -----
+        values (pd.Series): values per row
+        bins (np.array[int]): bin of each row, in 0..n_bins-1
+        n_bins (int): number of bins
+        how (str): "size", "count", "sum", "mean", or "nunique"
+
+    Returns:
+    --------
+        np.array: aggregate per bin
+    """
+    if how == "size":
+        return np.bincount(bins, minlength=n_bins)
+
+    present = values.notna().to_numpy()
+
+    if how == "count":
+        return np.bincount(bins[present], minlength=n_bins)
+
+    if how == "nunique":
+        # each distinct (bin, value) pair once, missing values have code -1.
+        codes, uniques = pd.factorize(values)
+        pairs = pd.unique(bins[present] * len(uniques) + codes[present])
+        return np.bincount(pairs // max(len(uniques), 1), minlength=n_bins)
+
+    present_values = values[present].to_numpy()
+    sums = np.bincount(bins[present], weights=present_values.astype(np.float64), minlength=n_bins)
+
+    if how == "sum":
+        # integer columns keep integer sums.
+        if np.issubdtype(present_values.dtype, np.integer):
+            return np.rint(sums).astype(present_values.dtype)
+        return sums
+    if how == "mean":
+        counts = np.bincount(bins[present], minlength=n_bins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
+
+    raise ValueError(f"Unsupported aggregation: {how}")
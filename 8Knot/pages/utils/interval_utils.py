@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+
+def count_runs(starts, ends, n, weights=None):
+    """
+    Counts how many half-open runs [start, end) of
+    positions cover each of the positions 0..n-1.
+
+    Every run adds one (or its weight) at its start and removes it at
+    its end, so the counts for all positions are a cumulative sum over
+    those changes instead of a filter per position.
+
+    Args:
+    -----
+        starts (np.array[int]): first position of each run
+        ends (np.array[int]): position after the last one of each run, at most n
+        n (int): number of positions
+        weights (np.array[int] | None): signed weight of each run, 1 if None
+
+    Returns:
+    --------
+        np.array[int]: (weighted) number of runs covering each position
+    """
+    return count_runs_by_group(np.zeros(len(starts), dtype=int), starts, ends, 1, n, weights)[0]
+
+
+def count_runs_by_group(groups, starts, ends, n_groups, n, weights=None):
+    """
+    count_runs for many groups of runs at once, e.g. one group per contributor.
+
+    Args:
+    -----
+        groups (np.array[int]): group of each run, in 0..n_groups-1
+        starts (np.array[int]): first position of each run
+        ends (np.array[int]): position after the last one of each run, at most n
+        n_groups (int): number of groups
+        n (int): number of positions
+        weights (np.array[int] | None): signed weight of each run, 1 if None
+
+    Returns:
+    --------
+        np.array[int]: (n_groups x n) number of runs of each group covering each position
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    groups = np.asarray(groups, dtype=np.int64)
+    weights = np.ones(len(starts), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+
+    keep = starts < ends
+    groups, starts, ends, weights = groups[keep], starts[keep], ends[keep], weights[keep]
+
+    # +weight where a run starts, -weight where it ends, for all groups in one array.
+    size = n_groups * (n + 1)
+    deltas = np.bincount(groups * (n + 1) + starts, weights=weights, minlength=size)
+    deltas -= np.bincount(groups * (n + 1) + ends, weights=weights, minlength=size)
+
+    deltas = np.rint(deltas).astype(np.int64).reshape(n_groups, n + 1)[:, :n]
+    return np.cumsum(deltas, axis=1)
+
+
+def get_open_counts(created, closed, bin_starts, bin_ends):
+    """
+    Counts the items (e.g. PRs, issues) open during each time bin:
+    created by the end of the bin and not closed before its start.
+
+    Args:
+    -----
+        created (pd.Series): creation datetimes
+        closed (pd.Series): closing datetimes, NaT if still open
+        bin_starts (pd.Series): ascending start of each bin
+        bin_ends (pd.Series): ascending end of each bin
+
+    Returns:
+    --------
+        np.array[int]: number of open items per bin
+    """
+    bin_starts, bin_ends = pd.DatetimeIndex(bin_starts), pd.DatetimeIndex(bin_ends)
+
+    # items without a creation date are never open.
+    valid = created.notna().to_numpy()
+
+    starts = bin_ends.searchsorted(pd.DatetimeIndex(created[valid]), side="left")
+    ends = _open_until(closed[valid], bin_starts)
+
+    return count_runs(starts, ends, len(bin_starts))
+
+
+def get_assigned_counts(df, bin_starts, bin_ends, by=None):
+    """
+    Counts the assignments standing on open items in each time bin.
+
+    Every "assigned" event adds one and every "unassigned" event removes
+    one, from the first bin that ends after both the event and the item's
+    creation, up to the bin that starts after the item is closed. The
+    signed runs are summed for all bins (and all values of 'by') at once.
+
+    Args:
+    -----
+        df (pd.DataFrame): assignment events with "created", "closed",
+            "assign_date", and "assignment_action" columns
+        bin_starts (pd.Series): ascending start of each bin
+        bin_ends (pd.Series): ascending end of each bin
+        by (str | None): column to count separately for, e.g. "assignee"
+
+    Returns:
+    --------
+        np.array[int] | pd.DataFrame: assignments per bin, or
+            (bins x values of 'by') assignments if 'by' is given.
+    """
+    bin_starts, bin_ends = pd.DatetimeIndex(bin_starts), pd.DatetimeIndex(bin_ends)
+    n = len(bin_starts)
+
+    events = df[df["assignment_action"].isin(["assigned", "unassigned"])]
+    events = events[events["created"].notna() & events["assign_date"].notna()]
+    if by is not None:
+        events = events[events[by].notna()]
+
+    signs = np.where(events["assignment_action"] == "assigned", 1, -1)
+
+    # counted once both the item and the event exist.
+    counted_from = pd.DatetimeIndex(events[["created", "assign_date"]].max(axis=1))
+    starts = bin_ends.searchsorted(counted_from, side="left")
+    ends = _open_until(events["closed"], bin_starts)
+
+    if by is None:
+        return count_runs(starts, ends, n, weights=signs)
+
+    codes, values = pd.factorize(events[by])
+    counts = count_runs_by_group(codes, starts, ends, len(values), n, weights=signs)
+
+    return pd.DataFrame(counts.T, columns=values)
+
+
+def _open_until(closed, bin_starts):
+    """
+    (private)
+    Index of the first bin that starts at or after each item was
+    closed, i.e. the end of the run of bins the item is open in.
+    Items that weren't closed stay open through the last bin.
+    """
+    closed = pd.DatetimeIndex(closed)
+    return np.where(closed.isna(), len(bin_starts), bin_starts.searchsorted(closed, side="left"))
+
+
+def get_open_counts_by_age(created, closed, dates, staling_days, stale_days):
+    """
+    Counts the items (e.g. PRs, issues) open at every date,
+    split by how long they had been open at that date.
+
+    At a date, an item is open if it was created at or before it and
+    not closed yet. It's new if it was created at most 'staling_days'
+    before the date, staling if it's older but less than 'stale_days'
+    old, and stale otherwise.
+
+    Each item is turned into the runs of dates it counts as open, new,
+    and not stale for, found with searchsorted on the dates, and the
+    runs are counted for all dates at once with count_runs.
+
+    Args:
+    -----
+        created (pd.Series): creation datetimes
+        closed (pd.Series): closing datetimes, NaT if still open
+        dates (pd.DatetimeIndex): ascending dates to count at
+        staling_days (int): days open before an item is staling
+        stale_days (int): days open before an item is stale
+
+    Returns:
+    --------
+        (np.array, np.array, np.array): number of new, staling, and stale items per date
+    """
+    n = len(dates)
+
+    # items without a creation date are never open.
+    valid = created.notna().to_numpy()
+    created = pd.DatetimeIndex(created[valid])
+    closed = pd.DatetimeIndex(closed[valid])
+
+    # thresholds per date, ascending like the dates themselves.
+    staling_at = dates - pd.Timedelta(days=staling_days)
+    stale_at = dates - pd.Timedelta(days=stale_days)
+
+    # open from the first date at or after creation
+    # until the first date at or after closing.
+    starts = dates.searchsorted(created, side="left")
+    ends = _open_until(closed, dates)
+
+    # new while created >= staling threshold, not stale while
+    # new or created > stale threshold.
+    new_ends = staling_at.searchsorted(created, side="right")
+    fresh_ends = np.maximum(new_ends, stale_at.searchsorted(created, side="left"))
+
+    num_total = count_runs(starts, ends, n)
+    num_new = count_runs(starts, np.minimum(ends, new_ends), n)
+    num_fresh = count_runs(starts, np.minimum(ends, fresh_ends), n)
+
+    return num_new, num_fresh - num_new, num_total - num_fresh
@@ -11,6 +11,7 @@ from pages.utils.graph_utils import get_graph_time_values, color_seq
 from queries.QUERY_NAME import QUERY_NAME as QUERY_INITIALS
 import io
 from cache_manager.cache_manager import CacheManager as cm
+from pages.utils.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 
@@ -186,13 +187,12 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+# caches the figure across users, list every query the figure is built from
+@cached_figure(f"{PAGE}-{VIZ_ID}", [QUERY_INITIALS])
 def NAME_OF_VISUALIZATION_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
     cache = cm()
-    df = cache.grabm(func=QUERY_INITIALS, repos=repolist)
-    while df is None:
-        time.sleep(1.0)
-        df = cache.grabm(func=QUERY_INITIALS, repos=repolist)
+    df = cache.wait_for(func=QUERY_INITIALS, repos=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
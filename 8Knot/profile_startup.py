@@ -0,0 +1,151 @@
+"""
+    Reports where the startup time of a process goes, from the output
+    of 'python -X importtime'.
+
+    Imports a module in a fresh interpreter with -X importtime (or reads
+    output saved from one), then prints the total import time, the
+    packages that took longest, and the slowest single imports.
+
+    With --forbid, exits with status 1 if any of the listed packages was
+    imported, e.g. to check that the query workers' entry point (_celery)
+    doesn't pull in Dash or the pages.
+
+    Importing 'app' runs its startup (database connection, repo catalog),
+    so it needs the same AUGUR_* environment variables as the app.
+
+    Usage (from the 8Knot directory):
+        python -m profile_startup --module app --top 25
+        python -m profile_startup --module _celery --forbid dash,plotly,scipy,pages
+        python -X importtime -c "import app" 2> importtime.log
+        python -m profile_startup --log importtime.log
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# one line of -X importtime output, e.g.
+# "import time:       421 |        485 |   codecs"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+def parse_importtime(lines):
+    """
+    Imports listed in -X importtime output. Other lines are skipped.
+
+    Args:
+    -----
+        lines ([str]): output lines
+
+    Returns:
+    --------
+        [(str, int, int, int)]: module, self and cumulative microseconds,
+            and nesting depth (0 for imports by the imported module itself)
+    """
+    imports = []
+    for line in lines:
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+
+        self_us, cumulative_us, indent, module = match.groups()
+        imports.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+
+    return imports
+
+
+def get_package_times(imports):
+    """
+    Self time of the imports, summed per top-level package.
+
+    Args:
+    -----
+        imports ([(str, int, int, int)]): imports from parse_importtime
+
+    Returns:
+    --------
+        dict(str, int): microseconds per package, slowest first
+    """
+    packages = defaultdict(int)
+    for module, self_us, _, _ in imports:
+        packages[module.split(".")[0]] += self_us
+
+    return dict(sorted(packages.items(), key=lambda p: p[1], reverse=True))
+
+
+def run_importtime(module):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    Args:
+    -----
+        module (str): module to import, e.g. "app"
+
+    Returns:
+    --------
+        [str]: stderr lines of the interpreter
+        int: exit status of the interpreter
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    lines = proc.stderr.splitlines()
+    if proc.returncode != 0:
+        # the imports up to the failure are still reported.
+        errors = [line for line in lines if not line.startswith("import time:")]
+        print(f"warning: importing {module} failed (status {proc.returncode})", file=sys.stderr)
+        print("\n".join(errors[-10:]), file=sys.stderr)
+
+    return lines, proc.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report startup import times from python -X importtime.")
+    parser.add_argument("--module", default="app", help="module to import and profile")
+    parser.add_argument("--log", help="read saved -X importtime output instead ('-' for stdin)")
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    parser.add_argument("--forbid", default="", help="comma-separated packages that must not be imported")
+    args = parser.parse_args()
+
+    status = 0
+    if args.log == "-":
+        lines = sys.stdin.read().splitlines()
+    elif args.log:
+        with open(args.log) as f:
+            lines = f.read().splitlines()
+    else:
+        lines, status = run_importtime(args.module)
+
+    imports = parse_importtime(lines)
+    if not imports:
+        parser.error("no -X importtime output found")
+
+    total_us = sum(cumulative_us for _, _, cumulative_us, depth in imports if depth == 0)
+    print(f"modules imported: {len(imports)}")
+    print(f"total import time: {total_us / 1e6:.3f}s")
+
+    print("\nslowest packages (self time):")
+    for package, us in list(get_package_times(imports).items())[: args.top]:
+        print(f"  {us / 1e3:10.1f}ms  {us / total_us:6.1%}  {package}")
+
+    print("\nslowest imports (cumulative time):")
+    for module, _, cumulative_us, _ in sorted(imports, key=lambda i: i[2], reverse=True)[: args.top]:
+        print(f"  {cumulative_us / 1e3:10.1f}ms  {module}")
+
+    forbidden = {p for p in args.forbid.split(",") if p}
+    imported = forbidden & {module.split(".")[0] for module, _, _, _ in imports}
+    if imported:
+        print(f"\nforbidden packages imported: {', '.join(sorted(imported))}")
+        sys.exit(1)
+
+    # an import that failed part way wasn't fully profiled.
+    sys.exit(1 if status else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import logging
 import pandas as pd
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.partition import partition_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -94,24 +94,9 @@ def contributors_query(self, repos):
 
     df = df.reset_index(drop=True)
 
-    pic = []
-
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+    # break apart returned data per repo and
+    # temporarily store in List to be stored in Redis.
+    pic = partition_by_repo(df, repos)
 
     del df
 
@@ -1,9 +1,9 @@
 import logging
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 import pandas as pd
 from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.partition import RepoStreamWriter
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -12,6 +12,15 @@ import os
 
 QUERY_NAME = "COMMITS"
 
+# columns of the cached data, after process_data.
+COLUMNS = ["commits", "author_email", "date", "author_timestamp", "committer_timestamp", "email_domain"]
+
+# cached per repo up to the max of this column, refreshes pull only newer rows.
+WATERMARK = "author_timestamp"
+
+# part of an email after its last '@'.
+EMAIL_DOMAIN = r"@([^@]*)$"
+
 
 @celery_app.task(
     bind=True,
@@ -20,7 +29,7 @@ QUERY_NAME = "COMMITS"
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
 )
-def commits_query(self, repos):
+def commits_query(self, repos, refresh=False):
     """
     (Worker Query)
     Executes SQL query against Augur database for commit data.
@@ -28,6 +37,7 @@ def commits_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): only pull rows newer than the cached watermarks.
 
     Returns:
     --------
@@ -38,6 +48,13 @@ def commits_query(self, repos):
     if len(repos) == 0:
         return None
 
+    cm_o = cm()
+
+    # when refreshing, only rows from the oldest cached watermark on are pulled.
+    since = cm_o.refresh_since(commits_query, repos) if refresh else None
+    since_filter = "AND c.cmt_author_timestamp >= :since" if since else ""
+    params = {"since": f"{since} 00:00:00+00"} if since else None
+
     # commenting-outunused query components. only need the repo_id and the
     # authorship date for our current queries. remove the '--' to re-add
     # the now-removed values.
@@ -61,6 +78,9 @@ def commits_query(self, repos):
                         ON r.repo_id = c.repo_id
                     WHERE
                         c.repo_id in ({str(repos)[1:-1]})
+                        {since_filter}
+                    ORDER BY
+                        r.repo_id
                     """
 
     try:
@@ -75,45 +95,49 @@ def commits_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
-
-    # change to compatible type and remove all data that has been incorrectly formated
-    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True).dt.date
-    df = df[df.author_timestamp < dt.date.today()]
+    # results are streamed ordered by repo, so each repo's blob is
+    # stored in Redis as soon as its last row has arrived.
+    # once we've stored the data by ID we no longer need the column.
+    # few distinct domains over many commits, so they're stored dictionary-encoded.
+    writer = RepoStreamWriter(
+        cm_o,
+        commits_query,
+        repos,
+        drop_id=True,
+        watermark=WATERMARK,
+        since=since,
+        categories=["email_domain"],
+        columns=COLUMNS,
+    )
 
-    # break apart returned data per repo
-    # and temporarily store in List to be
-    # stored in Redis.
-    pic = []
-    for r in repos:
-        # convert series to a dataframe
-        # once we've stored the data by ID we no longer need the column.
-        c_df = pd.DataFrame(df.loc[df["id"] == r].drop(columns=["id"])).reset_index(drop=True)
+    for batch in dbm.run_query_batches(query_string, params=params):
+        writer.write(process_data(batch.to_pandas()))
 
-        # bytes buffer to be written to
-        b = io.BytesIO()
+    # 'ack' is a boolean of whether data was set correctly or not.
+    ack = writer.close()
 
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
+    return ack
 
-        # move head of buffer to the beginning
-        b.seek(0)
 
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+def process_data(df: pd.DataFrame):
+    """
+    Cleans up one batch of the query result.
+    Only row-wise operations, so batches can be processed independently.
 
-    del df
+    Args:
+    -----
+        df (pd.DataFrame): batch of results from SQL query.
 
-    # store results in Redis
-    cm_o = cm()
+    Returns:
+    --------
+        pd.DataFrame: cleaned batch
+    """
+    # change to compatible type and remove all data that has been incorrectly formated
+    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True).dt.date
+    df = df[df.author_timestamp < dt.date.today()]
 
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=commits_query,
-        repos=repos,
-        datas=pic,
-    )
+    # domain after the last '@' of each author email, missing if it isn't an email.
+    df["email_domain"] = df["author_email"].str.extract(EMAIL_DOMAIN, expand=False)
 
-    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
-    return ack
+    return df
@@ -1,14 +1,17 @@
 import logging
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 import pandas as pd
 from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.partition import partition_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "COMPANY"
 
+# cached per repo up to the max of this column, refreshes pull only newer rows.
+WATERMARK = "created"
+
 
 @celery_app.task(
     bind=True,
@@ -17,11 +20,15 @@ QUERY_NAME = "COMPANY"
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
 )
-def company_query(self, repos):
+def company_query(self, repos, refresh=False):
     """
     (Worker Query)
     Executes SQL query against Augur database for company affiliation data.
 
+    One row per contributor action. The contributors' companies and
+    emails are stored once per contributor by contributor_identity_query
+    and joined with the actions in the affiliation visualizations.
+
     Explorer_contributor_actions is a materialized view on the database for quicker run time and
     may not be in your augur database. The SQL query content can be found
     in docs/explorer_contributor_actions.sql
@@ -29,6 +36,7 @@ def company_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): only pull rows newer than the cached watermarks.
 
     Returns:
     --------
@@ -40,25 +48,25 @@ def company_query(self, repos):
     if len(repos) == 0:
         return None
 
+    cm_o = cm()
+
+    # when refreshing, only rows from the oldest cached watermark on are pulled.
+    since = cm_o.refresh_since(company_query, repos) if refresh else None
+    since_filter = "AND c.created_at >= :since" if since else ""
+    params = {"since": f"{since} 00:00:00+00"} if since else None
+
     query_string = f"""
                     SELECT
                         c.cntrb_id,
                         c.created_at AS created,
                         c.repo_id AS id,
-                        c.login,
                         c.action,
-                        c.rank,
-                        con.cntrb_company,
-                        string_agg(ca.alias_email, ' , ' order by ca.alias_email) as email_list
+                        c.rank
                     FROM
                         explorer_contributor_actions c
-                    JOIN contributors_aliases ca
-                        ON c.cntrb_id = ca.cntrb_id
-                    JOIN contributors con
-                        ON c.cntrb_id = con.cntrb_id
                     WHERE
                         c.repo_id in({str(repos)[1:-1]})
-                    GROUP BY c.cntrb_id, c.created_at, c.repo_id, c.login, c.action, c.rank, con.cntrb_company
+                        {since_filter}
                     """
 
     try:
@@ -73,7 +81,9 @@ def company_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
+    # one row per contributor action, large enough
+    # that COPY's vectorized parsing pays off.
+    df = dbm.run_query_copy(query_string, params=params)
 
     df["cntrb_id"] = df["cntrb_id"].astype(str)
     df = df.sort_values(by="created")
@@ -85,39 +95,30 @@ def company_query(self, repos):
     df = df.reset_index()
     df.drop("index", axis=1, inplace=True)
 
-    # break apart returned data per repo
-    # and temporarily store in List to be
-    # stored in Redis.
-    pic = []
-    for r in repos:
-        # convert series to a dataframe
-        # once we've stored the data by ID we no longer need the column.
-        c_df = pd.DataFrame(df.loc[df["id"] == r].drop(columns=["id"])).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+    # break apart returned data per repo and temporarily store in List to be
+    # stored in Redis. once we've stored the data by ID we no longer need the column.
+    # few distinct actions over many rows, so they're stored dictionary-encoded.
+    pic = partition_by_repo(df, repos, drop_id=True, categories=["action"])
 
     del df
 
-    # store results in Redis
-    cm_o = cm()
-
     # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=company_query,
-        repos=repos,
-        datas=pic,
-    )
+    if since is not None:
+        # replace each repo's rows from 'since' on with the newly pulled ones.
+        ack = cm_o.mergem(
+            func=company_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+            since=since,
+        )
+    else:
+        ack = cm_o.setm(
+            func=company_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+        )
 
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
     return ack
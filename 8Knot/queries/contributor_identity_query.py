@@ -0,0 +1,142 @@
+import logging
+import pandas as pd
+from db_manager.augur_manager import AugurManager
+from _celery import celery_app
+from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.partition import partition_by_repo
+from sqlalchemy.exc import SQLAlchemyError
+
+QUERY_NAME = "CONTRIBUTOR_IDENTITY"
+
+# companies and emails change without a date to pull by, so refreshes
+# pull everything again. there's no watermark.
+WATERMARK = None
+
+# part of an email after its last '@'.
+EMAIL_DOMAIN = r"@([^@]*)$"
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    exponential_backoff=2,
+    retry_kwargs={"max_retries": 5},
+    retry_jitter=True,
+)
+def contributor_identity_query(self, repos, refresh=False):
+    """
+    (Worker Query)
+    Executes SQL query against Augur database for the identities
+    (login, company, emails) of the contributors to each repo.
+
+    One row per contributor and repo, the dimension that the
+    contributor actions of company_query are joined with.
+
+    Data is cached per (query, repo), so a contributor to many repos is
+    still stored once per repo, not once per contributor. That's one row
+    per repo in place of one per action; get_contributor_actions drops
+    the duplicates of a selection.
+
+    Explorer_contributor_actions is a materialized view on the database for quicker run time and
+    may not be in your augur database. The SQL query content can be found
+    in docs/materialized_views/explorer_contributor_actions.sql
+
+    Args:
+    -----
+        repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): unused, refreshes pull everything again.
+
+    Returns:
+    --------
+        dict: Results from SQL query, interpreted from pd.to_dict('records')
+    """
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - START")
+
+    if len(repos) == 0:
+        return None
+
+    query_string = f"""
+                    SELECT
+                        c.repo_id AS id,
+                        c.cntrb_id,
+                        con.cntrb_login AS login,
+                        con.cntrb_company,
+                        string_agg(ca.alias_email, ' , ' order by ca.alias_email) as email_list
+                    FROM
+                        (
+                            SELECT DISTINCT repo_id, cntrb_id
+                            FROM explorer_contributor_actions
+                            WHERE repo_id in({str(repos)[1:-1]})
+                        ) c
+                    JOIN contributors_aliases ca
+                        ON c.cntrb_id = ca.cntrb_id
+                    JOIN contributors con
+                        ON c.cntrb_id = con.cntrb_id
+                    GROUP BY c.repo_id, c.cntrb_id, con.cntrb_login, con.cntrb_company
+                    """
+
+    try:
+        dbm = AugurManager()
+        engine = dbm.get_engine()
+    except KeyError:
+        # noack, data wasn't successfully set.
+        logging.error(f"{QUERY_NAME}_DATA_QUERY - INCOMPLETE ENVIRONMENT")
+        return False
+    except SQLAlchemyError:
+        logging.error(f"{QUERY_NAME}_DATA_QUERY - COULDN'T CONNECT TO DB")
+        # allow retry via Celery rules.
+        raise SQLAlchemyError("DBConnect failed")
+
+    df = dbm.run_query(query_string)
+
+    df["cntrb_id"] = df["cntrb_id"].astype(str)
+    df["email_domains"] = get_email_domains(df["email_list"])
+
+    # break apart returned data per repo and temporarily store in List to be
+    # stored in Redis. once we've stored the data by ID we no longer need the column.
+    # contributors share few distinct domain lists, they're stored dictionary-encoded.
+    pic = partition_by_repo(df, repos, drop_id=True, categories=["email_domains"])
+
+    del df
+
+    # store results in Redis
+    cm_o = cm()
+
+    # 'ack' is a boolean of whether data was set correctly or not.
+    ack = cm_o.setm(
+        func=contributor_identity_query,
+        repos=repos,
+        datas=pic,
+        watermark=WATERMARK,
+    )
+
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
+    return ack
+
+
+def get_email_domains(email_list):
+    """
+    Domains of the emails in each list of emails.
+
+    Lists are ' , '-joined like 'email_list'. Each domain is the part
+    after an email's last '@', and empty if the entry isn't an email,
+    so the n-th domain in a list belongs to the n-th email.
+    Only the distinct lists are split.
+
+    Args:
+    -----
+        email_list (pd.Series): ' , '-joined emails per row
+
+    Returns:
+    --------
+        pd.Series: ' , '-joined domains per row, aligned with 'email_list'
+    """
+    lists = pd.Series(email_list.dropna().unique())
+
+    emails = lists.str.split(" , ").explode()
+    domains = emails.str.extract(EMAIL_DOMAIN, expand=False).fillna("")
+
+    # back to one ' , '-joined string per distinct list.
+    joined = domains.groupby(level=0).agg(" , ".join)
+
+    return email_list.map(dict(zip(lists, joined)))
@@ -1,14 +1,20 @@
 import logging
 import pandas as pd
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.partition import RepoStreamWriter
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "CONTRIBUTOR"
 
+# columns of the cached data, after process_data.
+COLUMNS = ["id", "repo_name", "cntrb_id", "created_at", "login", "Action", "rank"]
+
+# cached per repo up to the max of this column, refreshes pull only newer rows.
+WATERMARK = "created_at"
+
 
 @celery_app.task(
     bind=True,
@@ -17,7 +23,7 @@ QUERY_NAME = "CONTRIBUTOR"
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
 )
-def contributors_query(self, repos):
+def contributors_query(self, repos, refresh=False):
     """
     (Worker Query)
     Executes SQL query against Augur database for contributor data.
@@ -29,6 +35,7 @@ def contributors_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): only pull rows newer than the cached watermarks.
 
     Returns:
     --------
@@ -40,6 +47,13 @@ def contributors_query(self, repos):
     if len(repos) == 0:
         return None
 
+    cm_o = cm()
+
+    # when refreshing, only rows from the oldest cached watermark on are pulled.
+    since = cm_o.refresh_since(contributors_query, repos) if refresh else None
+    since_filter = "AND created_at >= :since" if since else ""
+    params = {"since": f"{since} 00:00:00+00"} if since else None
+
     query_string = f"""
                     SELECT
                         repo_id as id,
@@ -53,6 +67,9 @@ def contributors_query(self, repos):
                         augur_data.explorer_contributor_actions
                     WHERE
                         repo_id in ({str(repos)[1:-1]})
+                        {since_filter}
+                    ORDER BY
+                        repo_id
                 """
 
     try:
@@ -67,8 +84,33 @@ def contributors_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
+    # results are streamed ordered by repo, so each repo's blob is
+    # stored in Redis as soon as its last row has arrived.
+    writer = RepoStreamWriter(cm_o, contributors_query, repos, watermark=WATERMARK, since=since, columns=COLUMNS)
+
+    for batch in dbm.run_query_batches(query_string, params=params):
+        writer.write(process_data(batch.to_pandas()))
+
+    # 'ack' is a boolean of whether data was set correctly or not.
+    ack = writer.close()
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
+
+    return ack
+
+
+def process_data(df: pd.DataFrame):
+    """
+    Cleans up one batch of the query result.
+    Only row-wise operations, so batches can be processed independently.
+
+    Args:
+    -----
+        df (pd.DataFrame): batch of results from SQL query.
 
+    Returns:
+    --------
+        pd.DataFrame: cleaned batch
+    """
     # update column values
     df.loc[df["action"] == "pull_request_open", "action"] = "PR Opened"
     df.loc[df["action"] == "pull_request_comment", "action"] = "PR Comment"
@@ -92,38 +134,25 @@ def contributors_query(self, repos):
     df["created_at"] = pd.to_datetime(df["created_at"], utc=True).dt.date
     df = df[df.created_at < dt.date.today()]
 
-    df = df.reset_index(drop=True)
-
-    pic = []
+    return df.reset_index(drop=True)
 
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
 
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+def prepare_frame(df: pd.DataFrame):
+    """
+    Prepares the cached data of many repos for the visualizations:
+    dates parsed to datetimes and rows in chronological order.
 
-    del df
+    Shared by the visualizations through CacheManager.wait_for_prepared,
+    so it runs once per repo selection and process rather than per callback.
 
-    # store results in Redis
-    cm_o = cm()
+    Args:
+    -----
+        df (pd.DataFrame): aggregate data from the cache
 
-    # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=contributors_query,
-        repos=repos,
-        datas=pic,
-    )
-    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
+    Returns:
+    --------
+        pd.DataFrame: prepared data
+    """
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
 
-    return ack
\ No newline at end of file
+    return df.sort_values(by="created_at", kind="stable").reset_index(drop=True)
@@ -0,0 +1,172 @@
+import logging
+from db_manager.augur_manager import AugurManager
+from _celery import celery_app
+from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.partition import partition_by_repo
+from cache_manager.rollup import COLUMNS, bucket_sql
+from sqlalchemy.exc import SQLAlchemyError
+
+QUERY_NAME = "HOME_METRICS"
+
+# aggregates change with every new row, so refreshes pull everything
+# again. there's no watermark. cached repos are refreshed by queries/refresh.py.
+WATERMARK = None
+
+# measures that grow with time, moved forward to when they're read.
+AGING_MEASURES = ["open_pr_age", "open_issue_age", "closed_issue_age"]
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    exponential_backoff=2,
+    retry_kwargs={"max_retries": 5},
+    retry_jitter=True,
+)
+def home_metrics_query(self, repos, refresh=False):
+    """
+    (Worker Query)
+    Executes SQL query against Augur database for the rollups of the
+    home page's commit, pull request, and issue measures.
+
+    One row per (repo, measure, sketch bucket) with the count, sum, sum of
+    squares, min, and max of the measure's values in the bucket, so the
+    statistics of any set of repos are a merge of its rows (see
+    cache_manager/rollup.py). Each table is scanned once for all of its measures.
+
+    Args:
+    -----
+        repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): unused, refreshes pull everything again.
+
+    Returns:
+    --------
+        dict: Results from SQL query, interpreted from pd.to_dict('records')
+    """
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - START")
+
+    if len(repos) == 0:
+        return None
+
+    repo_ids = str(repos)[1:-1]
+
+    query_string = f"""
+                    WITH
+                    per_commit AS (
+                        /* lines and files of each commit */
+                        SELECT
+                            c.repo_id,
+                            sum(c.cmt_added) AS lines_added,
+                            sum(c.cmt_removed) AS lines_removed,
+                            count(*) AS num_files
+                        FROM augur_data.commits c
+                        WHERE c.repo_id in ({repo_ids})
+                        GROUP BY c.repo_id, c.cmt_commit_hash
+                    ),
+                    per_pr AS (
+                        /* distinct messages of each pr that has any */
+                        SELECT
+                            pr.repo_id,
+                            count(distinct prmr.msg_id) AS message_count
+                        FROM
+                            augur_data.pull_requests pr,
+                            augur_data.pull_request_message_ref prmr
+                        WHERE
+                            pr.repo_id in ({repo_ids})
+                            AND prmr.pull_request_id = pr.pull_request_id
+                        GROUP BY pr.repo_id, pr.pull_request_id
+                    ),
+                    measures AS (
+                        SELECT c.repo_id, m.measure, m.value
+                        FROM
+                            per_commit c
+                            CROSS JOIN LATERAL (
+                                VALUES
+                                    ('commit_lines_added', c.lines_added::float8),
+                                    ('commit_lines_removed', c.lines_removed::float8),
+                                    ('commit_files', c.num_files::float8)
+                            ) AS m(measure, value)
+                        UNION ALL
+                        SELECT p.repo_id, 'pr_messages', p.message_count::float8
+                        FROM per_pr p
+                        UNION ALL
+                        SELECT pr.repo_id, m.measure, m.value
+                        FROM
+                            augur_data.pull_requests pr
+                            CROSS JOIN LATERAL (
+                                VALUES
+                                    ('open_pr_age', CASE WHEN pr.pr_closed_at IS NULL
+                                        THEN extract(epoch FROM now() - pr.pr_created_at) END),
+                                    ('merged_pr_duration', CASE WHEN pr.pr_merged_at IS NOT NULL
+                                        THEN extract(epoch FROM pr.pr_merged_at - pr.pr_created_at) END),
+                                    ('rejected_pr_duration', CASE WHEN pr.pr_merged_at IS NULL AND pr.pr_closed_at IS NOT NULL
+                                        THEN extract(epoch FROM pr.pr_closed_at - pr.pr_created_at) END)
+                            ) AS m(measure, value)
+                        WHERE pr.repo_id in ({repo_ids})
+                        UNION ALL
+                        SELECT i.repo_id, m.measure, m.value
+                        FROM
+                            augur_data.issues i
+                            CROSS JOIN LATERAL (
+                                VALUES
+                                    ('open_issue_age', CASE WHEN i.closed_at IS NULL
+                                        THEN extract(epoch FROM now() - i.created_at) END),
+                                    ('closed_issue_age', CASE WHEN i.closed_at IS NOT NULL
+                                        THEN extract(epoch FROM now() - i.created_at) END)
+                            ) AS m(measure, value)
+                        WHERE i.repo_id in ({repo_ids})
+                    )
+                    SELECT
+                        repo_id AS id,
+                        measure,
+                        {bucket_sql("value")} AS bucket,
+                        count(*) AS n,
+                        sum(value) AS sum,
+                        sum(value * value) AS sumsq,
+                        min(value) AS min,
+                        max(value) AS max,
+                        extract(epoch FROM now()) AS as_of
+                    FROM measures
+                    WHERE value IS NOT NULL
+                    GROUP BY repo_id, measure, bucket
+                    """
+
+    try:
+        dbm = AugurManager()
+        engine = dbm.get_engine()
+    except KeyError:
+        # noack, data wasn't successfully set.
+        logging.error(f"{QUERY_NAME}_DATA_QUERY - INCOMPLETE ENVIRONMENT")
+        return False
+    except SQLAlchemyError:
+        logging.error(f"{QUERY_NAME}_DATA_QUERY - COULDN'T CONNECT TO DB")
+        # allow retry via Celery rules.
+        raise SQLAlchemyError("DBConnect failed")
+
+    df = dbm.run_query(query_string)
+
+    # sums and epochs come back as decimals.
+    df = df.astype({"bucket": "int64", "n": "int64", "sum": "float64", "sumsq": "float64"})
+    df = df.astype({"min": "float64", "max": "float64", "as_of": "float64"})
+    df["aging"] = df["measure"].isin(AGING_MEASURES)
+    df = df[["id"] + COLUMNS]
+
+    # break apart returned data per repo and
+    # temporarily store in List to be stored in Redis.
+    pic = partition_by_repo(df, repos, categories=["measure"])
+
+    del df
+
+    # store results in Redis
+    cm_o = cm()
+
+    # 'ack' is a boolean of whether data was set correctly or not.
+    ack = cm_o.setm(
+        func=home_metrics_query,
+        repos=repos,
+        datas=pic,
+        watermark=WATERMARK,
+    )
+
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
+    return ack
@@ -1,14 +1,17 @@
 import logging
 import pandas as pd
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.partition import partition_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "ISSUE_ASSIGNEE"
 
+# cached per repo up to the max of this column, refreshes pull only newer rows.
+WATERMARK = "created"
+
 
 @celery_app.task(
     bind=True,
@@ -17,7 +20,7 @@ QUERY_NAME = "ISSUE_ASSIGNEE"
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
 )
-def issue_assignee_query(self, repos):
+def issue_assignee_query(self, repos, refresh=False):
     """
     (Worker Query)
     Executes SQL query against Augur database for contributor data.
@@ -29,6 +32,7 @@ def issue_assignee_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): only pull rows newer than the cached watermarks.
     Returns:
     --------
         dict: Results from SQL query, interpreted from pd.to_dict('records')
@@ -38,6 +42,13 @@ def issue_assignee_query(self, repos):
     if len(repos) == 0:
         return None
 
+    cm_o = cm()
+
+    # when refreshing, only rows from the oldest cached watermark on are pulled.
+    since = cm_o.refresh_since(issue_assignee_query, repos) if refresh else None
+    since_filter = "AND ia.created >= :since" if since else ""
+    params = {"since": f"{since} 00:00:00+00"} if since else None
+
     query_string = f"""
                     SELECT
                         *
@@ -45,6 +56,7 @@ def issue_assignee_query(self, repos):
                         explorer_issue_assignments ia
                     WHERE
                         ia.id in ({str(repos)[1:-1]})
+                        {since_filter}
                 """
 
     try:
@@ -59,7 +71,7 @@ def issue_assignee_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
+    df = dbm.run_query(query_string, params=params)
 
     # id as string and slice to remove excess 0s
     df["assignee"] = df["assignee"].astype(str)
@@ -69,36 +81,29 @@ def issue_assignee_query(self, repos):
     df["created"] = pd.to_datetime(df["created"], utc=True).dt.date
     df = df[df.created < dt.date.today()]
 
-    pic = []
-
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+    # break apart returned data per repo and
+    # temporarily store in List to be stored in Redis.
+    pic = partition_by_repo(df, repos)
 
     del df
 
-    # store results in Redis
-    cm_o = cm()
-
     # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=issue_assignee_query,
-        repos=repos,
-        datas=pic,
-    )
+    if since is not None:
+        # replace each repo's rows from 'since' on with the newly pulled ones.
+        ack = cm_o.mergem(
+            func=issue_assignee_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+            since=since,
+        )
+    else:
+        ack = cm_o.setm(
+            func=issue_assignee_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+        )
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
 
     return ack
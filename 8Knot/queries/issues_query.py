@@ -1,14 +1,18 @@
 import logging
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 from cache_manager.cache_manager import CacheManager as cm
+from cache_manager.partition import partition_by_repo
 import pandas as pd
-import io
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "ISSUE"
 
+# rows change after they're created (closed, merged, ...), so refreshes
+# pull everything again. the watermark is still kept with the data.
+WATERMARK = "created"
+
 
 @celery_app.task(
     bind=True,
@@ -17,7 +21,7 @@ QUERY_NAME = "ISSUE"
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
 )
-def issues_query(self, repos):
+def issues_query(self, repos, refresh=False):
     """
     (Worker Query)
     Executes SQL query against Augur database for issue data.
@@ -25,6 +29,7 @@ def issues_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): unused, refreshes pull everything again.
 
     Returns:
     --------
@@ -79,26 +84,9 @@ def issues_query(self, repos):
     df = df.reset_index()
     df.drop("index", axis=1, inplace=True)
 
-    # break apart returned data per repo
-    # and temporarily store in List to be
-    # stored in Redis.
-    pic = []
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+    # break apart returned data per repo and
+    # temporarily store in List to be stored in Redis.
+    pic = partition_by_repo(df, repos)
 
     del df
 
@@ -110,6 +98,7 @@ def issues_query(self, repos):
         func=issues_query,
         repos=repos,
         datas=pic,
+        watermark=WATERMARK,
     )
 
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
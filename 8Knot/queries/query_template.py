@@ -1,9 +1,9 @@
 import logging
 import pandas as pd
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.partition import partition_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -15,12 +15,18 @@ TODO:
 (3) paste SQL query in the query_string
 (4) insert any necessary df column name or format changed under the pandas column and format updates comment
 (5) reset df index if #4 is performed via "df = df.reset_index(drop=True)"
-(6) go to index/index_callbacks.py and import the NAME_query as a unqiue acronym and add it to the QUERIES list
-(7) delete this list when completed
+(6) set WATERMARK to the date column refreshes pull newer rows by, and 'since_filter' to its SQL name
+(7) go to index/index_callbacks.py and import the NAME_query as a unqiue acronym and add it to the QUERIES list
+(8) add "queries.NAME_query" to QUERY_MODULES in _celery.py, so the query workers load it
+(9) if WATERMARK is set, add NAME_query to REFRESHED_QUERIES in queries/refresh.py so it's refreshed daily
+(10) delete this list when completed
 """
 
 QUERY_NAME = "NAME"
 
+# cached per repo up to the max of this column, refreshes pull only newer rows.
+WATERMARK = "created"
+
 
 @celery_app.task(
     bind=True,
@@ -29,7 +35,7 @@ QUERY_NAME = "NAME"
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
 )
-def NAME_query(self, repos):
+def NAME_query(self, repos, refresh=False):
     """
     (Worker Query)
     Executes SQL query against Augur database for contributor data.
@@ -37,6 +43,7 @@ def NAME_query(self, repos):
     Args:
     -----
         repo_ids ([str]): repos that SQL query is executed on.
+        refresh (bool): only pull rows newer than the cached watermarks.
 
     Returns:
     --------
@@ -47,6 +54,13 @@ def NAME_query(self, repos):
     if len(repos) == 0:
         return None
 
+    cm_o = cm()
+
+    # when refreshing, only rows from the oldest cached watermark on are pulled.
+    since = cm_o.refresh_since(NAME_query, repos) if refresh else None
+    since_filter = "AND created >= :since" if since else ""
+    params = {"since": f"{since} 00:00:00+00"} if since else None
+
     query_string = f"""
                     SELECT
 
@@ -54,6 +68,7 @@ def NAME_query(self, repos):
 
                     WHERE
                         repo_id in ({str(repos)[1:-1]})
+                        {since_filter}
                 """
 
     try:
@@ -68,7 +83,7 @@ def NAME_query(self, repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
+    df = dbm.run_query(query_string, params=params)
 
     # pandas column and format updates
     """Commonly used df updates:
@@ -83,36 +98,30 @@ def NAME_query(self, repos):
     df["created"] = pd.to_datetime(df["created"], utc=True).dt.date
     df = df[df.created < dt.date.today()]
 
-    pic = []
-
-    for i, r in enumerate(repos):
-        # convert series to a dataframe
-        c_df = pd.DataFrame(df.loc[df["id"] == r]).reset_index(drop=True)
-
-        # bytes buffer to be written to
-        b = io.BytesIO()
-
-        # write dataframe in feather format to BytesIO buffer
-        bs = c_df.to_feather(b)
-
-        # move head of buffer to the beginning
-        b.seek(0)
-
-        # write the bytes of the buffer into the array
-        bs = b.read()
-        pic.append(bs)
+    # break apart returned data per repo and
+    # temporarily store in List to be stored in Redis.
+    pic = partition_by_repo(df, repos)
 
     del df
 
     # store results in Redis
-    cm_o = cm()
-
     # 'ack' is a boolean of whether data was set correctly or not.
-    ack = cm_o.setm(
-        func=NAME_query,
-        repos=repos,
-        datas=pic,
-    )
+    if since is not None:
+        # replace each repo's rows from 'since' on with the newly pulled ones.
+        ack = cm_o.mergem(
+            func=NAME_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+            since=since,
+        )
+    else:
+        ack = cm_o.setm(
+            func=NAME_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+        )
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
 
     return ack
@@ -1,14 +1,17 @@
 import logging
 import pandas as pd
 from db_manager.augur_manager import AugurManager
-from app import celery_app
+from _celery import celery_app
 from cache_manager.cache_manager import CacheManager as cm
-import io
+from cache_manager.partition import partition_by_repo
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
 
 QUERY_NAME = "RELEASES"
 
+# cached per repo up to the max of this column, refreshes pull only newer rows.
+WATERMARK = "r_date"
+
 @celery_app.task(
     bind=True,
     autoretry_for=(Exception,),
@@ -17,12 +20,19 @@ QUERY_NAME = "RELEASES"
     retry_jitter=True,
 )
 
-def release_frequency_query(self,repos):
+def release_frequency_query(self, repos, refresh=False):
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - START")
 
     if len(repos) == 0:
         return None
 
+    cm_o = cm()
+
+    # when refreshing, only rows from the oldest cached watermark on are pulled.
+    since = cm_o.refresh_since(release_frequency_query, repos) if refresh else None
+    since_filter = "AND release_published_at >= :since" if since else ""
+    params = {"since": f"{since} 00:00:00+00"} if since else None
+
     query_string = f"""
                     SELECT
                         repo_id as id,
@@ -32,6 +42,7 @@ def release_frequency_query(self,repos):
                         augur_data.releases
                     WHERE
                         repo_id in ({str(repos)[1:-1]})
+                        {since_filter}
                 """
 
     try:
@@ -46,33 +57,33 @@ def release_frequency_query(self,repos):
         # allow retry via Celery rules.
         raise SQLAlchemyError("DBConnect failed")
 
-    df = dbm.run_query(query_string)
+    df = dbm.run_query(query_string, params=params)
 
     df["r_date"] = pd.to_datetime(df["r_date"], utc=True).dt.date
     df = df[df.r_date < dt.date.today()]
 
-    pic = []
-    for r in repos:
-        c_df = pd.DataFrame(df.loc[df["id"] == r].drop(columns=["id"])).reset_index(drop=True)
-
-        b = io.BytesIO()
-
-        bs = c_df.to_feather(b)
-
-        b.seek(0)
-
-        bs = b.read()
-        pic.append(bs)
+    # break apart returned data per repo and temporarily store in List to be
+    # stored in Redis. once we've stored the data by ID we no longer need the column.
+    pic = partition_by_repo(df, repos, drop_id=True)
 
     del df
 
-    cm_o = cm()
-
-    ack = cm_o.setm(
-        func=release_frequency_query,
-        repos=repos,
-        datas=pic,
-    )
+    if since is not None:
+        # replace each repo's rows from 'since' on with the newly pulled ones.
+        ack = cm_o.mergem(
+            func=release_frequency_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+            since=since,
+        )
+    else:
+        ack = cm_o.setm(
+            func=release_frequency_query,
+            repos=repos,
+            datas=pic,
+            watermark=WATERMARK,
+        )
 
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
     return ack
@@ -0,0 +1,168 @@
+"""
+    Scheduled incremental refresh of the cached query data.
+
+    Queries with a watermark (see WATERMARK in each query module) can pull
+    only the rows newer than what's cached, and merge them into the cached
+    blobs. Every repo whose data of such a query is cached is re-dispatched
+    with refresh=True, so large repos stay current without a user's
+    selection pulling them again in full.
+
+    A refresh pulls from the oldest watermark of the repos in its task, so
+    repos are grouped by watermark: a repo without recent activity doesn't
+    make active repos re-pull years of rows.
+
+    Watermarks date the rows' events, not their collection. Refreshes
+    reach a look-back window behind the watermark (see
+    CacheManager.refresh_since), and each day a rotating share of the
+    repos is pulled in full, so rows collected later than the window
+    are cached within QUERY_FULL_REFRESH_DAYS as well.
+
+    Refreshes lease their repos like any other extraction (see
+    queries/shards.py), so a repo that's already being extracted
+    isn't pulled twice at once.
+
+    Queries without a watermark (e.g. the home page rollups) are refreshed
+    the same way, on their own schedule, and pull their repos in full.
+
+    Configured by the environment:
+        QUERY_REFRESH_BATCH_REPOS: most repos per refresh task (default 100)
+        QUERY_FULL_REFRESH_DAYS: days over which every repo is pulled in full once, 0 never (default 30)
+"""
+import datetime as dt
+import logging
+import os
+import uuid
+from _celery import celery_app
+from cache_manager.cache_manager import CacheManager as cm
+from queries.commits_query import commits_query
+from queries.company_query import company_query
+from queries.contributors_query import contributors_query
+from queries.home_metrics_query import home_metrics_query
+from queries.issue_assignee_query import issue_assignee_query
+from queries.pr_assignee_query import pr_assignee_query
+from queries.realease_frequency_query import release_frequency_query
+from queries.response_time_query import response_time_query
+from queries.shards import claim_repos, dispatch_query
+
+QUERY_REFRESH_BATCH_REPOS = int(os.getenv("QUERY_REFRESH_BATCH_REPOS", "100"))
+QUERY_FULL_REFRESH_DAYS = int(os.getenv("QUERY_FULL_REFRESH_DAYS", "30"))
+
+# append-only queries whose cached data can be refreshed incrementally.
+REFRESHED_QUERIES = [
+    commits_query,
+    company_query,
+    contributors_query,
+    issue_assignee_query,
+    pr_assignee_query,
+    release_frequency_query,
+    response_time_query,
+]
+
+# queries without a watermark, refreshed only when named, see _celery.py.
+FULLY_REFRESHED_QUERIES = [
+    home_metrics_query,
+]
+
+
+def group_by_watermark(repos, marks, batch_repos=QUERY_REFRESH_BATCH_REPOS):
+    """
+    Splits repos into batches of similar watermarks.
+
+    Args:
+    -----
+        repos ([int]): repo_ids
+        marks ([str | None]): ISO-formatted watermark per repo, aligned with 'repos'
+        batch_repos (int): most repos per batch
+
+    Returns:
+    --------
+        [[int]]: repo_ids per batch
+    """
+    # repos without a watermark are pulled in full, they don't share a batch with the others.
+    undated = [r for r, m in zip(repos, marks) if m is None]
+    dated = [r for _, r in sorted((m, r) for r, m in zip(repos, marks) if m is not None)]
+
+    batches = []
+    for group in (undated, dated):
+        batches += [group[i : i + batch_repos] for i in range(0, len(group), batch_repos)]
+
+    return batches
+
+
+def due_for_full_refresh(repos, day, days=QUERY_FULL_REFRESH_DAYS):
+    """
+    Repos whose turn it is to be pulled in full on 'day'.
+    Every repo's turn comes once every 'days' days.
+
+    Args:
+    -----
+        repos ([int]): repo_ids
+        day (int): ordinal of the day
+        days (int): length of the rotation, 0 for none
+
+    Returns:
+    --------
+        [int]: repo_ids to pull in full
+    """
+    if days <= 0:
+        return []
+
+    return [r for r in repos if r % days == day % days]
+
+
+@celery_app.task
+def refresh_cached_queries(queries=None):
+    """
+    (Worker Query)
+    Pulls the rows newer than the cached ones for every cached repo of
+    the append-only queries, or all rows for queries without a watermark.
+    Repos that another job is extracting are skipped.
+    Run periodically by Celery beat, see _celery.py.
+
+    Args:
+    -----
+        queries ([str] | None): names of the queries to refresh. All of REFRESHED_QUERIES if None.
+
+    Returns:
+    --------
+        int: number of refresh tasks dispatched
+    """
+    cache = cm()
+
+    funcs = REFRESHED_QUERIES
+    if queries is not None:
+        funcs = [f for f in REFRESHED_QUERIES + FULLY_REFRESHED_QUERIES if f.__name__ in queries]
+
+    today = dt.date.today().toordinal()
+
+    n_tasks = 0
+    for func in funcs:
+        repos = cache.get_cached_repos(func)
+        if not repos:
+            continue
+
+        # (repos, refresh) per task, the repos whose turn it is are pulled in full.
+        full = due_for_full_refresh(repos, today, QUERY_FULL_REFRESH_DAYS)
+        due = set(full)
+        rest = [r for r in repos if r not in due]
+
+        marks = cache.get_watermarks(func=func, repos=rest)
+        tasks = [(batch, True) for batch in group_by_watermark(rest, marks)]
+        tasks += [(batch, False) for batch in group_by_watermark(full, [None] * len(full))]
+
+        skipped = 0
+        for batch, refresh in tasks:
+            job_id = str(uuid.uuid4())
+            holders = claim_repos(cache, func, batch, job_id)
+
+            claimed = [r for r, h in zip(batch, holders) if h == job_id]
+            skipped += len(batch) - len(claimed)
+            if claimed:
+                dispatch_query(func, claimed, job_id, refresh=refresh)
+                n_tasks += 1
+
+        logging.warning(
+            f"{func.__name__} - REFRESHING {len(repos) - skipped} REPOS, {len(full)} IN FULL, {skipped} IN FLIGHT"
+        )
+
+    return n_tasks
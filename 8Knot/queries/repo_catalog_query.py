@@ -0,0 +1,44 @@
+import logging
+from db_manager.augur_manager import AugurManager
+from _celery import celery_app
+from sqlalchemy.exc import SQLAlchemyError
+
+QUERY_NAME = "REPO_CATALOG"
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    exponential_backoff=2,
+    retry_kwargs={"max_retries": 5},
+    retry_jitter=True,
+)
+def refresh_repo_catalog(self):
+    """
+    (Worker Query)
+    Queries the repo catalog from Augur database and publishes it as the
+    newest snapshot (see db_manager/catalog.py), which running processes
+    pick up on their next check. Run periodically by Celery beat, see _celery.py.
+
+    Returns:
+    --------
+        int: number of rows in the snapshot
+    """
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - START")
+
+    try:
+        dbm = AugurManager()
+        dbm.get_engine()
+    except KeyError:
+        # noack, catalog wasn't refreshed.
+        logging.error(f"{QUERY_NAME}_DATA_QUERY - INCOMPLETE ENVIRONMENT")
+        return False
+    except SQLAlchemyError:
+        logging.error(f"{QUERY_NAME}_DATA_QUERY - COULDN'T CONNECT TO DB")
+        # allow retry via Celery rules.
+        raise SQLAlchemyError("DBConnect failed")
+
+    snapshot = dbm.refresh_catalog()
+
+    logging.warning(f"{QUERY_NAME}_DATA_QUERY - END")
+    return snapshot.num_rows
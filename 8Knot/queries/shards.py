@@ -0,0 +1,141 @@
+"""
+    Splits a large repo selection into shards that are extracted in parallel.
+
+    A query task carrying the whole selection runs on one query-worker
+    process while the others sit idle. Selections are instead split into
+    shards of roughly equal size, using per-repo row-count estimates where
+    they're known, and each shard is its own task on the 'data' queue.
+    A chord collects the shards so that one job id, the chord's callback,
+    only succeeds once every shard has landed.
+
+    Configured by the environment:
+        QUERY_MAX_SHARDS: most shards a selection is split into (default 8)
+        QUERY_SHARD_MIN_REPOS: fewest repos per shard (default 25)
+        QUERY_LEASE_TTL: seconds an extraction holds its (query, repo) leases (default 3600)
+"""
+import heapq
+import logging
+import os
+from celery import chord
+from _celery import celery_app
+
+
+QUERY_MAX_SHARDS = int(os.getenv("QUERY_MAX_SHARDS", "8"))
+QUERY_SHARD_MIN_REPOS = int(os.getenv("QUERY_SHARD_MIN_REPOS", "25"))
+
+# seconds an in-flight extraction holds its (query, repo) leases
+# before another request may start the same extraction.
+QUERY_LEASE_TTL = int(os.getenv("QUERY_LEASE_TTL", "3600"))
+
+
+def plan_shards(repos, sizes=None, max_shards=QUERY_MAX_SHARDS, min_repos=QUERY_SHARD_MIN_REPOS):
+    """
+    Splits repos into shards of balanced estimated size.
+
+    Repos are placed largest-first on the currently smallest shard,
+    which keeps the largest shard within 4/3 of the optimum.
+
+    Args:
+    -----
+        repos ([int]): repo_ids to split
+        sizes ([int | None] | None): estimated rows per repo, aligned with 'repos'.
+            Unknown sizes are taken to be the mean of the known ones.
+        max_shards (int): most shards to split into
+        min_repos (int): fewest repos per shard
+
+    Returns:
+    --------
+        [[int]]: repo_ids per shard
+    """
+    n_shards = max(1, min(max_shards, len(repos) // max(1, min_repos)))
+    if n_shards == 1:
+        return [list(repos)]
+
+    if sizes is None:
+        sizes = [None] * len(repos)
+
+    known = [s for s in sizes if s is not None]
+    default = sum(known) / len(known) if known else 1
+    sizes = [default if s is None else s for s in sizes]
+
+    # (estimated rows, shard index) of every shard, smallest on top.
+    loads = [(0, i) for i in range(n_shards)]
+    shards = [[] for _ in range(n_shards)]
+
+    for size, repo in sorted(zip(sizes, repos), key=lambda v: v[0], reverse=True):
+        load, i = heapq.heappop(loads)
+        shards[i].append(repo)
+        heapq.heappush(loads, (load + size, i))
+
+    return [s for s in shards if s]
+
+
+def claim_repos(cache, func, repos, job_id, ttl=QUERY_LEASE_TTL):
+    """
+    Leases the extraction of 'func' for repos to a job, so that only
+    one job at a time extracts a (query, repo) pair. Repos that another
+    job is extracting stay with that job.
+
+    Args:
+    -----
+        cache (CacheManager): cache the leases are kept in
+        func (celery.Task): query task
+        repos ([int]): repo_ids to lease
+        job_id (str): id of the job that would extract the data
+        ttl (int): seconds before the claimed leases expire
+
+    Returns:
+    --------
+        [str]: id of the job holding each repo's lease, 'job_id' where the claim succeeded.
+    """
+    holders = cache.claimm(func, repos, job_id, ttl)
+
+    # a lease whose job has finished is stale, whether or not it
+    # cached the data (it may have failed, or set nothing). take it over.
+    stale = [h for h in set(holders) if h != job_id and celery_app.AsyncResult(h).ready()]
+    if stale:
+        holders = cache.claimm(func, repos, job_id, ttl, replace=stale)
+
+    return holders
+
+
+def dispatch_query(func, repos, job_id, sizes=None, refresh=False):
+    """
+    Enqueues 'func' for repos on the 'data' queue, sharded if the
+    selection is large enough. 'job_id' succeeds once all data is set.
+
+    Args:
+    -----
+        func (celery.Task): query task
+        repos ([int]): repo_ids to extract
+        job_id (str): id of the job that is waited on
+        sizes ([int | None] | None): estimated rows per repo, aligned with 'repos'.
+        refresh (bool): only pull rows newer than the cached watermarks.
+    """
+    shards = plan_shards(repos, sizes)
+
+    if len(shards) == 1:
+        func.apply_async(args=[repos], kwargs={"refresh": refresh}, queue="data", task_id=job_id)
+        return
+
+    logging.warning(f"{func.__name__} - {len(repos)} REPOS IN {len(shards)} SHARDS")
+
+    header = [func.s(s, refresh=refresh).set(queue="data") for s in shards]
+    chord(header)(shards_landed.s().set(queue="data", task_id=job_id))
+
+
+@celery_app.task
+def shards_landed(acks):
+    """
+    (Worker Query)
+    Callback of a sharded query, runs once every shard has landed.
+
+    Args:
+    -----
+        acks ([bool]): acknowledgements of the shards
+
+    Returns:
+    --------
+        bool: whether every shard's data was set.
+    """
+    return all(acks)
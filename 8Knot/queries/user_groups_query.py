@@ -1,16 +1,21 @@
 import logging
-from app import celery_app, augur
+from _celery import celery_app
+from db_manager.augur_manager import AugurManager
 import pandas as pd
 from cache_manager.cache_manager import CacheManager as cm
 import io
 import datetime as dt
 from sqlalchemy.exc import SQLAlchemyError
-import redis
+from cache_manager.redis_pools import users_client
 import json
 import os
 
 QUERY_NAME = "USER_GROUPS_QUERY"
 
+# AugurManager of the worker, built on first use from the repo catalog snapshot.
+# query workers don't import app, so they don't share the web server's.
+_augur = None
+
 
 @celery_app.task(
     bind=True,
@@ -32,11 +37,7 @@ def user_groups_query(self, user_id):
     """
     logging.warning(f"{QUERY_NAME}_DATA_QUERY - START")
 
-    users_cache = redis.StrictRedis(
-        host=os.getenv("REDIS_SERVICE_USERS_HOST", "redis-users"),
-        port=6379,
-        password=os.getenv("REDIS_PASSWORD", ""),
-    )
+    users_cache = users_client()
 
     # checks connection to Redis, raises redis.exceptions.ConnectionError if connection fails.
     # returns True if connection succeeds.
@@ -59,6 +60,25 @@ def user_groups_query(self, user_id):
     return bool(groups_set and options_set)
 
 
+def get_augur():
+    """Gets the worker's AugurManager, loading
+    the repo catalog on first use.
+
+    Returns:
+        AugurManager: oauth-enabled manager with the repo catalog
+    """
+    global _augur
+    if _augur is None:
+        augur = AugurManager(handles_oauth=os.getenv("AUGUR_LOGIN_ENABLED", "False") == "True")
+
+        # only queried if there's no catalog snapshot yet.
+        augur.get_engine()
+        augur.multiselect_startup()
+        _augur = augur
+
+    return _augur
+
+
 def get_user_groups(username, bearer_token):
     """Requests all user-level groups from augur frontend.
 
@@ -72,7 +92,7 @@ def get_user_groups(username, bearer_token):
     """
 
     # request to get user's groups
-    augur_users_groups = augur.make_user_request(access_token=bearer_token)
+    augur_users_groups = get_augur().make_user_request(access_token=bearer_token)
 
     # structure of the incoming data
     # [{group_name: {favorited: False, repos: [{repo_git: asd;lfkj, repo_id=46555}, ...]}, ...]
@@ -139,7 +159,7 @@ def parse_repolist(repo_list, prepend_to_url=""):
             continue
 
         # translate that natural key to the repo's ID in the primary database
-        repo_id_translated = augur.repo_git_to_id(prepend_to_url + repo_url)
+        repo_id_translated = get_augur().repo_git_to_id(prepend_to_url + repo_url)
 
         # check if the translation worked.
         if not repo_id_translated:
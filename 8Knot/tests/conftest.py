@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modules are imported the way the app imports them, from the 8Knot directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
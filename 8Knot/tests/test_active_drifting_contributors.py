@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+from pages.contributors.visualizations.active_drifting_contributors import get_active_drifting_away
+
+# date_range frequencies of the graph's intervals ("D", "W", "M", "Y"),
+# with days of contributions that give each a fair number of dates.
+INTERVALS = [
+    (pd.offsets.Day(), 400),
+    (pd.offsets.Week(weekday=6), 3 * 365),
+    (pd.offsets.MonthEnd(), 3 * 365),
+    (pd.offsets.YearEnd(), 8 * 365),
+]
+
+
+def get_active_drifting_away_up_to(df, date, drift_interval, away_interval):
+    """Per-date counts as computed before get_active_drifting_away, the reference."""
+    # drop rows that are more recent than the date limit
+    df_lim = df[df["created"] <= date]
+
+    # keep more recent contribution per ID
+    df_lim = df_lim.drop_duplicates(subset="cntrb_id", keep="last")
+
+    # time difference, drifting_months before the threshold date
+    drift_mos = date - relativedelta(months=+drift_interval)
+
+    # time difference, away_months before the threshold date
+    away_mos = date - relativedelta(months=+away_interval)
+
+    # number of total contributors up until date
+    numTotal = df_lim.shape[0]
+
+    # number of 'active' contributors, people with contributions before the drift time
+    numActive = df_lim[df_lim["created"] >= drift_mos].shape[0]
+
+    # set of contributions that are before the away time
+    drifting = df_lim[df_lim["created"] > away_mos]
+
+    # number of the set of contributions that are after the drift time, but before away
+    numDrifting = drifting[drifting["created"] < drift_mos].shape[0]
+
+    # difference of the total to get the away value
+    numAway = numTotal - (numActive + numDrifting)
+
+    return [numActive, numDrifting, numAway]
+
+
+def random_contributions(rng, n_rows, n_cntrbs, days):
+    """Contributions at random days (some on the same day), in chronological order."""
+    start = pd.Timestamp("2019-01-31")
+    created = start + pd.to_timedelta(rng.integers(0, days, n_rows), unit="D")
+    df = pd.DataFrame({"cntrb_id": rng.integers(0, n_cntrbs, n_rows).astype(str), "created": created})
+    return df.sort_values("created", kind="stable").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("interval, days", INTERVALS, ids=["D", "W", "M", "Y"])
+@pytest.mark.parametrize("drift_interval, away_interval", [(6, 12), (1, 3), (4, 4), (12, 24)])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_per_date_counts(interval, days, drift_interval, away_interval, seed):
+    rng = np.random.default_rng(seed)
+    df = random_contributions(rng, n_rows=300, n_cntrbs=40, days=days)
+
+    dates = pd.date_range(start=df["created"].min(), end=df["created"].max(), freq=interval, inclusive="both")
+
+    active, drifting, away = get_active_drifting_away(df, dates, drift_interval, away_interval)
+
+    expected = np.array([get_active_drifting_away_up_to(df, d, drift_interval, away_interval) for d in dates])
+    expected = expected.reshape(len(dates), 3)
+
+    np.testing.assert_array_equal(active, expected[:, 0])
+    np.testing.assert_array_equal(drifting, expected[:, 1])
+    np.testing.assert_array_equal(away, expected[:, 2])
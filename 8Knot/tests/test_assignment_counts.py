@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pages.utils.interval_utils import get_assigned_counts, get_open_counts
+
+# date_range frequencies of the graph's intervals, the length of their
+# bins, and days of activity that give each a fair number of bins.
+INTERVALS = [
+    (pd.offsets.Day(), pd.DateOffset(days=1), 200),
+    (pd.offsets.Week(weekday=6), pd.DateOffset(weeks=1), 3 * 365),
+    (pd.offsets.MonthEnd(), pd.DateOffset(months=1), 3 * 365),
+    (pd.offsets.YearEnd(), pd.DateOffset(years=1), 8 * 365),
+]
+
+
+def issue_assignment(df, start_date, end_date):
+    """Per-bin counts as computed before get_assigned_counts, the reference."""
+    # drop rows that are more recent than the end date
+    df_created = df[df["created"] <= end_date]
+
+    # Keep issues that were either still open after the 'start_date' or that have not been closed.
+    df_in_range = df_created[(df_created["closed"] > start_date) | (df_created["closed"].isnull())]
+
+    # number of issues open in time interval
+    num_issues_open = df_in_range["issue_id"].nunique()
+
+    # get all issue unassignments and drop rows that have been unassigned more recent than the end date
+    num_unassigned_actions = df_in_range[
+        (df_in_range["assignment_action"] == "unassigned") & (df_in_range["assign_date"] <= end_date)
+    ].shape[0]
+
+    # get all issue assignments and drop rows that have been assigned more recent than the end date
+    num_assigned_actions = df_in_range[
+        (df_in_range["assignment_action"] == "assigned") & (df_in_range["assign_date"] <= end_date)
+    ].shape[0]
+
+    # number of assigned issues during the time interval
+    num_issues_assigned = num_assigned_actions - num_unassigned_actions
+
+    # number of unassigned issues during the time interval
+    num_issues_unassigned = num_issues_open - num_issues_assigned
+
+    # return the number of assigned and unassigned issues
+    return num_issues_assigned, num_issues_unassigned
+
+
+def contrib_assignment(df, start_date, end_date, contrib):
+    """Per-bin, per-contributor counts as computed before get_assigned_counts, the reference."""
+    # drop rows not by contrib
+    df = df[df["assignee"] == contrib]
+
+    # drop rows that are more recent than the end date
+    df_created = df[df["created"] <= end_date]
+
+    # Keep prs that were either still open after the 'start_date' or that have not been closed.
+    df_in_range = df_created[(df_created["closed"] > start_date) | (df_created["closed"].isnull())]
+
+    # get all pr review unassignments and drop rows that have been unassigned more recent than the end date
+    df_unassign = df_in_range[
+        (df_in_range["assignment_action"] == "unassigned") & (df_in_range["assign_date"] <= end_date)
+    ]
+
+    # get all pr review assignments and drop rows that have been assigned more recent than the end date
+    df_assigned = df_in_range[
+        (df_in_range["assignment_action"] == "assigned") & (df_in_range["assign_date"] <= end_date)
+    ]
+
+    # return the different of assignments and unassignments
+    return df_assigned.shape[0] - df_unassign.shape[0]
+
+
+def random_events(rng, n_items, n_assignees, days):
+    """
+    Assignment events of issues created and closed at midnight of random days,
+    so that many of them fall exactly on bin starts and ends. Some issues are
+    still open (NaT closed), some have no assignment events at all.
+    """
+    start = pd.Timestamp("2019-01-31", tz="UTC")
+    created = start + pd.to_timedelta(rng.integers(0, days, n_items), unit="D")
+    closed = pd.Series(created + pd.to_timedelta(rng.integers(0, days // 2, n_items), unit="D"))
+    closed[rng.random(n_items) < 0.2] = pd.NaT
+    items = pd.DataFrame({"issue_id": np.arange(n_items), "created": created, "closed": closed})
+
+    n_events = rng.integers(0, 4, n_items)
+    df = items.loc[items.index.repeat(n_events)].reset_index(drop=True)
+    df["assign_date"] = df["created"] + pd.to_timedelta(rng.integers(-3, days // 4, len(df)), unit="D")
+    df["assignment_action"] = np.where(rng.random(len(df)) < 0.7, "assigned", "unassigned")
+    df["assignee"] = rng.integers(0, n_assignees, len(df)).astype(str)
+
+    # issues without assignments are listed once, without an action.
+    unassigned = items[n_events == 0].assign(assign_date=pd.NaT, assignment_action=None, assignee=None)
+    df = pd.concat([df, unassigned]).sort_values("created", kind="stable").reset_index(drop=True)
+    df["assign_date"] = pd.to_datetime(df["assign_date"], utc=True)
+    return df
+
+
+def bins(df, freq, length):
+    earliest = df["created"].min()
+    latest = max(df["created"].max(), df["closed"].max())
+
+    dates = pd.date_range(start=earliest, end=latest, freq=freq, inclusive="both")
+    df_assign = dates.to_frame(index=False, name="start_date")
+    df_assign["end_date"] = df_assign.start_date + length
+    return df_assign
+
+
+@pytest.mark.parametrize("freq, length, days", INTERVALS, ids=["D", "W", "M", "Y"])
+@pytest.mark.parametrize("seed", range(3))
+def test_totals_match_per_bin_counts(freq, length, days, seed):
+    rng = np.random.default_rng(seed)
+    df = random_events(rng, n_items=150, n_assignees=4, days=days)
+    df_assign = bins(df, freq, length)
+
+    df_items = df.dropna(subset=["issue_id"]).drop_duplicates(subset="issue_id")
+    num_open = get_open_counts(df_items["created"], df_items["closed"], df_assign.start_date, df_assign.end_date)
+    assigned = get_assigned_counts(df, df_assign.start_date, df_assign.end_date)
+
+    expected = np.array([issue_assignment(df, s, e) for s, e in zip(df_assign.start_date, df_assign.end_date)])
+
+    np.testing.assert_array_equal(assigned, expected[:, 0])
+    np.testing.assert_array_equal(num_open - assigned, expected[:, 1])
+
+
+@pytest.mark.parametrize("freq, length, days", INTERVALS, ids=["D", "W", "M", "Y"])
+@pytest.mark.parametrize("seed", range(3))
+def test_per_assignee_matches_per_bin_counts(freq, length, days, seed):
+    rng = np.random.default_rng(seed)
+    df = random_events(rng, n_items=150, n_assignees=4, days=days)
+    df_assign = bins(df, freq, length)
+
+    counts = get_assigned_counts(df, df_assign.start_date, df_assign.end_date, by="assignee")
+
+    contributors = sorted(df["assignee"].dropna().unique())
+    assert sorted(counts.columns) == contributors
+    for contrib in contributors:
+        expected = [contrib_assignment(df, s, e, contrib) for s, e in zip(df_assign.start_date, df_assign.end_date)]
+        np.testing.assert_array_equal(counts[contrib], expected)
+
+
+def test_bin_boundaries():
+    day = pd.Timestamp("2022-01-02", tz="UTC")
+    df_assign = bins(
+        pd.DataFrame({"created": [day], "closed": [day + pd.Timedelta(days=3)]}), "D", pd.DateOffset(days=1)
+    )
+    df = pd.DataFrame(
+        {
+            "issue_id": [1, 2, 3],
+            # created at a bin's end, closed at a bin's start, still open.
+            "created": [day + pd.Timedelta(days=1), day, day],
+            "closed": [pd.NaT, day + pd.Timedelta(days=2), pd.NaT],
+            # assigned at a bin's end, on creation, before creation.
+            "assign_date": [day + pd.Timedelta(days=1), day, day - pd.Timedelta(days=1)],
+            "assignment_action": ["assigned", "assigned", "assigned"],
+            "assignee": ["a", "b", "c"],
+        }
+    )
+    df["closed"] = pd.to_datetime(df["closed"], utc=True)
+
+    expected = np.array([issue_assignment(df, s, e) for s, e in zip(df_assign.start_date, df_assign.end_date)])
+
+    np.testing.assert_array_equal(get_assigned_counts(df, df_assign.start_date, df_assign.end_date), expected[:, 0])
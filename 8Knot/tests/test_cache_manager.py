@@ -0,0 +1,149 @@
+import datetime as dt
+import pandas as pd
+import pytest
+from cache_manager import frame_cache
+from cache_manager.cache_manager import CacheManager
+from cache_manager.partition import partition_by_repo
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """CacheManager whose blobs come from a dict instead of Redis."""
+    blobs = {}
+    cm = CacheManager()
+    monkeypatch.setattr(cm, "existsm", lambda func, repos: sum(r in blobs for r in repos))
+    monkeypatch.setattr(cm, "getm", lambda func, repos: [blobs[r] for r in repos])
+    return cm, blobs
+
+
+def commits(rows):
+    return pd.DataFrame(rows, columns=["id", "commits", "author_timestamp"])
+
+
+def test_grabm_filters_rows_by_date(cache):
+    cm, blobs = cache
+    df = commits(
+        [
+            [1, "a", dt.date(2022, 1, 1)],
+            [1, "b", dt.date(2022, 6, 1)],
+            [2, "c", dt.date(2023, 1, 1)],
+        ]
+    )
+    blobs.update(zip([1, 2], partition_by_repo(df, [1, 2])))
+
+    out = cm.grabm(None, [1, 2], columns=["commits"], filters={"author_timestamp": ("2022-03-01", None)})
+
+    assert out["commits"].tolist() == ["b", "c"]
+
+
+def test_grabm_filters_repo_without_rows(cache):
+    cm, blobs = cache
+    df = commits([[1, "a", dt.date(2022, 1, 1)]])
+
+    # the whole result is empty for repo 2, its dates are written as Arrow's null type.
+    blobs[1] = partition_by_repo(df, [1])[0]
+    blobs[2] = partition_by_repo(df.iloc[:0], [2])[0]
+
+    out = cm.grabm(
+        None,
+        [1, 2],
+        columns=["commits", "author_timestamp"],
+        filters={"author_timestamp": ("2021-01-01", "2022-12-31")},
+    )
+
+    assert out["commits"].tolist() == ["a"]
+
+
+def test_grabm_tolerates_missing_columns(cache):
+    cm, blobs = cache
+    blobs[1] = partition_by_repo(commits([[1, "a", dt.date(2022, 1, 1)]]), [1])[0]
+
+    # blob of a repo written without any columns.
+    blobs[2] = partition_by_repo(pd.DataFrame({"id": pd.Series([], dtype="int64")}), [2], drop_id=True)[0]
+
+    out = cm.grabm(None, [1, 2], columns=["commits"], filters={"author_timestamp": (None, "2022-12-31")})
+
+    assert out["commits"].tolist() == ["a"]
+
+
+def test_wait_for_waits_again_for_dropped_key(cache, monkeypatch):
+    cm, blobs = cache
+    blob = partition_by_repo(commits([[1, "a", dt.date(2022, 1, 1)]]), [1])[0]
+
+    # the key is gone at the first read and set again before the second wait ends.
+    waits = []
+
+    def wait(func, repos, timeout, recheck):
+        waits.append(timeout)
+        if len(waits) == 2:
+            blobs[1] = blob
+        return True
+
+    monkeypatch.setattr(cm, "_wait", wait)
+
+    out = cm.wait_for(None, [1], columns=["commits"])
+
+    assert len(waits) == 2
+    assert out["commits"].tolist() == ["a"]
+
+
+def test_wait_for_times_out_on_dropped_key(cache, monkeypatch):
+    cm, _ = cache
+    monkeypatch.setattr(cm, "_wait", lambda func, repos, timeout, recheck: timeout > 0)
+
+    assert cm.wait_for(None, [1], timeout=0.01) is None
+
+
+def commits_query():
+    """Stands in for a query function, only its name is used."""
+
+
+def prepare_commits(df):
+    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True)
+    df["commits"] = df["commits"].astype("category")
+    return df.sort_values("author_timestamp")
+
+
+def test_prepared_frame_is_read_only(cache, monkeypatch):
+    cm, blobs = cache
+    blobs[1] = partition_by_repo(
+        commits([[1, "a", dt.date(2022, 1, 1)], [1, "b", dt.date(2022, 6, 1)]]).assign(lines=[3, 4]), [1]
+    )[0]
+    monkeypatch.setattr(cm, "_wait", lambda func, repos, timeout, recheck: True)
+    monkeypatch.setattr(cm, "get_generations", lambda func, repos: [7 for _ in repos])
+    monkeypatch.setattr(frame_cache, "frames", frame_cache.FrameCache(2**20))
+
+    df = cm.wait_for_prepared(commits_query, [1], prepare_commits)
+
+    for col, value in [
+        ("lines", 9),
+        ("commits", "b"),
+        ("author_timestamp", pd.Timestamp("2023-01-01", tz="UTC")),
+    ]:
+        if frame_cache.COPY_ON_WRITE:
+            # the write copies the column, the shared frame is unchanged.
+            df.loc[0, col] = value
+        else:
+            with pytest.raises(ValueError, match="read-only"):
+                df.loc[0, col] = value
+
+    # columns can still be added, and the next callback gets the data unchanged.
+    df["year"] = df["author_timestamp"].dt.year
+    again = cm.wait_for_prepared(commits_query, [1], prepare_commits)
+
+    assert again["lines"].tolist() == [3, 4]
+    assert again["commits"].tolist() == ["a", "b"]
+    assert again["author_timestamp"].iloc[0] == pd.Timestamp("2022-01-01", tz="UTC")
+    assert "year" not in again.columns
+
+
+def test_refresh_since_reaches_back_from_oldest_watermark(cache, monkeypatch):
+    cm, blobs = cache
+    blobs.update({1: b"", 2: b""})
+    monkeypatch.setattr(cm, "get_watermarks", lambda func, repos: ["2023-03-10", "2023-03-02"])
+    monkeypatch.setattr("cache_manager.cache_manager.QUERY_REFRESH_LOOKBACK_DAYS", 7)
+
+    assert cm.refresh_since(None, [1, 2]) == "2023-02-23"
+
+    # a repo that was never cached is pulled in full.
+    assert cm.refresh_since(None, [1, 3]) is None
@@ -0,0 +1,86 @@
+import threading
+import time
+import pandas as pd
+import pytest
+from db_manager import catalog
+from db_manager.augur_manager import AugurManager
+
+
+def search_bar(repos):
+    return pd.DataFrame(repos, columns=["repo_git", "repo_id", "repo_name", "rg_name"])
+
+
+REPOS = [
+    ["https://github.com/a/x", 1, "x", "a"],
+    ["https://github.com/b/y", 2, "y", "b"],
+    ["https://github.com/a/z", 3, "z", "a"],
+]
+
+
+def test_version_is_content_hash():
+    first = catalog.make_snapshot(search_bar(REPOS), {1: 10})
+
+    # the same catalog in another row order has the same version.
+    again = catalog.make_snapshot(search_bar(REPOS[::-1]), {1: 10})
+    assert catalog.get_snapshot_version(again) == catalog.get_snapshot_version(first)
+
+    changed = catalog.make_snapshot(search_bar(REPOS), {1: 11})
+    assert catalog.get_snapshot_version(changed) != catalog.get_snapshot_version(first)
+
+
+@pytest.fixture
+def augur(monkeypatch):
+    """AugurManager with a loaded catalog, whose snapshots come from 'published' instead of Redis."""
+    for k in ["AUGUR_USERNAME", "AUGUR_PASSWORD", "AUGUR_HOST", "AUGUR_PORT", "AUGUR_DATABASE", "AUGUR_SCHEMA"]:
+        monkeypatch.setenv(k, "x")
+
+    published = {"snapshot": catalog.make_snapshot(search_bar(REPOS), {})}
+    monkeypatch.setattr(catalog, "load", lambda: published["snapshot"])
+    monkeypatch.setattr(catalog, "get_version", lambda: catalog.get_snapshot_version(published["snapshot"]))
+    monkeypatch.setattr(catalog, "CATALOG_CHECK_SECONDS", 0)
+
+    augur = AugurManager()
+    augur.multiselect_startup()
+    return augur, published
+
+
+def wait_for_reload(augur):
+    # the reload runs in the background, it's done once the lock is free.
+    deadline = time.monotonic() + 10
+    while augur._catalog_lock.locked() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_lookups_reload_in_background(augur, monkeypatch):
+    augur, published = augur
+    assert augur.repo_git_to_id("https://github.com/c/w") is None
+    wait_for_reload(augur)
+
+    published["snapshot"] = catalog.make_snapshot(search_bar(REPOS + [["https://github.com/c/w", 4, "w", "c"]]), {})
+
+    # the lookup answers from the current catalog while the new one loads.
+    reloaded = threading.Event()
+    load_catalog = augur._load_catalog
+    monkeypatch.setattr(augur, "_load_catalog", lambda s: (load_catalog(s), reloaded.set()))
+
+    augur.repo_git_to_id("https://github.com/c/w")
+    assert reloaded.wait(10)
+    wait_for_reload(augur)
+
+    assert augur.repo_git_to_id("https://github.com/c/w") == 4
+    assert augur.is_org("c")
+
+
+def test_unchanged_catalog_isnt_reloaded(augur, monkeypatch):
+    augur, published = augur
+
+    # republished with the same contents.
+    published["snapshot"] = catalog.make_snapshot(search_bar(REPOS[::-1]), {})
+
+    loads = []
+    monkeypatch.setattr(augur, "_load_catalog", loads.append)
+
+    augur.get_search_index()
+    wait_for_reload(augur)
+
+    assert loads == []
@@ -0,0 +1,128 @@
+import itertools
+import numpy as np
+import pytest
+from rapidfuzz import fuzz
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from pages.utils import company_utils
+from pages.utils.company_utils import MATCH_THRESHOLD
+
+# spellings of companies as contributors put them in their profiles.
+NAMES = [
+    "Red Hat",
+    "Red Hat, Inc.",
+    "RedHat",
+    "@redhat",
+    "redhat.com",
+    "Red Hat Software",
+    "IBM",
+    "IBM Research",
+    "International Business Machines",
+    "Microsoft",
+    "Microsoft Corporation",
+    "MSFT",
+    "@microsoft",
+    "Google",
+    "Google LLC",
+    "Google Inc",
+    "Alphabet",
+    "Intel",
+    "Intel Corporation",
+    "Intel Corp.",
+    "VMware",
+    "VMware, Inc.",
+    "Amazon",
+    "Amazon Web Services",
+    "AWS",
+    "Apple",
+    "Meta",
+    "Facebook",
+    "University of Washington",
+    "UW",
+    "University of California, Berkeley",
+    "UC Berkeley",
+    "MIT",
+    "Massachusetts Institute of Technology",
+    "The Linux Foundation",
+    "Linux Foundation",
+    "Apache Software Foundation",
+    "ASF",
+    "Mozilla",
+    "Mozilla Foundation",
+    "Canonical",
+    "Canonical Ltd.",
+    "SUSE",
+    "SUSE LLC",
+    "Huawei",
+    "Huawei Technologies",
+    "Alibaba",
+    "Alibaba Cloud",
+    "ByteDance",
+    "Tencent",
+    "Samsung",
+    "Samsung Electronics",
+    "Oracle",
+    "Cisco",
+    "Cisco Systems",
+    "NVIDIA",
+    "Nvidia Corporation",
+    "freelance",
+    "Freelancer",
+    "Self-employed",
+    "self",
+    "none",
+    "N/A",
+    "Student",
+    "CERN",
+    "GitHub",
+    "GitLab",
+    "JetBrains",
+    "HashiCorp",
+    "Datadog",
+]
+
+
+def brute_force_clusters(names):
+    """Connected components of the pairs matched by scoring every pair one at a time."""
+    n = len(names)
+    pairs = [(i, j) for i, j in itertools.combinations(range(n), 2) if fuzz.partial_ratio(names[i], names[j]) >= 70]
+    rows, cols = zip(*pairs) if pairs else ((), ())
+    graph = sparse.coo_matrix((np.ones(len(pairs)), (rows, cols)), shape=(n, n))
+    return connected_components(graph, directed=False)[1], pairs
+
+
+def same_partition(a, b):
+    return len(set(zip(a, b))) == len(set(a)) == len(set(b))
+
+
+@pytest.mark.parametrize("block_rows", [1024, 7, 1])
+def test_every_match_of_the_fixed_names_is_found(monkeypatch, block_rows):
+    monkeypatch.setattr(company_utils, "BLOCK_ROWS", block_rows)
+    names = sorted(set(NAMES))
+
+    expected, pairs = brute_force_clusters(names)
+    labels = company_utils._cluster_names(names)
+
+    # recall of the matched pairs is 1, and nothing else is joined.
+    assert all(labels[i] == labels[j] for i, j in pairs)
+    assert same_partition(labels, expected)
+
+    cluster = dict(zip(names, labels))
+    assert cluster["Red Hat"] == cluster["Red Hat, Inc."] == cluster["@redhat"]
+    assert cluster["Intel"] == cluster["Intel Corp."]
+    assert cluster["Red Hat"] != cluster["IBM"]
+
+
+def test_random_names_match_brute_force(monkeypatch):
+    monkeypatch.setattr(company_utils, "BLOCK_ROWS", 50)
+    rng = np.random.default_rng(0)
+    words = ["red", "hat", "inc", "corp", "micro", "soft", "labs", "data", "cloud", "open", "source", "ab", "x"]
+    names = sorted({" ".join(rng.choice(words, size=rng.integers(1, 4))) for _ in range(400)})
+
+    expected, _ = brute_force_clusters(names)
+
+    assert same_partition(company_utils._cluster_names(names), expected)
+
+
+def test_no_names():
+    assert company_utils._cluster_names([]) == []
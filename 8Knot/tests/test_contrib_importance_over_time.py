@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pages.contributors.visualizations.contrib_importance_over_time import (
+    ACTION_TYPES,
+    calc_cntrb_prolificacy,
+    get_window_counts,
+)
+
+
+def cntrb_prolificacy_over_time(df, period_from, period_to, threshold):
+    """Per-window prolificacy as computed before get_window_counts, the reference."""
+    # subset df such that the rows correspond to the window of time defined by period from and period to
+    time_mask = (df["created_at"] >= period_from) & (df["created_at"] <= period_to)
+    df_in_range = df.loc[time_mask]
+
+    # count the number of contributions each contributor has made according each action type
+    df_count_cntrbs = df_in_range.groupby(["Action", "cntrb_id"])["cntrb_id"].count().to_frame()
+    df_count_cntrbs = df_count_cntrbs.rename(columns={"cntrb_id": "count"}).reset_index()
+
+    # pivot df such that the column names correspond to the different action types, index is the cntrb_ids, and the values are the number of contributions of each contributor
+    df_count_cntrbs = df_count_cntrbs.pivot(index="cntrb_id", columns="Action", values="count")
+
+    # by action name, the old code returned PR Review and PR Comment swapped.
+    return {action_type: prolificacy(df_count_cntrbs, action_type, threshold) for action_type in ACTION_TYPES}
+
+
+def prolificacy(df, action_type, threshold):
+    """calc_cntrb_prolificacy of a single window and action type, as it was before."""
+    # if the df is empty return None
+    if df.empty:
+        return None
+
+    # if the specified action type is not in the dfs' cols return None
+    if action_type not in df.columns:
+        return None
+
+    # sort rows in df based on number of contributions from greatest to least
+    df = df.sort_values(by=action_type, ascending=False)
+
+    # calculate the threshold amount of contributions
+    thresh_cntrbs = df[action_type].sum() * threshold
+
+    # drop rows where the cntrb_id is None
+    mask = df.index.get_level_values("cntrb_id") == None
+    df = df[~mask]
+
+    # initilize running sum of contributors who make up contributor prolificacy
+    cntrb_prolificacy = 0
+
+    # initialize running sum of contributions
+    running_sum = 0
+
+    for _, row in df.iterrows():
+        running_sum += row[action_type]  # update the running sum by the number of contributions a contributor has made
+        cntrb_prolificacy += 1  # update contributor prolificacy
+        # if the running sum of contributions is greater than or equal to the threshold amount, break
+        if running_sum >= thresh_cntrbs:
+            break
+
+    return cntrb_prolificacy
+
+
+def random_contributions(rng, n_rows, n_cntrbs, days):
+    """
+    Contributions at midnight of random days, so that many fall exactly on
+    window bounds, in chronological order. Some have no contributor, and
+    'PR Review' is rare so that some windows have none.
+    """
+    start = pd.Timestamp("2019-01-31", tz="UTC")
+    created = start + pd.to_timedelta(rng.integers(0, days, n_rows), unit="D")
+    actions = np.array(ACTION_TYPES[:-1])[rng.integers(0, len(ACTION_TYPES) - 1, n_rows)]
+    actions[rng.random(n_rows) < 0.01] = "PR Review"
+
+    # a few prolific contributors and a long tail.
+    cntrbs = np.minimum(rng.zipf(1.5, n_rows), n_cntrbs).astype(str).astype(object)
+    cntrbs[rng.random(n_rows) < 0.02] = None
+
+    df = pd.DataFrame({"created_at": created, "Action": actions, "cntrb_id": cntrbs})
+    return df.sort_values("created_at", kind="stable").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("window_width, step_size", [(1, 1), (6, 1), (12, 3), (3, 6)])
+@pytest.mark.parametrize("threshold", [0.1, 0.5, 0.8, 0.9])
+@pytest.mark.parametrize("seed", range(2))
+def test_matches_per_window_prolificacy(window_width, step_size, threshold, seed):
+    rng = np.random.default_rng(seed)
+    df = random_contributions(rng, n_rows=800, n_cntrbs=60, days=3 * 365)
+
+    period_from = pd.date_range(
+        start=df["created_at"].min(), end=df["created_at"].max(), freq=pd.offsets.MonthEnd(step_size), inclusive="both"
+    )
+    df_final = period_from.to_frame(index=False, name="period_from")
+    df_final["period_to"] = df_final["period_from"] + pd.DateOffset(months=window_width)
+
+    df_counts = get_window_counts(df, df_final["period_from"], df_final["period_to"])
+    df_prolificacy = calc_cntrb_prolificacy(df_counts, len(df_final), threshold)
+
+    expected = pd.DataFrame(
+        [cntrb_prolificacy_over_time(df, f, t, threshold) for f, t in zip(df_final.period_from, df_final.period_to)]
+    )
+    for action_type in ACTION_TYPES:
+        got = df_prolificacy.get(action_type, pd.Series(np.nan, index=df_final.index))
+        np.testing.assert_array_equal(got.to_numpy(dtype=float), expected[action_type].to_numpy(dtype=float))
+
+
+def test_window_counts_include_both_bounds():
+    day = pd.Timestamp("2022-01-01", tz="UTC")
+    df = pd.DataFrame(
+        {
+            "created_at": [day - pd.Timedelta(days=1), day, day + pd.Timedelta(days=1), day + pd.Timedelta(days=2)],
+            "Action": ["Commit"] * 4,
+            "cntrb_id": ["a", "a", "b", "c"],
+        }
+    )
+
+    df_counts = get_window_counts(df, pd.Series([day]), pd.Series([day + pd.Timedelta(days=1)]))
+
+    assert dict(zip(df_counts["cntrb_id"], df_counts["count"])) == {"a": 1, "b": 1}
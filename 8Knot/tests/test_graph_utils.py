@@ -0,0 +1,110 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from pages.utils.graph_utils import aggregate_by_interval, get_bin_codes, get_bin_starts
+
+INTERVALS = ["D", "W", "M", "Y"]
+
+MEASURES = {
+    "rows": ("created", "size"),
+    "commits": ("commits", "nunique"),
+    "added": ("added", "sum"),
+    "removed": ("removed", "sum"),
+    "mean_removed": ("removed", "mean"),
+    "reviewers": ("reviewer", "count"),
+}
+
+
+def aggregate_by_period(df, date_col, interval, **measures):
+    """Aggregates as the visualizations did before aggregate_by_interval, the reference."""
+    # variable to slice on to handle weekly period edge case
+    period_slice = None
+    if interval == "W":
+        # this is to slice the extra period information that comes with the weekly case
+        period_slice = 10
+
+    df = df[df[date_col].notna()]
+
+    with warnings.catch_warnings():
+        # to_period drops the timezone, the bins are the dates' wall time.
+        warnings.simplefilter("ignore", UserWarning)
+        periods = df[date_col].dt.to_period(interval).rename("Date")
+
+    df_out = df.groupby(by=periods).agg(**measures).reset_index()
+
+    # converts date column to a datetime object, converts to string first to handle period information
+    # the period slice is to handle weekly corner case
+    df_out["Date"] = pd.to_datetime(df_out["Date"].astype(str).str[:period_slice])
+    return df_out
+
+
+def random_frame(rng, n_rows, days, tz):
+    """
+    Rows at random times of random days, some at exactly midnight (the start
+    of a day, week, month or year bin), some without a date or values.
+    """
+    start = pd.Timestamp("2018-12-30", tz=tz)
+    created = start + pd.to_timedelta(rng.integers(0, days * 24, n_rows), unit="h")
+    created = pd.Series(created).where(rng.random(n_rows) > 0.5, created.normalize())
+    created[rng.random(n_rows) < 0.05] = pd.NaT
+
+    df = pd.DataFrame(
+        {
+            "created": created,
+            "commits": rng.integers(0, n_rows // 3, n_rows).astype(str),
+            "added": rng.integers(0, 100, n_rows),
+            "removed": rng.integers(0, 100, n_rows).astype(float),
+            "reviewer": rng.integers(0, 5, n_rows).astype(str).astype(object),
+        }
+    )
+    df.loc[rng.random(n_rows) < 0.1, "removed"] = np.nan
+    df.loc[rng.random(n_rows) < 0.1, "reviewer"] = None
+    df.loc[rng.random(n_rows) < 0.1, "commits"] = None
+    return df
+
+
+@pytest.mark.parametrize("interval", INTERVALS)
+@pytest.mark.parametrize("tz", [None, "UTC", "America/New_York"])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_groupby_over_periods(interval, tz, seed):
+    rng = np.random.default_rng(seed)
+    df = random_frame(rng, n_rows=500, days=3 * 365, tz=tz)
+
+    out = aggregate_by_interval(df, "created", interval, **MEASURES)
+    expected = aggregate_by_period(df, "created", interval, **MEASURES)
+
+    np.testing.assert_array_equal(
+        out["Date"].to_numpy(dtype="datetime64[ns]"), expected["Date"].to_numpy(dtype="datetime64[ns]")
+    )
+    for name in MEASURES:
+        np.testing.assert_allclose(out[name].to_numpy(dtype=float), expected[name].to_numpy(dtype=float))
+
+
+@pytest.mark.parametrize("interval", INTERVALS)
+def test_bin_starts_invert_bin_codes(interval):
+    dates = pd.date_range("1969-12-25", "1972-01-10", freq="D")
+
+    codes = get_bin_codes(dates, interval)
+    starts = get_bin_starts(codes, interval)
+
+    # every date falls in the bin starting at or before it, and codes are consecutive.
+    assert (starts <= dates).all()
+    assert (get_bin_codes(starts, interval) == codes).all()
+    assert set(np.diff(np.unique(codes))) == {1}
+
+
+def test_weeks_start_on_monday():
+    # 2023-01-01 was a Sunday, 2023-01-02 a Monday.
+    codes = get_bin_codes(pd.DatetimeIndex(["2023-01-01", "2023-01-02", "2023-01-08 23:59"]), "W")
+
+    assert codes[0] != codes[1] and codes[1] == codes[2]
+    assert get_bin_starts(codes[1:2], "W")[0] == pd.Timestamp("2023-01-02")
+
+
+def test_empty_frame():
+    df = pd.DataFrame({"created": pd.to_datetime(pd.Series([], dtype=object), utc=True), "added": []})
+
+    out = aggregate_by_interval(df, "created", "M", added=("added", "sum"))
+
+    assert list(out.columns) == ["Date", "added"] and len(out) == 0
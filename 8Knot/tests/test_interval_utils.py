@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+from pages.utils.interval_utils import get_open_counts_by_age
+
+# date_range frequencies of the graph's intervals ("D", "W", "M", "Y"),
+# with days of activity that give each a fair number of dates.
+INTERVALS = [
+    (pd.offsets.Day(), 400),
+    (pd.offsets.Week(weekday=6), 3 * 365),
+    (pd.offsets.MonthEnd(), 3 * 365),
+    (pd.offsets.YearEnd(), 8 * 365),
+]
+
+
+def get_new_staling_stale_up_to(df, date, staling_interval, stale_interval):
+    """Per-date counts as computed before get_open_counts_by_age, the reference."""
+    # drop rows that are more recent than the date limit
+    df_created = df[df["created"] <= date]
+
+    # drop rows that have been closed before date
+    df_in_range = df_created[df_created["closed"] > date]
+
+    # include rows that have a null closed value
+    df_in_range = pd.concat([df_in_range, df_created[df_created.closed.isnull()]])
+
+    # time difference for the amount of days before the threshold date
+    staling_days = date - relativedelta(days=+staling_interval)
+
+    # time difference for the amount of days before the threshold date
+    stale_days = date - relativedelta(days=+stale_interval)
+
+    # PRs still open at the specified date
+    numTotal = df_in_range.shape[0]
+
+    # num of currently open PRs that have been create in the last staling_value amount of days
+    numNew = df_in_range[df_in_range["created"] >= staling_days].shape[0]
+
+    staling = df_in_range[df_in_range["created"] > stale_days]
+    numStaling = staling[staling["created"] < staling_days].shape[0]
+
+    numStale = numTotal - (numNew + numStaling)
+
+    return [numNew, numStaling, numStale]
+
+
+def random_items(rng, n_rows, days):
+    """
+    Items created at midnight of random days, so that many of them fall
+    exactly on the dates and thresholds. Some are still open (NaT closed),
+    some are closed on the day they were created or exactly at a date.
+    """
+    start = pd.Timestamp("2019-01-31", tz="UTC")
+    created = start + pd.to_timedelta(rng.integers(0, days, n_rows), unit="D")
+    closed = created + pd.to_timedelta(rng.integers(0, days // 2, n_rows), unit="D")
+
+    df = pd.DataFrame({"created": created, "closed": closed})
+    df.loc[rng.random(n_rows) < 0.2, "closed"] = pd.NaT
+    df.loc[rng.random(n_rows) < 0.05, "closed"] = df["created"]
+    return df.sort_values("created", kind="stable").reset_index(drop=True)
+
+
+def with_boundaries(df, dates, staling_interval, stale_interval):
+    """Adds items closed exactly at a date and created exactly at its thresholds."""
+    d = dates[len(dates) // 2]
+    rows = pd.DataFrame(
+        {
+            "created": [
+                d - pd.Timedelta(days=staling_interval),
+                d - pd.Timedelta(days=stale_interval),
+                d,
+                d - pd.Timedelta(days=staling_interval),
+            ],
+            "closed": [d, pd.NaT, d, pd.NaT],
+        }
+    )
+    return pd.concat([df, rows]).sort_values("created", kind="stable").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("interval, days", INTERVALS, ids=["D", "W", "M", "Y"])
+@pytest.mark.parametrize("staling_interval, stale_interval", [(7, 30), (1, 2), (10, 10), (30, 365)])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_per_date_counts(interval, days, staling_interval, stale_interval, seed):
+    rng = np.random.default_rng(seed)
+    df = random_items(rng, n_rows=300, days=days)
+
+    earliest = df["created"].min()
+    latest = max(df["created"].max(), df["closed"].max())
+    dates = pd.date_range(start=earliest, end=latest, freq=interval, inclusive="both")
+    df = with_boundaries(df, dates, staling_interval, stale_interval)
+
+    new, staling, stale = get_open_counts_by_age(df["created"], df["closed"], dates, staling_interval, stale_interval)
+
+    expected = np.array([get_new_staling_stale_up_to(df, d, staling_interval, stale_interval) for d in dates])
+    expected = expected.reshape(len(dates), 3)
+
+    np.testing.assert_array_equal(new, expected[:, 0])
+    np.testing.assert_array_equal(staling, expected[:, 1])
+    np.testing.assert_array_equal(stale, expected[:, 2])
+
+
+def test_items_without_creation_date_are_never_open():
+    dates = pd.date_range("2022-01-01", "2022-01-05", freq="D", tz="UTC")
+    created = pd.Series(pd.to_datetime(["2022-01-02", None], utc=True))
+    closed = pd.Series(pd.to_datetime([None, None], utc=True))
+
+    new, staling, stale = get_open_counts_by_age(created, closed, dates, 1, 2)
+
+    np.testing.assert_array_equal(new + staling + stale, [0, 1, 1, 1, 1])
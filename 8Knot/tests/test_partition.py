@@ -0,0 +1,94 @@
+import datetime as dt
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from cache_manager.partition import RepoStreamWriter
+
+
+class FakeCache:
+    """Stands in for CacheManager, keeps the blobs set by the writer."""
+
+    def __init__(self):
+        self.blobs = {}
+
+    def setm(self, func, repos, datas, watermark=None):
+        self.blobs.update(zip(repos, datas))
+        return True
+
+
+def read_schema(blob):
+    return feather.read_table(pa.BufferReader(blob)).schema.remove_metadata()
+
+
+def test_repo_without_rows_keeps_column_types():
+    cache = FakeCache()
+    writer = RepoStreamWriter(cache, None, [1, 2, 3], drop_id=True, categories=["email_domain"])
+
+    # an empty first batch, as read_sql gives for a result without rows.
+    writer.write(pd.DataFrame({c: [] for c in ["id", "commits", "author_timestamp", "email_domain"]}, dtype=object))
+    writer.write(
+        pd.DataFrame(
+            {
+                "id": [1, 1, 3],
+                "commits": ["a", "b", "c"],
+                "author_timestamp": [dt.date(2022, 1, 1), dt.date(2022, 2, 1), dt.date(2022, 3, 1)],
+                "email_domain": ["x.com", "y.com", "x.com"],
+            }
+        )
+    )
+    writer.close()
+
+    # repo 2 had no rows, its blob has the types of the other repos' rows.
+    assert read_schema(cache.blobs[2]) == read_schema(cache.blobs[1])
+    assert read_schema(cache.blobs[2]).field("author_timestamp").type == pa.date32()
+    assert feather.read_table(pa.BufferReader(cache.blobs[2])).num_rows == 0
+
+
+def test_result_without_batches_has_columns():
+    cache = FakeCache()
+    writer = RepoStreamWriter(cache, None, [1], drop_id=True, columns=["id", "commits", "author_timestamp"])
+    writer.close()
+
+    assert read_schema(cache.blobs[1]).names == ["commits", "author_timestamp"]
+
+
+def read(blob):
+    return feather.read_table(pa.BufferReader(blob)).to_pandas()
+
+
+def test_batches_of_a_repo_stream_into_one_blob():
+    cache = FakeCache()
+    writer = RepoStreamWriter(cache, None, [1, 2], drop_id=True, categories=["email_domain"])
+
+    # repo 1 spans both batches, its dictionary grows in the second.
+    schema = pa.schema([("id", pa.int64()), ("commits", pa.string()), ("email_domain", pa.string())])
+    writer.write(pa.record_batch([[1, 1], ["a", "b"], ["x.com", None]], schema=schema))
+    writer.write(pa.record_batch([[1, 2, 2], ["c", "d", "e"], ["y.com", "x.com", "z.com"]], schema=schema))
+    writer.close()
+
+    one, two = read(cache.blobs[1]), read(cache.blobs[2])
+    assert one["commits"].tolist() == ["a", "b", "c"]
+    assert one["email_domain"].tolist()[::2] == ["x.com", "y.com"]
+    assert one["email_domain"].isna().tolist() == [False, True, False]
+    assert isinstance(one["email_domain"].dtype, pd.CategoricalDtype)
+    assert two["email_domain"].tolist() == ["x.com", "z.com"]
+
+
+def test_batches_are_cast_to_the_first_batchs_types():
+    cache = FakeCache()
+    writer = RepoStreamWriter(cache, None, [1, 2], categories=["email_domain"])
+
+    # the first batch has no domains, the second has them and an int column read as float.
+    writer.write(pd.DataFrame({"id": [1, 1], "rank": [1, 2], "email_domain": [None, None]}))
+    writer.write(pd.DataFrame({"id": [1, 2], "rank": [3.0, None], "email_domain": ["x.com", "y.com"]}))
+    writer.close()
+
+    assert read_schema(cache.blobs[1]) == read_schema(cache.blobs[2])
+    assert read_schema(cache.blobs[1]).field("rank").type == pa.int64()
+    assert pa.types.is_dictionary(read_schema(cache.blobs[1]).field("email_domain").type)
+
+    one = read(cache.blobs[1])
+    assert one["rank"].tolist() == [1, 2, 3]
+    assert one["email_domain"].isna().tolist() == [True, True, False]
+    assert one["email_domain"].iloc[2] == "x.com"
+    assert read(cache.blobs[2])["rank"].isna().all()
@@ -0,0 +1,108 @@
+import pytest
+from queries import refresh, shards
+
+
+class FakeCache:
+    """Cached repos, watermarks and leases per query, in place of Redis."""
+
+    def __init__(self, repos, marks, leases=None):
+        self.repos = repos
+        self.marks = marks
+        self.leases = leases if leases is not None else {}
+
+    def get_cached_repos(self, func):
+        return self.repos.get(func.__name__, [])
+
+    def get_watermarks(self, func, repos):
+        return [self.marks.get((func.__name__, r)) for r in repos]
+
+    def claimm(self, func, repos, job_id, ttl, replace=()):
+        for r in repos:
+            if self.leases.get((func.__name__, r)) in (None, *replace):
+                self.leases[(func.__name__, r)] = job_id
+        return [self.leases[(func.__name__, r)] for r in repos]
+
+
+class FakeResult:
+    def __init__(self, job_id, finished):
+        self.job_id = job_id
+        self.finished = finished
+
+    def ready(self):
+        return self.job_id in self.finished
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        refresh,
+        "dispatch_query",
+        lambda func, repos, job_id, refresh: calls.append((func, repos) if refresh else (func, repos, "full")),
+    )
+    # no repo's turn to be pulled in full, unless a test sets it.
+    monkeypatch.setattr(refresh, "QUERY_FULL_REFRESH_DAYS", 0)
+    return calls
+
+
+def test_group_by_watermark():
+    repos = [1, 2, 3, 4, 5]
+    marks = ["2023-01-01", None, "2021-01-01", "2022-01-01", None]
+
+    assert refresh.group_by_watermark(repos, marks, batch_repos=2) == [[2, 5], [3, 4], [1]]
+
+
+def test_refresh_without_watermark_is_batched(monkeypatch, dispatched):
+    cache = FakeCache({"home_metrics_query": list(range(250)), "commits_query": [1]}, {})
+    monkeypatch.setattr(refresh, "cm", lambda: cache)
+
+    n = refresh.refresh_cached_queries(queries=["home_metrics_query"])
+
+    assert n == 3
+    assert {f.__name__ for f, _ in dispatched} == {"home_metrics_query"}
+    assert [len(repos) for _, repos in dispatched] == [100, 100, 50]
+
+
+def test_default_refresh_leaves_out_queries_without_watermark(monkeypatch, dispatched):
+    cache = FakeCache({"home_metrics_query": [1], "commits_query": [1, 2]}, {("commits_query", 1): "2023-01-01"})
+    monkeypatch.setattr(refresh, "cm", lambda: cache)
+
+    refresh.refresh_cached_queries()
+
+    assert [(f.__name__, repos) for f, repos in dispatched] == [("commits_query", [2]), ("commits_query", [1])]
+
+
+def test_due_for_full_refresh_rotates_through_every_repo():
+    repos = list(range(1, 31))
+
+    days = [refresh.due_for_full_refresh(repos, day, days=7) for day in range(7)]
+
+    assert sorted(r for due in days for r in due) == repos
+    assert refresh.due_for_full_refresh(repos, 3, days=0) == []
+
+
+def test_repos_due_are_pulled_in_full(monkeypatch, dispatched):
+    marks = {("commits_query", r): "2023-01-01" for r in range(1, 7)}
+    cache = FakeCache({"commits_query": list(range(1, 7))}, marks)
+    monkeypatch.setattr(refresh, "cm", lambda: cache)
+    monkeypatch.setattr(refresh, "QUERY_FULL_REFRESH_DAYS", 3)
+
+    refresh.refresh_cached_queries(queries=["commits_query"])
+
+    incremental, full = dispatched
+    assert set(incremental[1]) | set(full[1]) == set(range(1, 7))
+    assert full[2] == "full" and len(full[1]) == 2
+
+
+def test_repos_in_flight_are_skipped(monkeypatch, dispatched):
+    # repo 2 is being extracted by a running job, repo 3's job has finished.
+    leases = {("commits_query", 2): "running", ("commits_query", 3): "finished"}
+    cache = FakeCache({"commits_query": [1, 2, 3]}, {}, leases)
+    monkeypatch.setattr(refresh, "cm", lambda: cache)
+    monkeypatch.setattr(shards.celery_app, "AsyncResult", lambda h: FakeResult(h, {"finished"}))
+
+    n = refresh.refresh_cached_queries(queries=["commits_query"])
+
+    assert n == 1
+    assert [repos for _, repos in dispatched] == [[1, 3]]
+    assert cache.leases[("commits_query", 2)] == "running"
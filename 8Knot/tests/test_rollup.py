@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cache_manager import rollup
+from cache_manager.rollup import COLUMNS, RELATIVE_ACCURACY, merge_rollups, summarize
+
+NOW = 1_700_000_000.0
+
+
+def rollup_of(values, measure="m", as_of=NOW, aging=False):
+    """Rollup of one repo's values of a measure, as home_metrics_query's SQL builds it."""
+    df = pd.DataFrame({"value": np.asarray(values, dtype=np.float64)})
+    df["bucket"] = rollup.get_buckets(df["value"])
+    df = (
+        df.groupby("bucket")["value"]
+        .agg(n="count", sum="sum", sumsq=lambda v: (v * v).sum(), min="min", max="max")
+        .reset_index()
+    )
+    df.insert(0, "measure", measure)
+    df["as_of"] = as_of
+    df["aging"] = aging
+    return df[COLUMNS]
+
+
+def random_repos(rng, n_repos):
+    """Values of a few repos, heavy-tailed like durations, with some zeros."""
+    repos = []
+    for _ in range(n_repos):
+        values = rng.lognormal(mean=rng.uniform(5, 12), sigma=2, size=rng.integers(1, 400))
+        values[rng.random(len(values)) < 0.05] = 0
+        repos.append(values)
+    return repos
+
+
+def assert_quantile_close(estimate, values, q, accuracy):
+    # the sketch finds the bucket holding the value at rank floor(q * (n - 1)).
+    true = np.quantile(values, q, method="lower")
+    assert abs(estimate - true) <= accuracy * true + 1e-9
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merged_stats_match_numpy(seed):
+    rng = np.random.default_rng(seed)
+    repos = random_repos(rng, n_repos=8)
+    values = np.concatenate(repos)
+
+    merged = merge_rollups(pd.concat([rollup_of(v) for v in repos]), now=NOW)
+    stats = summarize(merged, quantiles=(0, 0.1, 0.5, 0.9, 0.99, 1)).loc["m"]
+
+    assert stats["n"] == len(values)
+    assert stats["min"] == values.min() and stats["max"] == values.max()
+    np.testing.assert_allclose(stats["sum"], values.sum(), rtol=1e-9)
+    np.testing.assert_allclose(stats["mean"], values.mean(), rtol=1e-9)
+    np.testing.assert_allclose(stats["std"], values.std(), rtol=1e-6)
+
+    for q in (0, 0.1, 0.5, 0.9, 0.99, 1):
+        assert_quantile_close(stats[f"q{q}"], values, q, RELATIVE_ACCURACY)
+
+
+def test_measures_are_summarized_separately():
+    merged = merge_rollups(pd.concat([rollup_of([1, 2, 3], "a"), rollup_of([10, 20], "b")]), now=NOW)
+    stats = summarize(merged)
+
+    assert stats["n"].to_dict() == {"a": 3, "b": 2}
+    assert stats["mean"].to_dict() == {"a": 2, "b": 15}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_age_to_shifts_moments_and_rebuckets(seed):
+    rng = np.random.default_rng(seed)
+    repos = random_repos(rng, n_repos=4)
+    pulled = NOW - rng.uniform(0, 30 * 86400, len(repos))
+
+    df = pd.concat([rollup_of(v, as_of=t, aging=True) for v, t in zip(repos, pulled)])
+    aged = rollup.age_to(df, NOW)
+
+    # every value grew by the time since its repo was pulled.
+    values = np.concatenate([v + (NOW - t) for v, t in zip(repos, pulled)])
+    stats = summarize(merge_rollups(df, now=NOW), quantiles=(0.1, 0.5, 0.9)).loc["m"]
+
+    assert (aged["as_of"] == NOW).all()
+    np.testing.assert_allclose(stats["sum"], values.sum(), rtol=1e-9)
+    np.testing.assert_allclose(stats["std"], values.std(), rtol=1e-6)
+    np.testing.assert_allclose([stats["min"], stats["max"]], [values.min(), values.max()], rtol=1e-12)
+
+    # moved buckets are within 2 * RELATIVE_ACCURACY of their values.
+    for q in (0.1, 0.5, 0.9):
+        assert_quantile_close(stats[f"q{q}"], values, q, 2 * RELATIVE_ACCURACY)
+
+
+def test_age_to_leaves_other_measures_alone():
+    df = pd.concat(
+        [rollup_of([5, 50], "age", as_of=NOW - 100, aging=True), rollup_of([5, 50], "size", as_of=NOW - 100)]
+    )
+
+    aged = rollup.age_to(df, NOW).set_index("measure")
+
+    assert aged.loc["age", "min"].tolist() == [105, 150]
+    assert aged.loc["size", "min"].tolist() == [5, 50]
+    assert aged.loc["size", "bucket"].tolist() == df.set_index("measure").loc["size", "bucket"].tolist()
+
+
+def test_quantile_clips_to_bucket_range():
+    # all values in one bucket, whose representative value isn't any of them.
+    buckets = rollup_of([100.2, 100.4, 100.6])
+    assert len(buckets) == 1
+
+    assert rollup._quantile(buckets, 0) == pytest.approx(100.2, rel=RELATIVE_ACCURACY)
+    assert 100.2 <= rollup._quantile(buckets, 0.5) <= 100.6
+
+    # a single value is returned exactly.
+    assert rollup._quantile(rollup_of([1234.5]), 0.5) == 1234.5
+
+
+def test_quantile_rank_picks_bucket():
+    # 3 zeros, then one value each in far apart buckets.
+    buckets = rollup_of([0, 0, 0, 10, 1000])
+
+    assert rollup._quantile(buckets, 0) == 0
+    assert rollup._quantile(buckets, 0.5) == 0
+    # rank 0.75 * 4 = 3 is the first value past the zeros.
+    assert rollup._quantile(buckets, 0.75) == 10
+    assert rollup._quantile(buckets, 1) == 1000
+
+
+def test_buckets_are_within_relative_accuracy():
+    values = np.geomspace(1e-3, 1e9, 10_000)
+
+    represented = rollup.get_bucket_values(rollup.get_buckets(values))
+
+    assert np.all(np.abs(represented - values) <= RELATIVE_ACCURACY * values * (1 + 1e-9))
+    assert rollup.get_buckets([0, -5]).tolist() == [rollup.ZERO_BUCKET] * 2
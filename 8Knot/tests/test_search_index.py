@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from db_manager import search_index
+from db_manager.search_index import SearchIndex
+
+# few letters, so that short queries match many labels.
+ALPHABET = list("abcdeAB-/") + ["é", "ß"]
+
+
+def random_options(rng, n):
+    labels = ["".join(rng.choice(ALPHABET, size=rng.integers(1, 14))) for _ in range(n)]
+    return [{"label": label, "value": i} for i, label in enumerate(labels)]
+
+
+def brute_force(options, query, top_k):
+    """Options containing the query, ranked by label length, then given order."""
+    ranked = sorted(options, key=lambda o: len(o["label"]))
+    return [o for o in ranked if query.lower() in o["label"].lower()][:top_k]
+
+
+def random_queries(rng, options, n):
+    """Substrings of the labels and random strings, of 1 to 6 characters."""
+    queries = []
+    for _ in range(n):
+        if rng.random() < 0.7:
+            label = options[rng.integers(len(options))]["label"]
+            start = rng.integers(len(label))
+            queries.append(label[start : start + rng.integers(1, 7)])
+        else:
+            queries.append("".join(rng.choice(ALPHABET, size=rng.integers(1, 7))))
+    return queries
+
+
+@pytest.mark.parametrize("top_k", [1, 10, 100])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_brute_force(top_k, seed):
+    rng = np.random.default_rng(seed)
+    options = random_options(rng, 2000)
+    index = SearchIndex(options, top_k=top_k)
+
+    for query in random_queries(rng, options, 300):
+        assert index.search(query) == brute_force(options, query, top_k), query
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_typing_a_query_uses_complete_prefixes(seed):
+    rng = np.random.default_rng(seed)
+    options = random_options(rng, 2000)
+    index = SearchIndex(options, top_k=50, lru_size=8)
+
+    # every prefix of every query is searched, like typing it, with a small LRU.
+    for query in random_queries(rng, options, 100):
+        for j in range(1, len(query) + 1):
+            assert index.search(query[:j]) == brute_force(options, query[:j], 50), query[:j]
+
+    # only complete answers are kept, at most lru_size of them.
+    assert len(index._recent) <= 8
+    for q, ids in index._recent.items():
+        assert len(ids) < 50
+        assert [index.options[i] for i in ids] == brute_force(options, q.decode("utf-8"), 50)
+
+
+def test_trigram_postings_list_every_option_in_rank_order():
+    rng = np.random.default_rng(0)
+    options = random_options(rng, 500)
+    index = SearchIndex(options, top_k=5)
+
+    expected = {}
+    for i, label in enumerate(index._labels):
+        for j in range(len(label) - 2):
+            expected.setdefault(label[j : j + 3], set()).add(i)
+
+    codes, starts, ids = index._grams[3]
+    assert len(codes) == len(expected)
+    for gram, ranked in expected.items():
+        assert index._postings(gram).tolist() == sorted(ranked)
+
+
+@pytest.mark.parametrize("size", [1, 2])
+def test_short_postings_are_cut_at_top_k(size):
+    rng = np.random.default_rng(1)
+    options = random_options(rng, 2000)
+    index = SearchIndex(options, top_k=20)
+
+    codes, starts, ids = index._grams[size]
+    assert np.diff(starts).max() == 20
+
+    for gram in {label[:size] for label in index._labels if len(label) >= size}:
+        matching = [i for i, label in enumerate(index._labels) if gram in label]
+        assert index._postings(gram).tolist() == matching[:20]
+
+
+def test_cut_short_query_is_not_used_as_prefix():
+    options = [{"label": f"a{i:03d}", "value": i} for i in range(200)] + [{"label": "zz-ab", "value": "x"}]
+    index = SearchIndex(options, top_k=10)
+
+    # 'a' matches more options than top_k, so its answer isn't complete and
+    # 'ab' has to be found from the postings, not from the first 10 of 'a'.
+    assert len(index.search("a")) == 10
+    assert index.search("ab") == [{"label": "zz-ab", "value": "x"}]
+
+
+def test_query_spanning_labels_does_not_match():
+    index = SearchIndex([{"label": "ab", "value": 1}, {"label": "cd", "value": 2}])
+
+    assert index.search("bc") == []
+    assert index.search("b\0c") == []
+
+
+def test_walk_in_chunks(monkeypatch):
+    monkeypatch.setattr(search_index, "CHUNK_SIZE", 7)
+    rng = np.random.default_rng(2)
+    options = random_options(rng, 1000)
+    index = SearchIndex(options, top_k=30)
+
+    for query in random_queries(rng, options, 100):
+        assert index.search(query) == brute_force(options, query, 30), query
+
+
+def test_lookup_skips_unknown_values():
+    index = SearchIndex([{"label": "b", "value": 1}, {"label": "a", "value": 2}])
+
+    assert index.lookup([2, 3, 1]) == [{"label": "a", "value": 2}, {"label": "b", "value": 1}]